@@ -0,0 +1,26 @@
+#!/bin/bash
+# Performance Benchmark for WhisperS2T Appliance
+# Runs the offline realtime-factor benchmark against the transcription backends
+# Usage: scripts/performance-benchmark.sh [--backend openai-whisper faster-whisper appliance] [--model tiny] [--output FILE]
+#        scripts/performance-benchmark.sh --compare old.json new.json
+
+set -e
+
+# Colors for output
+BLUE='\033[0;34m'
+YELLOW='\033[1;33m'
+NC='\033[0m' # No Color
+
+print_info() {
+    echo -e "${YELLOW}[INFO]${NC} $1" >&2
+}
+
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+PYTHON="${PYTHON:-python3}"
+
+echo -e "${BLUE}=== WhisperS2T Performance Benchmark ===${NC}" >&2
+print_info "Python: $($PYTHON --version 2>&1)"
+print_info "Commit: $(git -C "$ROOT_DIR" rev-parse --short HEAD 2>/dev/null || echo unknown)"
+
+cd "$ROOT_DIR/src"
+exec "$PYTHON" -m tests.performance.benchmark "$@"
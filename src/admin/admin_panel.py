@@ -4,7 +4,6 @@ Modular admin interface with enhanced features
 """
 
 import logging
-import os
 from datetime import datetime
 from pathlib import Path
 
@@ -90,6 +89,10 @@ class AdminPanel:
         def api_system_status():
             return jsonify(self.system_monitor.get_system_status())
 
+        @bp.route('/api/v1/system/metrics')
+        def api_system_metrics():
+            return jsonify(self.system_monitor.get_metrics())
+
         @bp.route('/api/v1/models/status')
         def api_model_status():
             if not self.model_manager:
@@ -158,10 +161,7 @@ class AdminPanel:
                     # Construct a "completed" status if it's downloaded but not in download_progress dict
                     # This can happen if app restarts and download_progress is in-memory
                     model_info = self.model_manager.get_model_info(model_id)
-                    file_path = os.path.join(self.model_manager._get_model_cache_dir(), f"{model_id}.pt")
-                    size_bytes = 0
-                    if os.path.exists(file_path):
-                        size_bytes = os.path.getsize(file_path)
+                    size_bytes = self.model_manager.get_model_size(model_id)
 
                     progress_data = {
                         "status": "completed", "progress": 100,
@@ -232,7 +232,7 @@ class AdminPanel:
             else:
                 # Check if it was not downloaded in the first place
                 if not self.model_manager.is_model_downloaded(model_id) and \
-                   not os.path.exists(os.path.join(self.model_manager._get_model_cache_dir(), f"{model_id}.pt")):
+                   not self.model_manager.get_model_size(model_id):
                      # If delete_model_file returned false because it wasn't there to begin with.
                      # This case should ideally be handled by delete_model_file returning True if not found.
                      # Re-checking the logic in delete_model_file, it returns True if not downloaded.
@@ -21,44 +21,20 @@ class ChatStatisticsManager:
             return self._get_empty_statistics()
         
         try:
-            # Get recent history
-            recent_history = self.chat_history.get_recent_history(limit=100)
+            # Counts come from the history rollup table - no scan of the transcriptions
+            stats = self.chat_history.get_statistics()
             
-            # Calculate statistics
-            total_transcriptions = len(recent_history)
-            
-            # Count by source
             sources = {"live": 0, "upload": 0, "api": 0}
-            for entry in recent_history:
-                source = entry.get("source", "api")
-                if source in sources:
-                    sources[source] += 1
-            
-            # Time-based statistics
-            now = datetime.now()
-            last_24h = sum(1 for entry in recent_history 
-                          if self._is_within_hours(entry.get("timestamp"), 24))
-            last_7d = sum(1 for entry in recent_history 
-                         if self._is_within_days(entry.get("timestamp"), 7))
-            
-            # Language statistics
-            languages = {}
-            for entry in recent_history:
-                lang = entry.get("language", "unknown")
-                languages[lang] = languages.get(lang, 0) + 1
-            
-            # Average duration
-            durations = [entry.get("duration", 0) for entry in recent_history if entry.get("duration")]
-            avg_duration = sum(durations) / len(durations) if durations else 0
+            sources.update(stats.get("source_breakdown", {}))
             
             return {
-                "total": total_transcriptions,
+                "total": stats.get("total_transcriptions", 0),
                 "by_source": sources,
-                "last_24h": last_24h,
-                "last_7d": last_7d,
-                "languages": languages,
-                "avg_duration": round(avg_duration, 2),
-                "recent": recent_history[:10]  # Last 10 entries
+                "last_24h": stats.get("last_24h", 0),
+                "last_7d": stats.get("last_7d", 0),
+                "languages": stats.get("language_breakdown", {}),
+                "avg_duration": stats.get("average_duration", 0),
+                "recent": self.chat_history.get_recent_transcriptions(limit=10)
             }
             
         except Exception as e:
@@ -0,0 +1,184 @@
+"""
+Metrics Sampler for WhisperAppliance Admin
+Background collection of system metrics into a fixed-size NumPy ring buffer
+Requests read the latest snapshot or windowed aggregates without touching psutil
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Columns of the ring buffer, in order
+FIELDS = (
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "network_sent_per_sec",
+    "network_recv_per_sec",
+    "process_cpu_percent",
+    "process_memory_percent",
+    "process_threads",
+)
+
+# Aggregation windows in seconds
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+
+
+class MetricsSampler:
+    """Samples CPU, memory, disk, network and process metrics at a fixed interval"""
+
+    def __init__(self, interval_seconds=1.0, history_seconds=3600, disk_path="/"):
+        self.interval = max(0.05, float(interval_seconds))
+        self.capacity = int(math.ceil(history_seconds / self.interval)) + 1
+        self.disk_path = disk_path
+
+        self._times = np.full(self.capacity, -np.inf)
+        self._values = np.zeros((self.capacity, len(FIELDS)))
+        self._next = 0
+        self._lock = threading.Lock()
+        self._latest = None
+        self._last_network = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._process = psutil.Process(os.getpid())
+        # Non-blocking cpu_percent() measures since the previous call - prime both counters
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Take a first sample synchronously, then keep sampling in the background"""
+        if self.running:
+            return
+        self._stop.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._sample_loop, name="metrics-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics sampler started (every {self.interval:g}s, {self.capacity} samples kept)")
+
+    def shutdown(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def latest(self):
+        """Most recent snapshot (None before the first sample)"""
+        return self._latest
+
+    def sample(self):
+        """Record one sample; returns the snapshot"""
+        now = time.monotonic()
+        cpu = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        network = psutil.net_io_counters()
+        with self._process.oneshot():
+            process = {
+                "pid": self._process.pid,
+                "memory_percent": self._process.memory_percent(),
+                "cpu_percent": self._process.cpu_percent(interval=None),
+                "num_threads": self._process.num_threads(),
+            }
+
+        sent_rate = recv_rate = 0.0
+        if network:
+            if self._last_network is not None:
+                elapsed = max(now - self._last_network[0], 1e-6)
+                sent_rate = max(0.0, (network.bytes_sent - self._last_network[1]) / elapsed)
+                recv_rate = max(0.0, (network.bytes_recv - self._last_network[2]) / elapsed)
+            self._last_network = (now, network.bytes_sent, network.bytes_recv)
+
+        snapshot = {
+            "timestamp": datetime.now().isoformat(),
+            "cpu": {"percent": cpu, "count": psutil.cpu_count(), "count_logical": psutil.cpu_count(logical=True)},
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "percent": memory.percent,
+                "used": memory.used,
+                "free": memory.free,
+            },
+            "disk": {"total": disk.total, "used": disk.used, "free": disk.free, "percent": disk.percent},
+            "network": (
+                {
+                    "bytes_sent": network.bytes_sent,
+                    "bytes_recv": network.bytes_recv,
+                    "packets_sent": network.packets_sent,
+                    "packets_recv": network.packets_recv,
+                    "sent_per_sec": round(sent_rate, 1),
+                    "recv_per_sec": round(recv_rate, 1),
+                }
+                if network
+                else {}
+            ),
+            "process": process,
+        }
+
+        row = (
+            cpu,
+            memory.percent,
+            disk.percent,
+            sent_rate,
+            recv_rate,
+            process["cpu_percent"],
+            process["memory_percent"],
+            process["num_threads"],
+        )
+        with self._lock:
+            self._times[self._next] = now
+            self._values[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+        # Readers pick up the new snapshot with a single reference read
+        self._latest = snapshot
+        return snapshot
+
+    def aggregates(self, windows=None):
+        """avg/p95/max of every field over each window, e.g. {"1m": {"samples": 60, "cpu_percent": {...}}}"""
+        windows = windows or WINDOWS
+        with self._lock:
+            times = self._times.copy()
+            values = self._values.copy()
+
+        now = time.monotonic()
+        result = {}
+        for name, seconds in windows.items():
+            window = values[times >= now - seconds]
+            stats = {"samples": len(window)}
+            if len(window):
+                avg = window.mean(axis=0)
+                p95 = np.percentile(window, 95, axis=0)
+                peak = window.max(axis=0)
+                for column, field in enumerate(FIELDS):
+                    stats[field] = {
+                        "avg": round(float(avg[column]), 2),
+                        "p95": round(float(p95[column]), 2),
+                        "max": round(float(peak[column]), 2),
+                    }
+            result[name] = stats
+        return result
+
+    def _sample_loop(self):
+        # Fixed-rate schedule: sampling time does not accumulate as drift
+        next_run = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_run - time.monotonic())):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics sample failed: {e}")
+            next_run += self.interval
+            if next_run < time.monotonic():
+                # Fell behind (e.g. suspended) - skip missed slots instead of bursting
+                next_run = time.monotonic() + self.interval
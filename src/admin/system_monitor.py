@@ -6,87 +6,73 @@ Handles system status and performance monitoring
 import logging
 import os
 import platform
-import psutil
 from datetime import datetime
 
+from .metrics_sampler import MetricsSampler
+
 logger = logging.getLogger(__name__)
 
 
 class SystemMonitor:
     """Monitors system status and performance"""
     
-    def __init__(self, system_stats=None):
+    def __init__(self, system_stats=None, sample_interval=1.0, history_seconds=3600):
         self.system_stats = system_stats or {
             "uptime_start": datetime.now(),
             "total_transcriptions": 0,
             "transcriptions_by_source": {"live": 0, "upload": 0, "api": 0}
         }
+        self.platform_info = {
+            "system": platform.system(),
+            "release": platform.release(),
+            "version": platform.version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "python_version": platform.python_version()
+        }
         
-    def get_system_info(self):
-        """Get comprehensive system information"""
+        # Requests read sampled metrics instead of blocking on psutil
+        self.sampler = None
         try:
-            # CPU info
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
-            
-            # Memory info
-            memory = psutil.virtual_memory()
-            
-            # Disk info
-            disk = psutil.disk_usage('/')
-            
-            # Network info
-            network = psutil.net_io_counters()
-            
-            # Process info
-            process = psutil.Process(os.getpid())
-            
-            return {
-                "platform": {
-                    "system": platform.system(),
-                    "release": platform.release(),
-                    "version": platform.version(),
-                    "machine": platform.machine(),
-                    "processor": platform.processor(),
-                    "python_version": platform.python_version()
-                },
-                "cpu": {
-                    "percent": cpu_percent,
-                    "count": cpu_count,
-                    "count_logical": psutil.cpu_count(logical=True)
-                },
-                "memory": {
-                    "total": memory.total,
-                    "available": memory.available,
-                    "percent": memory.percent,
-                    "used": memory.used,
-                    "free": memory.free
-                },
-                "disk": {
-                    "total": disk.total,
-                    "used": disk.used,
-                    "free": disk.free,
-                    "percent": disk.percent
-                },
-                "network": {
-                    "bytes_sent": network.bytes_sent,
-                    "bytes_recv": network.bytes_recv,
-                    "packets_sent": network.packets_sent,
-                    "packets_recv": network.packets_recv
-                } if network else {},
-                "process": {
-                    "pid": process.pid,
-                    "memory_percent": process.memory_percent(),
-                    "cpu_percent": process.cpu_percent(),
-                    "num_threads": process.num_threads()
-                },
-                "uptime": self.get_uptime_seconds(),
-                "transcriptions": self.system_stats.get("total_transcriptions", 0),
-                "transcriptions_by_source": self.system_stats.get("transcriptions_by_source", {})
-            }
+            self.sampler = MetricsSampler(sample_interval, history_seconds)
+            self.sampler.start()
         except Exception as e:
-            logger.error(f"Error getting system info: {e}")
+            logger.error(f"Error starting metrics sampler: {e}")
+            self.sampler = None
+        
+    def get_system_info(self):
+        """Get comprehensive system information from the latest sample"""
+        snapshot = self.sampler.latest() if self.sampler else None
+        if snapshot is None:
             return self._get_fallback_system_info()
+        
+        return {
+            "platform": self.platform_info,
+            "cpu": snapshot["cpu"],
+            "memory": snapshot["memory"],
+            "disk": snapshot["disk"],
+            "network": snapshot["network"],
+            "process": snapshot["process"],
+            "sampled_at": snapshot["timestamp"],
+            "uptime": self.get_uptime_seconds(),
+            "transcriptions": self.system_stats.get("total_transcriptions", 0),
+            "transcriptions_by_source": self.system_stats.get("transcriptions_by_source", {})
+        }
+    
+    def get_metrics(self):
+        """Latest sample plus avg/p95/max over the 1m, 5m and 1h windows"""
+        if not self.sampler:
+            return {"latest": None, "windows": {}, "interval_seconds": None}
+        return {
+            "latest": self.sampler.latest(),
+            "windows": self.sampler.aggregates(),
+            "interval_seconds": self.sampler.interval
+        }
+    
+    def shutdown(self):
+        """Stop the background sampler"""
+        if self.sampler:
+            self.sampler.shutdown()
     
     def _get_fallback_system_info(self):
         """Fallback system info when psutil fails"""
@@ -101,7 +87,8 @@ class SystemMonitor:
             "network": {},
             "process": {"pid": os.getpid()},
             "uptime": self.get_uptime_seconds(),
-            "transcriptions": self.system_stats.get("total_transcriptions", 0)
+            "transcriptions": self.system_stats.get("total_transcriptions", 0),
+            "transcriptions_by_source": self.system_stats.get("transcriptions_by_source", {})
         }
     
     def get_uptime_seconds(self):
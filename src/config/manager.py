@@ -81,6 +81,54 @@ class ConfigManager:
         """Get update maintenance mode configuration"""
         return self.load_config("update_maintenance")
 
+    def get_inference_config(self) -> Dict[str, Any]:
+        """Get inference worker pool configuration"""
+        return self.load_config("inference")
+
+    def get_streaming_config(self) -> Dict[str, Any]:
+        """Get live streaming transcription configuration"""
+        return self.load_config("streaming")
+
+    def get_vad_config(self) -> Dict[str, Any]:
+        """Get voice activity detection configuration"""
+        return self.load_config("vad")
+
+    def get_batching_config(self) -> Dict[str, Any]:
+        """Get live inference micro-batching configuration"""
+        return self.load_config("batching")
+
+    def get_history_config(self) -> Dict[str, Any]:
+        """Get transcription history persistence configuration"""
+        return self.load_config("history")
+
+    def get_model_cache_config(self) -> Dict[str, Any]:
+        """Get resident model cache configuration"""
+        return self.load_config("model_cache")
+
+    def get_backend_config(self) -> Dict[str, Any]:
+        """Get Whisper inference backend configuration"""
+        return self.load_config("backend")
+
+    def get_jobs_config(self) -> Dict[str, Any]:
+        """Get background transcription job configuration"""
+        return self.load_config("jobs")
+
+    def get_parallel_config(self) -> Dict[str, Any]:
+        """Get long-file parallel transcription configuration"""
+        return self.load_config("parallel")
+
+    def get_result_cache_config(self) -> Dict[str, Any]:
+        """Get transcription result cache configuration"""
+        return self.load_config("result_cache")
+
+    def get_features_config(self) -> Dict[str, Any]:
+        """Get log-mel feature extraction configuration"""
+        return self.load_config("features")
+
+    def get_server_config(self) -> Dict[str, Any]:
+        """Get web server and graceful shutdown configuration"""
+        return self.load_config("server")
+
     def update_maintenance_config(self, config_data: Dict[str, Any]) -> bool:
         """Update maintenance mode configuration"""
         return self.save_config("maintenance", config_data)
@@ -19,6 +19,7 @@ Main entry point with preserved functionality and enhanced architecture
 - Improved error handling and logging
 """
 
+import atexit
 import logging
 import os
 import sys
@@ -30,26 +31,52 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
+# The gevent server is opt-in (async_mode "gevent", or "auto" to use it when installed); it must patch the
+# standard library before Flask, SocketIO and the worker threads import it
+from config import config_manager
+
+server_config = config_manager.get_server_config()
+ASYNC_MODE = os.environ.get("WHISPER_ASYNC_MODE", server_config.get("async_mode", "threading"))
+if ASYNC_MODE in ("auto", "gevent"):
+    try:
+        from gevent import monkey
+
+        monkey.patch_all()
+        ASYNC_MODE = "gevent"
+    except ImportError:
+        if ASYNC_MODE == "gevent":
+            print("⚠️ gevent not installed - serving with Werkzeug threads")
+        ASYNC_MODE = "threading"
+
 # Flask and extensions
 from flask import Flask, jsonify, render_template, request, send_from_directory
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_swagger_ui import get_swaggerui_blueprint
 from werkzeug.utils import secure_filename
 
 # Import our modular components with error handling
 try:
+    from admin import admin_bp, init_admin_panel  # Added for the new admin panel
     from modules import (
         ENTERPRISE_MAINTENANCE_AVAILABLE,
         UPDATE_MANAGER_AVAILABLE,
-        # AdminPanel, # Removed: Will use init_admin_panel from src.admin
         APIDocs,
         ChatHistoryManager,
+        GracefulShutdown,
+        HistoryImporter,
+        InferencePool,
         LiveSpeechHandler,
         ModelManager,
+        ParallelTranscriber,
+        ResultCache,
+        TranscriptionJobManager,
         UploadHandler,
+        VoiceActivityDetector,
     )
-    from admin import init_admin_panel, admin_bp # Added for the new admin panel
+    from modules.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+    from modules.metrics import REGISTRY as METRICS_REGISTRY
+    from modules.serving import server_options, stop_server
 
     print("✅ Core modules imported successfully")
 except ImportError as e:
@@ -102,7 +129,7 @@ app.config["SECRET_KEY"] = "whisper-s2t-enhanced-secret-key"
 CORS(app)
 
 # Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -137,8 +164,37 @@ else:
 
 # Initialize Model Manager and Chat History
 try:
-    model_manager = ModelManager()
-    chat_history = ChatHistoryManager()
+    # WHISPER_STUB_MODEL=<realtime factor> swaps in a placeholder model for load testing (no GPU or downloads)
+    stub_realtime_factor = os.environ.get("WHISPER_STUB_MODEL")
+    # openai-whisper unless faster-whisper (CTranslate2 int8) is configured: existing appliances keep their
+    # downloaded .pt models, batched decoding and the feature stage; either falls back to the other if not installed
+    backend_config = config_manager.get_backend_config()
+    model_manager = ModelManager(
+        stub_realtime_factor=float(stub_realtime_factor) if stub_realtime_factor else None,
+        cache_budget_mb=config_manager.get_model_cache_config().get("budget_mb", 3072),
+        backend=backend_config.get("backend", "openai-whisper"),
+        backend_options={
+            "device": backend_config.get("device", "cpu"),
+            "compute_type": backend_config.get("compute_type", "int8"),
+            "cpu_threads": backend_config.get("cpu_threads", 0),
+        },
+        feature_cache_mb=config_manager.get_features_config().get("cache_mb", 128),
+    )
+    # Placeholder transcripts from a stub run never reach the real history database
+    chat_history = ChatHistoryManager(
+        os.path.join(tempfile.gettempdir(), "whisper-appliance-stub-history.db") if stub_realtime_factor else None
+    )
+
+    # Transcription history is persisted from a background writer, never on the response path
+    history_config = config_manager.get_history_config()
+    if history_config.get("write_behind", True):
+        chat_history.enable_write_behind(
+            queue_size=history_config.get("queue_size", 10000),
+            batch_size=history_config.get("batch_size", 500),
+            flush_interval_ms=history_config.get("flush_interval_ms", 500),
+        )
+    atexit.register(chat_history.close)
+    history_importer = HistoryImporter(chat_history, batch_size=history_config.get("import_batch_size", 1000))
 
     # Initialize Update Manager if available
     if UPDATE_MANAGER_IMPORTED and UpdateManager is not None:
@@ -154,6 +210,7 @@ except Exception as e:
     # Use minimal fallback components
     model_manager = None
     chat_history = None
+    history_importer = None
     update_manager = None
 
 # Try to load default Whisper model
@@ -173,10 +230,136 @@ if model_manager:
 else:
     logger.warning("⚠️ Model Manager not available")
 
+# Start the inference worker pool - all transcriptions are queued here
+inference_config = config_manager.get_inference_config()
+inference_pool = None
+if model_manager and model_manager.whisper_available:
+    try:
+        inference_pool = InferencePool(
+            model_manager,
+            workers=inference_config.get("workers", 2),
+            queue_size=inference_config.get("queue_size", 8),
+            retry_after_seconds=inference_config.get("retry_after_seconds", 5),
+            job_timeout_seconds=inference_config.get("job_timeout_seconds", 600),
+        )
+        inference_pool.start()
+        atexit.register(inference_pool.shutdown)
+    except Exception as e:
+        logger.error(f"❌ Failed to start inference pool, transcribing on request threads: {e}")
+        inference_pool = None
+
+# Gauges are read from the live components when /metrics is scraped
+METRICS_REGISTRY.gauge("whisper_active_connections", "Connected WebSocket clients", lambda: len(connected_clients))
+METRICS_REGISTRY.gauge(
+    "whisper_total_transcriptions", "Transcriptions since start", lambda: system_stats["total_transcriptions"]
+)
+if inference_pool is not None:
+    METRICS_REGISTRY.gauge(
+        "whisper_inference_queue_depth",
+        "Jobs waiting for an inference worker",
+        lambda: inference_pool.get_status()["queue_depth"],
+    )
+    METRICS_REGISTRY.gauge(
+        "whisper_inference_busy_workers",
+        "Inference workers running a job",
+        lambda: inference_pool.get_status()["busy_workers"],
+    )
+
+# Voice activity detection - silence is skipped before it reaches the inference pool
+vad_config = config_manager.get_vad_config()
+voice_activity_detector = None
+if vad_config.get("enabled", True):
+    voice_activity_detector = VoiceActivityDetector(
+        frame_ms=vad_config.get("frame_ms", 30),
+        energy_threshold_db=vad_config.get("energy_threshold_db", -45.0),
+        noise_margin_db=vad_config.get("noise_margin_db", 10.0),
+        zcr_threshold=vad_config.get("zcr_threshold", 0.25),
+        min_speech_ms=vad_config.get("min_speech_ms", 150),
+        min_silence_ms=vad_config.get("min_silence_ms", 300),
+        padding_ms=vad_config.get("padding_ms", 200),
+    )
+
+# Long uploads run as background jobs; progress is pushed to SocketIO clients subscribed to the job
+jobs_config = config_manager.get_jobs_config()
+transcription_jobs = None
+if model_manager and model_manager.whisper_available and jobs_config.get("enabled", True):
+    try:
+        jobs_dir = os.path.dirname(chat_history.db_path) if chat_history and chat_history.db_path else tempfile.gettempdir()
+        transcription_jobs = TranscriptionJobManager(
+            os.path.join(jobs_dir, "transcription_jobs.db"),
+            (inference_pool or model_manager).transcribe,
+            workers=jobs_config.get("workers", 1),
+            chunk_seconds=jobs_config.get("chunk_seconds", 120),
+            retention_hours=jobs_config.get("retention_hours", 168),
+            vad=voice_activity_detector,
+            chat_history=chat_history,
+            on_update=lambda job: socketio.emit("job_progress", job, to=f"job:{job['job_id']}"),
+        )
+        transcription_jobs.start()
+        atexit.register(transcription_jobs.shutdown)
+    except Exception as e:
+        logger.error(f"❌ Failed to start transcription jobs: {e}")
+        transcription_jobs = None
+
+# Long uploads are split at silences and transcribed on a pool of worker processes
+parallel_config = config_manager.get_parallel_config()
+parallel_transcriber = None
+if model_manager and model_manager.whisper_available and parallel_config.get("enabled", True):
+    parallel_transcriber = ParallelTranscriber(
+        model_manager,
+        vad=voice_activity_detector,
+        max_processes=parallel_config.get("max_processes", 0),
+        min_duration_seconds=parallel_config.get("min_duration_seconds", 600),
+        piece_seconds=parallel_config.get("piece_seconds", 60),
+        memory_reserve_mb=parallel_config.get("memory_reserve_mb", 1024),
+        idle_timeout_seconds=parallel_config.get("idle_timeout_seconds", 300),
+    )
+    atexit.register(parallel_transcriber.shutdown)
+
+# Re-uploaded audio is answered from a content-addressed cache of finished results
+result_cache_config = config_manager.get_result_cache_config()
+result_cache = None
+if model_manager and model_manager.whisper_available and result_cache_config.get("enabled", True):
+    try:
+        cache_dir = os.path.dirname(chat_history.db_path) if chat_history and chat_history.db_path else tempfile.gettempdir()
+        result_cache = ResultCache(
+            os.path.join(cache_dir, "result_cache.db"),
+            max_mb=result_cache_config.get("max_mb", 256),
+            max_age_hours=result_cache_config.get("max_age_hours", 720),
+        )
+        METRICS_REGISTRY.gauge(
+            "whisper_result_cache_entries", "Transcription results in the cache", lambda: result_cache.get_status()["entries"]
+        )
+    except Exception as e:
+        logger.error(f"❌ Failed to open transcription result cache: {e}")
+        result_cache = None
+
 # Initialize module handlers with proper fallback handling
 try:
-    upload_handler = UploadHandler(model_manager, WHISPER_AVAILABLE, system_stats, chat_history)
-    live_speech_handler = LiveSpeechHandler(model_manager, WHISPER_AVAILABLE, system_stats, connected_clients, chat_history)
+    upload_handler = UploadHandler(
+        model_manager,
+        WHISPER_AVAILABLE,
+        system_stats,
+        chat_history,
+        inference_pool,
+        vad=voice_activity_detector,
+        jobs=transcription_jobs,
+        parallel=parallel_transcriber,
+        result_cache=result_cache,
+    )
+    live_speech_handler = LiveSpeechHandler(
+        model_manager,
+        WHISPER_AVAILABLE,
+        system_stats,
+        connected_clients,
+        chat_history,
+        inference_pool,
+        streaming_config=config_manager.get_streaming_config(),
+        vad=voice_activity_detector,
+        batching_config=config_manager.get_batching_config(),
+    )
+    if live_speech_handler.batcher is not None:
+        atexit.register(live_speech_handler.batcher.shutdown)
 
     # Initialize the new Admin Panel using init_admin_panel
     # The old admin_panel instantiation is removed.
@@ -187,6 +370,7 @@ try:
         if model_manager is not None and system_stats is not None:
             # Pass the imported admin_bp to init_admin_panel
             admin_panel_instance = init_admin_panel(app, admin_bp, model_manager=model_manager, system_stats=system_stats)
+            atexit.register(admin_panel_instance.system_monitor.shutdown)
             logger.info("✅ New Admin Panel initialized and blueprint registered.")
         else:
             logger.error("❌ Failed to initialize new Admin Panel: model_manager or system_stats not available.")
@@ -206,6 +390,41 @@ except Exception as e:
     admin_panel_instance = None # For the new one
     api_docs = None
 
+# On SIGTERM the appliance drains before it exits: open requests are answered, running jobs and queued
+# inference finish, and jobs not started yet stay queued for the next start
+graceful_shutdown = GracefulShutdown(timeout_seconds=server_config.get("drain_timeout_seconds", 60))
+graceful_shutdown.add(
+    "notify clients", lambda remaining: socketio.emit("server_shutdown", {"message": "Server is restarting"})
+)
+graceful_shutdown.add("open requests", graceful_shutdown.wait_for_requests)
+if transcription_jobs is not None:
+    graceful_shutdown.add("transcription jobs", lambda remaining: transcription_jobs.shutdown(wait=True, timeout=remaining))
+if live_speech_handler is not None and live_speech_handler.batcher is not None:
+    graceful_shutdown.add(
+        "micro-batcher", lambda remaining: live_speech_handler.batcher.shutdown(wait=True, timeout=remaining)
+    )
+if inference_pool is not None:
+    graceful_shutdown.add("inference pool", lambda remaining: inference_pool.shutdown(wait=True, timeout=remaining))
+
+# Requests that stay open while draining, and those turned away
+DRAIN_EXEMPT_PATHS = ("/health", "/metrics")
+
+
+@app.before_request
+def track_request():
+    graceful_shutdown.request_started()
+    if graceful_shutdown.draining and request.path not in DRAIN_EXEMPT_PATHS:
+        response = jsonify({"error": "Server is shutting down", "status": "draining"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+
+
+@app.teardown_request
+def finish_request(exc=None):
+    graceful_shutdown.request_finished()
+
+
 # Configure SwaggerUI
 SWAGGER_URL = "/docs"
 API_URL = "/api/openapi.json"
@@ -258,7 +477,7 @@ def health():
     model_status = model_manager.get_status()
     return jsonify(
         {
-            "status": "healthy",
+            "status": "draining" if graceful_shutdown.draining else "healthy",
             "whisper_available": WHISPER_AVAILABLE,
             "version": "0.9.0",
             "uptime_seconds": uptime,
@@ -268,7 +487,15 @@ def health():
             "timestamp": datetime.now().isoformat(),
             "model_status": model_status,
         }
-    )
+    ), (503 if graceful_shutdown.draining else 200)
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of request counts and per-stage latency histograms"""
+    from flask import Response
+
+    return Response(METRICS_REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
 
 
 # ==================== MODEL MANAGEMENT ROUTES ====================
@@ -365,8 +592,7 @@ def admin_get_model_download_progress(model_id: str):
         if model_manager.is_model_downloaded(model_id):
             # Try to get file size for consistency
             try:
-                model_path = os.path.join(model_manager._get_model_cache_dir(), f"{model_id}.pt")
-                file_size = os.path.getsize(model_path) if os.path.exists(model_path) else 0
+                file_size = model_manager.get_model_size(model_id)
                 progress_data = {
                     "status": "completed",
                     "progress": 100,
@@ -439,22 +665,36 @@ def get_chat_history_stats():
 
 @app.route("/api/chat-history/export", methods=["GET"])
 def export_chat_history():
-    """Export chat history"""
-    format = request.args.get("format", "json")
+    """Export chat history as a streamed download (json, ndjson or csv; ?gzip=1 for a .gz file)"""
+    from flask import Response, stream_with_context
 
-    if format not in ["json", "csv"]:
-        return jsonify({"error": "Invalid format. Use 'json' or 'csv'", "status": "error"}), 400
+    from modules.chat_history import EXPORT_FORMATS, gzip_stream
 
-    exported_data = chat_history.export_history(format)
+    format = request.args.get("format", "json")
 
-    if format == "csv":
-        from flask import Response
+    if format not in EXPORT_FORMATS:
+        return jsonify({"error": "Invalid format. Use 'json', 'ndjson' or 'csv'", "status": "error"}), 400
 
-        return Response(
-            exported_data, mimetype="text/csv", headers={"Content-Disposition": "attachment; filename=chat_history.csv"}
-        )
+    mimetypes = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+    filename = f"chat_history.{format}"
+    chunks = chat_history.iter_export(format)
+    headers = {}
+
+    if request.args.get("gzip", "").lower() in ("1", "true", "yes"):
+        # Compressed file download
+        chunks = gzip_stream(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
     else:
-        return jsonify({"data": exported_data, "format": format, "status": "success"})
+        mimetype = mimetypes[format]
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            # Transparent transfer compression
+            chunks = gzip_stream(chunks)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
 
 
 @app.route("/api/chat-history/update/<int:transcription_id>", methods=["PUT"])
@@ -519,7 +759,17 @@ def delete_chat_history_entry(transcription_id):
 
 @app.route("/api/chat-history/import", methods=["POST"])
 def import_chat_history():
-    """Import chat history from JSON or CSV file"""
+    """Import chat history from a JSON, NDJSON or CSV file
+
+    The upload is parsed as a stream and inserted in batches; rows already in the history are skipped.
+    With ?async=1 the import runs in the background and 202 returns a job id for
+    /api/chat-history/import/<job_id>.
+    """
+    from modules.history_import import FORMAT_EXTENSIONS
+
+    if not history_importer:
+        return jsonify({"error": "Chat history not available", "status": "error"}), 503
+
     try:
         # Check if file is present
         if "file" not in request.files:
@@ -533,28 +783,24 @@ def import_chat_history():
         filename = secure_filename(file.filename)
         file_ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
 
-        if file_ext not in ["json", "csv"]:
+        if file_ext not in FORMAT_EXTENSIONS:
             return (
                 jsonify(
                     {
-                        "error": f"Unsupported file format: {file_ext}. Only JSON and CSV files are supported.",
+                        "error": f"Unsupported file format: {file_ext}. Only JSON, NDJSON and CSV files are supported.",
                         "status": "error",
                     }
                 ),
                 400,
             )
+        file_format = FORMAT_EXTENSIONS[file_ext]
 
-        # Read file content
-        try:
-            file_content = file.read().decode("utf-8")
-        except UnicodeDecodeError:
-            return jsonify({"error": "File encoding error. Please ensure the file is UTF-8 encoded.", "status": "error"}), 400
-
-        if not file_content.strip():
-            return jsonify({"error": "File is empty", "status": "error"}), 400
+        if request.args.get("async", "").lower() in ("1", "true", "yes"):
+            job = history_importer.start(file.stream, file_format, filename)
+            return jsonify(job.to_dict()), 202
 
-        # Import the data
-        result = chat_history.import_history(file_content, file_ext, filename)
+        job = history_importer.run(file.stream, file_format, filename, total_bytes=request.content_length)
+        result = job.to_dict()
 
         # Return appropriate HTTP status based on result
         if result["status"] == "error":
@@ -569,6 +815,15 @@ def import_chat_history():
         return jsonify({"error": f"Import failed: {str(e)}", "status": "error"}), 500
 
 
+@app.route("/api/chat-history/import/<job_id>", methods=["GET"])
+def get_import_job(job_id):
+    """Progress of an import started with ?async=1"""
+    job = history_importer.get_job(job_id) if history_importer else None
+    if job is None:
+        return jsonify({"error": f"Import job {job_id} not found", "status": "error"}), 404
+    return jsonify(job.to_dict())
+
+
 @app.route("/api/chat-history/import/template/<format>", methods=["GET"])
 def get_import_template(format):
     """Get import template for JSON or CSV format"""
@@ -1545,6 +1800,46 @@ def transcribe_live():
     return upload_handler.transcribe_live_api()
 
 
+@app.route("/api/jobs", methods=["POST"])
+def submit_transcription_job():
+    """Queue a long upload for background transcription - Delegated to UploadHandler"""
+    if not upload_handler:
+        return jsonify({"error": "Upload handler not available"}), 503
+    return upload_handler.submit_job()
+
+
+@app.route("/api/jobs", methods=["GET"])
+def list_transcription_jobs():
+    """Most recent transcription jobs"""
+    if not transcription_jobs:
+        return jsonify({"error": "Transcription jobs not available"}), 503
+    return jsonify({"jobs": transcription_jobs.list_jobs(limit=request.args.get("limit", 50, type=int))})
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_transcription_job(job_id):
+    """Transcription job status and progress - Delegated to UploadHandler"""
+    if not upload_handler:
+        return jsonify({"error": "Upload handler not available"}), 503
+    return upload_handler.get_job(job_id)
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def get_transcription_job_result(job_id):
+    """Transcription job result as JSON, SRT or VTT - Delegated to UploadHandler"""
+    if not upload_handler:
+        return jsonify({"error": "Upload handler not available"}), 503
+    return upload_handler.get_job_result(job_id)
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_transcription_job(job_id):
+    """Cancel a transcription job - Delegated to UploadHandler"""
+    if not upload_handler:
+        return jsonify({"error": "Upload handler not available"}), 503
+    return upload_handler.cancel_job(job_id)
+
+
 @app.route("/api/status")
 def api_status():
     """Detailed API status - Enhanced version"""
@@ -1559,7 +1854,26 @@ def api_status():
                 "model_loaded": model_manager.get_current_model() is not None,
                 "model_type": model_manager.get_current_model_name() if model_manager.get_current_model() else None,
                 "model_loading": model_manager.is_model_loading(),
+                "backend": model_manager.backend.get_status() if model_manager and model_manager.backend else None,
             },
+            "inference": inference_pool.get_status() if inference_pool else {"running": False},
+            "model_cache": model_manager.model_cache.get_status() if model_manager else {"models": []},
+            "features": model_manager.features.get_status() if model_manager else {"cache_entries": 0},
+            "history_writer": (
+                chat_history.writer.get_status() if chat_history and chat_history.writer else {"running": False}
+            ),
+            "history_import": history_importer.get_status() if history_importer else {"jobs": 0},
+            "transcription_jobs": transcription_jobs.get_status() if transcription_jobs else {"running": False},
+            "result_cache": result_cache.get_status() if result_cache else {"enabled": False},
+            "parallel_transcription": (parallel_transcriber.get_status() if parallel_transcriber else {"enabled": False}),
+            "vad": voice_activity_detector.get_status() if voice_activity_detector else {"enabled": False},
+            "streaming": live_speech_handler.streaming.get_status() if live_speech_handler else {"active_sessions": 0},
+            "batching": (
+                live_speech_handler.batcher.get_status()
+                if live_speech_handler and live_speech_handler.batcher
+                else {"running": False}
+            ),
+            "server": {"async_mode": ASYNC_MODE, **graceful_shutdown.get_status()},
             "statistics": {
                 "uptime_seconds": uptime,
                 "total_transcriptions": system_stats["total_transcriptions"],
@@ -1571,11 +1885,12 @@ def api_status():
                 "health_check": "/health",
                 "upload_transcription": "/transcribe",
                 "live_transcription": "/api/transcribe-live",
+                "transcription_jobs": "/api/jobs",
                 "api_documentation": "/docs",
                 "admin_panel": "/admin",
             },
             "architecture": {
-                "framework": "Flask + SocketIO",
+                "framework": f"Flask + SocketIO ({ASYNC_MODE})",
                 "modules": ["live_speech", "upload_handler", "admin_panel", "api_docs"],
                 "features": ["Purple Gradient UI", "Real WebSocket", "Navigation", "Modular"],
             },
@@ -1603,6 +1918,8 @@ def openapi_spec():
 @socketio.on("connect")
 def handle_connect():
     """WebSocket connect - Delegated to LiveSpeechHandler"""
+    if graceful_shutdown.draining:
+        return False
     return live_speech_handler.handle_connect()
 
 
@@ -1618,6 +1935,18 @@ def handle_audio_chunk(data):
     return live_speech_handler.handle_audio_chunk(data)
 
 
+@socketio.on("negotiate_audio")
+def handle_negotiate_audio(data):
+    """Binary audio frame negotiation - Delegated to LiveSpeechHandler"""
+    return live_speech_handler.handle_negotiate_audio(data)
+
+
+@socketio.on("audio_frame")
+def handle_audio_frame(data):
+    """Binary audio frame - Delegated to LiveSpeechHandler"""
+    return live_speech_handler.handle_audio_frame(data)
+
+
 @socketio.on("start_recording")
 def handle_start_recording(data):
     """Start recording - NEW FEATURE"""
@@ -1642,6 +1971,24 @@ def handle_transcription_error(data):
     return live_speech_handler.handle_transcription_error(data)
 
 
+@socketio.on("subscribe_job")
+def handle_subscribe_job(data):
+    """Receive job_progress events for a transcription job on this connection"""
+    job = transcription_jobs.get_job((data or {}).get("job_id", "")) if transcription_jobs else None
+    if job is None:
+        emit("job_error", {"error": "Job not found", "job_id": (data or {}).get("job_id")})
+        return
+    join_room(f"job:{job['job_id']}")
+    # The current state right away, so a client subscribing late does not miss a finished job
+    emit("job_progress", job)
+
+
+@socketio.on("unsubscribe_job")
+def handle_unsubscribe_job(data):
+    """Stop receiving job_progress events for a transcription job"""
+    leave_room(f"job:{(data or {}).get('job_id', '')}")
+
+
 # ==================== ENTERPRISE MAINTENANCE ENDPOINTS (ADDITIVE) ====================
 
 
@@ -1760,11 +2107,6 @@ if __name__ == "__main__":
         logger.info("🏥 Health Check: https://localhost:5001/health")
         logger.info("🎙️ Microphone Access: ✅ Enabled via HTTPS")
         logger.info("⚠️  Browser Security Warning: Click 'Advanced' → 'Continue to localhost'")
-
-        # Run with SSL
-        socketio.run(
-            app, host="0.0.0.0", port=5001, debug=False, allow_unsafe_werkzeug=True, ssl_context=(ssl_cert_path, ssl_key_path)
-        )
     else:
         logger.warning("🔓 No SSL certificates found - Starting without HTTPS")
         logger.warning("🎙️ Microphone Access: ❌ Limited (HTTPS required for production)")
@@ -1774,8 +2116,11 @@ if __name__ == "__main__":
         logger.info("📚 API Docs: http://0.0.0.0:5001/docs")
         logger.info("🏥 Health Check: http://0.0.0.0:5001/health")
 
-        # Run without SSL
-        socketio.run(app, host="0.0.0.0", port=5001, debug=False, allow_unsafe_werkzeug=True)
+    logger.info(f"🚀 Server: {ASYNC_MODE}")
+    if ASYNC_MODE != "gevent":
+        logger.info("💡 Set async_mode to gevent in server.json for thousands of idle WebSocket clients")
+    graceful_shutdown.install(lambda: stop_server(socketio))
+    socketio.run(app, host="0.0.0.0", port=5001, debug=False, **server_options(ASYNC_MODE, ssl_cert_path, ssl_key_path))
 
     logger.info("✨ Features: Purple Gradient UI + REAL Live Speech + Upload + Full Navigation + HTTPS Support")
 
@@ -17,10 +17,25 @@ __author__ = "WhisperS2T Team"
 # Core module imports
 from .admin_panel import AdminPanel
 from .api_docs import APIDocs
+from .batching import MicroBatcher
 from .chat_history import ChatHistoryManager
+from .features import FeatureExtractor
+from .history_import import HistoryImporter
+from .inference_pool import InferencePool, InferenceQueueFull
 from .live_speech import LiveSpeechHandler
+from .metrics import MetricsRegistry
+from .model_cache import ModelCache
 from .model_manager import ModelManager
+from .parallel_transcription import ParallelTranscriber
+from .result_cache import ResultCache
+from .serving import GracefulShutdown
+from .sqlite_pool import SQLiteConnectionManager
+from .streaming import StreamingEngine
+from .transcription_jobs import TranscriptionJobManager
+from .transcription_options import InvalidOptionsError
 from .upload_handler import UploadHandler
+from .vad import VoiceActivityDetector
+from .whisper_backends import create_backend
 
 # Update System
 try:
@@ -61,7 +76,23 @@ __all__ = [
     "AdminPanel",
     "APIDocs",
     "ModelManager",
+    "ParallelTranscriber",
     "ChatHistoryManager",
+    "HistoryImporter",
+    "SQLiteConnectionManager",
+    "InferencePool",
+    "InferenceQueueFull",
+    "MicroBatcher",
+    "FeatureExtractor",
+    "MetricsRegistry",
+    "ModelCache",
+    "ResultCache",
+    "GracefulShutdown",
+    "StreamingEngine",
+    "InvalidOptionsError",
+    "TranscriptionJobManager",
+    "VoiceActivityDetector",
+    "create_backend",
     # Update System
     "UpdateManager",
     "create_update_endpoints",
@@ -8,8 +8,25 @@ import logging
 
 from flask import jsonify, request
 
+from .transcription_options import openapi_properties
+
 logger = logging.getLogger(__name__)
 
+# Request header that skips the result cache lookup (the fresh result still replaces the cached one)
+CACHE_BYPASS_PARAMETER = {
+    "name": "X-Cache-Bypass",
+    "in": "header",
+    "required": False,
+    "schema": {"type": "string", "enum": ["1"]},
+    "description": "Transcribe again even if this audio is cached (Cache-Control: no-cache works too)",
+}
+CACHE_STATUS_HEADER = {
+    "X-Cache": {
+        "schema": {"type": "string", "enum": ["HIT", "MISS", "BYPASS"]},
+        "description": "Whether the result came from the transcription result cache",
+    }
+}
+
 
 class APIDocs:
     """Manages SwaggerUI API documentation interface"""
@@ -66,6 +83,7 @@ class APIDocs:
                     "post": {
                         "summary": "Upload File Transcription",
                         "description": "Upload audio file for transcription",
+                        "parameters": [CACHE_BYPASS_PARAMETER],
                         "requestBody": {
                             "required": True,
                             "content": {
@@ -77,7 +95,8 @@ class APIDocs:
                                                 "type": "string",
                                                 "format": "binary",
                                                 "description": "Audio file (WAV, MP3, M4A, FLAC)",
-                                            }
+                                            },
+                                            **openapi_properties(),
                                         },
                                         "required": ["audio"],
                                     }
@@ -87,6 +106,7 @@ class APIDocs:
                         "responses": {
                             "200": {
                                 "description": "Transcription successful",
+                                "headers": CACHE_STATUS_HEADER,
                                 "content": {
                                     "application/json": {
                                         "schema": {
@@ -100,10 +120,13 @@ class APIDocs:
                                     }
                                 },
                             },
-                            "400": {"description": "Bad request (no file, invalid format)"},
+                            "400": {"description": "Bad request (no file, invalid format, invalid transcription options)"},
                             "413": {"description": "File too large (max 100MB)"},
                             "500": {"description": "Transcription failed"},
-                            "503": {"description": "Whisper model unavailable"},
+                            "503": {
+                                "description": "Whisper model unavailable or transcription queue full (see Retry-After)",
+                                "headers": {"Retry-After": {"schema": {"type": "integer"}}},
+                            },
                         },
                     }
                 },
@@ -111,6 +134,7 @@ class APIDocs:
                     "post": {
                         "summary": "Live Audio Transcription",
                         "description": "Real-time transcription for live recordings",
+                        "parameters": [CACHE_BYPASS_PARAMETER],
                         "requestBody": {
                             "required": True,
                             "content": {
@@ -123,12 +147,7 @@ class APIDocs:
                                                 "format": "binary",
                                                 "description": "Live audio data",
                                             },
-                                            "language": {
-                                                "type": "string",
-                                                "enum": ["auto", "de", "en", "fr", "es", "it"],
-                                                "default": "auto",
-                                                "description": "Target language for transcription",
-                                            },
+                                            **openapi_properties(),
                                         },
                                         "required": ["audio"],
                                     }
@@ -138,6 +157,7 @@ class APIDocs:
                         "responses": {
                             "200": {
                                 "description": "Live transcription successful",
+                                "headers": CACHE_STATUS_HEADER,
                                 "content": {
                                     "application/json": {
                                         "schema": {
@@ -150,10 +170,92 @@ class APIDocs:
                                         }
                                     }
                                 },
-                            }
+                            },
+                            "503": {
+                                "description": "Transcription queue full, retry after the given delay",
+                                "headers": {"Retry-After": {"schema": {"type": "integer"}}},
+                            },
+                        },
+                    }
+                },
+                "/api/jobs": {
+                    "post": {
+                        "summary": "Submit Transcription Job",
+                        "description": "Queue a long upload for background transcription; returns at once with a job id. "
+                        "Subscribe to progress with the SocketIO event subscribe_job {job_id} (events: job_progress)",
+                        "requestBody": {
+                            "required": True,
+                            "content": {
+                                "multipart/form-data": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {
+                                            "audio": {
+                                                "type": "string",
+                                                "format": "binary",
+                                                "description": "Audio file (WAV, MP3, M4A, FLAC)",
+                                            },
+                                            **openapi_properties(),
+                                        },
+                                        "required": ["audio"],
+                                    }
+                                }
+                            },
+                        },
+                        "responses": {
+                            "202": {
+                                "description": "Job queued",
+                                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Job"}}},
+                            },
+                            "400": {"description": "No file or invalid transcription options"},
+                            "413": {"description": "File too large (max 100MB)"},
+                        },
+                    },
+                    "get": {
+                        "summary": "List Transcription Jobs",
+                        "parameters": [{"name": "limit", "in": "query", "schema": {"type": "integer", "default": 50}}],
+                        "responses": {"200": {"description": "Most recent jobs first"}},
+                    },
+                },
+                "/api/jobs/{job_id}": {
+                    "get": {
+                        "summary": "Transcription Job Status",
+                        "parameters": [{"name": "job_id", "in": "path", "required": True, "schema": {"type": "string"}}],
+                        "responses": {
+                            "200": {
+                                "description": "Job status and progress",
+                                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Job"}}},
+                            },
+                            "404": {"description": "Unknown job"},
                         },
                     }
                 },
+                "/api/jobs/{job_id}/result": {
+                    "get": {
+                        "summary": "Transcription Job Result",
+                        "parameters": [
+                            {"name": "job_id", "in": "path", "required": True, "schema": {"type": "string"}},
+                            {
+                                "name": "format",
+                                "in": "query",
+                                "schema": {"type": "string", "enum": ["json", "srt", "vtt"], "default": "json"},
+                            },
+                        ],
+                        "responses": {
+                            "200": {"description": "Transcript with segments (JSON) or subtitles (SRT/VTT)"},
+                            "404": {"description": "Unknown job"},
+                            "409": {"description": "Job has not completed"},
+                        },
+                    }
+                },
+                "/api/jobs/{job_id}/cancel": {
+                    "post": {
+                        "summary": "Cancel Transcription Job",
+                        "description": "A running job stops before its next chunk",
+                        "parameters": [{"name": "job_id", "in": "path", "required": True, "schema": {"type": "string"}}],
+                        "responses": {"200": {"description": "Job after cancellation"}, "404": {"description": "Unknown job"}},
+                    }
+                },
                 "/api/status": {
                     "get": {
                         "summary": "Detailed API Status",
@@ -197,6 +299,20 @@ class APIDocs:
             },
             "components": {
                 "schemas": {
+                    "Job": {
+                        "type": "object",
+                        "properties": {
+                            "job_id": {"type": "string"},
+                            "status": {"type": "string", "enum": ["queued", "running", "completed", "failed", "cancelled"]},
+                            "progress": {"type": "number", "minimum": 0, "maximum": 1},
+                            "filename": {"type": "string"},
+                            "options": {"type": "object"},
+                            "duration": {"type": "number", "nullable": True},
+                            "created_at": {"type": "string", "format": "date-time"},
+                            "error": {"type": "string"},
+                            "result_urls": {"type": "object"},
+                        },
+                    },
                     "Error": {
                         "type": "object",
                         "properties": {
@@ -0,0 +1,159 @@
+"""
+Audio Frames Module
+Binary WebSocket audio protocol: a small fixed header (session, seq, codec, sample rate) followed by raw audio
+PCM payloads are read in place with np.frombuffer instead of travelling base64-encoded inside JSON;
+clients negotiate the protocol first, and clients that never do keep using base64 JSON chunks
+"""
+
+import logging
+import struct
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from .audio_ingest import SAMPLE_RATE, AudioDecodeError, decode_audio, resample
+
+logger = logging.getLogger(__name__)
+
+try:
+    import opuslib
+
+    OPUS_AVAILABLE = True
+except Exception:  # ImportError, or opuslib failing to find libopus
+    opuslib = None
+    OPUS_AVAILABLE = False
+
+PROTOCOL_VERSION = 1
+MAGIC = b"WA"
+# magic, version, codec, seq, sample rate, channels, session id length - then the session id and the payload
+HEADER = struct.Struct("<2sBBIIBB")
+
+CODEC_PCM16 = 1  # signed 16-bit little-endian, interleaved channels
+CODEC_FLOAT32 = 2  # 32-bit float little-endian, interleaved channels
+CODEC_OPUS = 3  # one raw Opus packet
+CODEC_ENCODED = 4  # a complete file in any container ffmpeg understands (WAV, WebM, Ogg, ...)
+CODEC_NAMES = {"pcm16": CODEC_PCM16, "float32": CODEC_FLOAT32, "opus": CODEC_OPUS, "encoded": CODEC_ENCODED}
+
+# Longest Opus packet: 120 ms
+_OPUS_MAX_FRAME = SAMPLE_RATE * 120 // 1000
+
+
+class FrameError(AudioDecodeError):
+    """Raised for a binary frame that does not follow the protocol"""
+
+
+@dataclass
+class AudioFrame:
+    session: str
+    seq: int
+    codec: int
+    sample_rate: int
+    channels: int
+    payload: memoryview
+
+
+def supported_codecs():
+    return [name for name, codec in CODEC_NAMES.items() if codec != CODEC_OPUS or OPUS_AVAILABLE]
+
+
+def capabilities() -> Dict:
+    """What the server accepts, advertised to clients when they connect"""
+    return {"versions": [PROTOCOL_VERSION], "codecs": supported_codecs(), "sample_rate": SAMPLE_RATE}
+
+
+def negotiate(offer: Optional[Dict]) -> Dict:
+    """Answer a client's offer ({"versions": [...], "codecs": [...]})
+
+    The reply names the protocol version and the offered codecs the server accepts, in the client's order
+    of preference; a version of None tells the client to keep sending base64 JSON chunks
+    """
+    offer = offer or {}
+    versions = offer.get("versions") or [offer.get("version", PROTOCOL_VERSION)]
+    codecs = [codec for codec in offer.get("codecs") or supported_codecs() if codec in supported_codecs()]
+    if PROTOCOL_VERSION not in versions or not codecs:
+        return {"version": None, "codecs": [], "sample_rate": SAMPLE_RATE}
+    return {"version": PROTOCOL_VERSION, "codecs": codecs, "sample_rate": SAMPLE_RATE}
+
+
+def encode_frame(
+    payload: bytes,
+    seq: int = 0,
+    codec: int = CODEC_PCM16,
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = 1,
+    session: str = "",
+) -> bytes:
+    """Build a binary frame (used by clients and the load generator)"""
+    session_id = session.encode("utf-8")
+    if len(session_id) > 255:
+        raise ValueError("session id longer than 255 bytes")
+    header = HEADER.pack(MAGIC, PROTOCOL_VERSION, codec, seq & 0xFFFFFFFF, sample_rate, channels, len(session_id))
+    return header + session_id + bytes(payload)
+
+
+def parse_frame(data) -> AudioFrame:
+    """Split a binary message into header fields and a payload view (no copy)"""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise FrameError(f"Frame shorter than the {HEADER.size}-byte header")
+    magic, version, codec, seq, sample_rate, channels, session_length = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise FrameError("Not an audio frame (bad magic)")
+    if version != PROTOCOL_VERSION:
+        raise FrameError(f"Unsupported frame version {version}")
+    if codec not in CODEC_NAMES.values():
+        raise FrameError(f"Unknown codec {codec}")
+    if channels < 1 or sample_rate < 1:
+        raise FrameError("Frame needs at least one channel and a sample rate")
+
+    body = HEADER.size + session_length
+    if len(view) < body:
+        raise FrameError("Frame truncated inside the session id")
+    session = bytes(view[HEADER.size : body]).decode("utf-8", errors="replace")
+    return AudioFrame(session, seq, codec, sample_rate, channels, view[body:])
+
+
+class FrameDecoder:
+    """Turns one connection's frames into 16 kHz mono float32 audio
+
+    Opus is stateful, so each session of the connection keeps its own decoder
+    """
+
+    def __init__(self):
+        self._opus: Dict[tuple, object] = {}
+
+    def decode(self, frame: AudioFrame) -> np.ndarray:
+        if frame.codec == CODEC_ENCODED:
+            return decode_audio(bytes(frame.payload))
+        if frame.codec == CODEC_OPUS:
+            return self._decode_opus(frame)
+
+        width = 2 if frame.codec == CODEC_PCM16 else 4
+        if len(frame.payload) % (width * frame.channels):
+            raise FrameError(f"Payload of {len(frame.payload)} bytes is not a whole number of samples")
+        if frame.codec == CODEC_PCM16:
+            audio = np.frombuffer(frame.payload, dtype="<i2").astype(np.float32) / 32768.0
+        else:
+            audio = np.frombuffer(frame.payload, dtype="<f4")  # read in place, no copy
+
+        if frame.channels > 1:
+            audio = audio.reshape(-1, frame.channels).mean(axis=1, dtype=np.float32)
+        return resample(audio, frame.sample_rate)
+
+    def _decode_opus(self, frame: AudioFrame) -> np.ndarray:
+        if not OPUS_AVAILABLE:
+            raise FrameError("Opus frames need opuslib - install with: pip install opuslib")
+        key = (frame.session, frame.channels)
+        decoder = self._opus.get(key)
+        if decoder is None:
+            # Opus decodes at any of its rates whatever the encoder used, so ask for 16 kHz directly
+            decoder = self._opus[key] = opuslib.Decoder(SAMPLE_RATE, frame.channels)
+        try:
+            pcm = decoder.decode(bytes(frame.payload), _OPUS_MAX_FRAME)
+        except opuslib.OpusError as e:
+            raise FrameError(f"Invalid Opus packet: {e}")
+        audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        if frame.channels > 1:
+            audio = audio.reshape(-1, frame.channels).mean(axis=1, dtype=np.float32)
+        return audio
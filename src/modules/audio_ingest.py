@@ -0,0 +1,338 @@
+"""
+Audio Ingest Module
+Decodes uploaded or streamed audio straight into 16 kHz mono float32 NumPy arrays
+PCM WAV at 16 kHz is read in place; everything else is piped through ffmpeg stdin/stdout
+Live WebM/Ogg recordings are decoded by one long-lived ffmpeg process per session (StreamDecoder)
+"""
+
+import collections
+import logging
+import shutil
+import struct
+import subprocess
+import threading
+from typing import BinaryIO, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Bytes needed to recognise a RIFF/WAVE header
+_HEADER_PEEK = 12
+# Leading bytes of the containers browsers' MediaRecorder produces, and ffmpeg's demuxer for each
+_CONTAINER_MAGIC = {b"\x1a\x45\xdf\xa3": "matroska", b"OggS": "ogg"}
+
+
+class AudioDecodeError(Exception):
+    """Raised when audio data cannot be decoded"""
+
+
+def decode_audio(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode an in-memory audio payload (any container ffmpeg understands)"""
+    if not data:
+        raise AudioDecodeError("Empty audio payload")
+
+    audio = _decode_pcm_wav(data, sample_rate)
+    if audio is not None:
+        return audio
+
+    return _run_ffmpeg(data, sample_rate)
+
+
+def decode_stream(stream: BinaryIO, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode audio from a file-like object without buffering non-WAV payloads in Python"""
+    head = stream.read(_HEADER_PEEK)
+    if not head:
+        raise AudioDecodeError("Empty audio payload")
+
+    if _is_wav(head):
+        # WAV needs the full payload for the in-place fast path
+        return decode_audio(head + stream.read(), sample_rate)
+
+    return _run_ffmpeg_stream(head, stream, sample_rate)
+
+
+def resample(audio: np.ndarray, rate: int, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Convert mono float32 audio from rate to sample_rate
+
+    Integer downsampling ratios (48 kHz -> 16 kHz) average each group of samples, which also suppresses
+    aliasing; other ratios interpolate linearly
+    """
+    if rate == sample_rate or len(audio) == 0:
+        return audio
+    if rate > sample_rate and rate % sample_rate == 0:
+        factor = rate // sample_rate
+        usable = len(audio) - len(audio) % factor
+        return audio[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32)
+    positions = np.arange(int(len(audio) * sample_rate / rate)) * (rate / sample_rate)
+    return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+
+def audio_duration(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> float:
+    """Duration in seconds of a decoded audio array"""
+    return len(audio) / float(sample_rate)
+
+
+def ffmpeg_available() -> bool:
+    """Check whether the ffmpeg binary is on PATH"""
+    return shutil.which("ffmpeg") is not None
+
+
+def _is_wav(head: bytes) -> bool:
+    return len(head) >= _HEADER_PEEK and head[:4] == b"RIFF" and head[8:12] == b"WAVE"
+
+
+def _decode_pcm_wav(data: bytes, sample_rate: int) -> Optional[np.ndarray]:
+    """Zero-decode fast path: return samples for 16-bit PCM / 32-bit float WAV at the target rate, else None"""
+    if not _is_wav(data[:_HEADER_PEEK]):
+        return None
+
+    try:
+        return _parse_pcm_wav(data, sample_rate)
+    except struct.error:
+        # Header cut short - leave it to ffmpeg, which reports what is wrong with the file
+        return None
+
+
+def _parse_pcm_wav(data: bytes, sample_rate: int) -> Optional[np.ndarray]:
+    fmt = None
+    offset = _HEADER_PEEK
+    while offset + 8 <= len(data):
+        chunk_id = data[offset : offset + 4]
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            audio_format, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The real format code is the first two bytes of the SubFormat GUID
+                audio_format = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = (audio_format, channels, rate, bits)
+
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+
+            audio_format, channels, rate, bits = fmt
+            if rate != sample_rate or channels < 1:
+                return None
+
+            # Streaming recorders write 0 or 0xFFFFFFFF as size - take whatever follows
+            available = len(data) - body
+            if chunk_size == 0 or chunk_size > available:
+                chunk_size = available
+
+            if audio_format == WAVE_FORMAT_PCM and bits == 16:
+                count = chunk_size // 2 // channels * channels
+                samples = np.frombuffer(data, dtype="<i2", count=count, offset=body)
+                audio = samples.astype(np.float32) / 32768.0
+            elif audio_format == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+                count = chunk_size // 4 // channels * channels
+                audio = np.frombuffer(data, dtype="<f4", count=count, offset=body).astype(np.float32)
+            else:
+                return None
+
+            if channels > 1:
+                audio = audio.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+            return audio
+
+        # Chunks are word aligned
+        offset = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+
+def container_format(head: bytes) -> Optional[str]:
+    """ffmpeg demuxer for a payload that starts a WebM/Matroska or Ogg stream, None otherwise"""
+    return _CONTAINER_MAGIC.get(bytes(head[:4]))
+
+
+def _ffmpeg_command(sample_rate: int, input_options=()):
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-threads",
+        "0",
+        *input_options,
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(sample_rate),
+        "pipe:1",
+    ]
+
+
+def _pcm16_to_float(raw: bytes) -> np.ndarray:
+    usable = len(raw) - (len(raw) % 2)
+    return np.frombuffer(raw, dtype="<i2", count=usable // 2).astype(np.float32) / 32768.0
+
+
+def _run_ffmpeg(data: bytes, sample_rate: int) -> np.ndarray:
+    """Decode a complete payload through ffmpeg pipes"""
+    try:
+        result = subprocess.run(_ffmpeg_command(sample_rate), input=data, capture_output=True, check=True)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg not installed - only 16 kHz PCM WAV can be decoded")
+    except subprocess.CalledProcessError as e:
+        raise AudioDecodeError(f"ffmpeg failed to decode audio: {e.stderr.decode(errors='ignore').strip()}")
+
+    return _pcm16_to_float(result.stdout)
+
+
+def _run_ffmpeg_stream(head: bytes, stream: BinaryIO, sample_rate: int) -> np.ndarray:
+    """Feed a file-like object into ffmpeg from a writer thread while reading PCM back"""
+    try:
+        process = subprocess.Popen(
+            _ffmpeg_command(sample_rate), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg not installed - only 16 kHz PCM WAV can be decoded")
+
+    def feed():
+        try:
+            process.stdin.write(head)
+            shutil.copyfileobj(stream, process.stdin, 64 * 1024)
+        except (BrokenPipeError, OSError):
+            # ffmpeg exited early; its stderr carries the reason
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    # stderr is drained alongside stdout: a chatty ffmpeg blocks on a full stderr pipe otherwise
+    stderr = []
+    writer = threading.Thread(target=feed, name="ffmpeg-feed", daemon=True)
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), name="ffmpeg-stderr", daemon=True)
+    writer.start()
+    reader.start()
+
+    raw = process.stdout.read()
+    reader.join()
+    writer.join()
+    process.wait()
+
+    if process.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg failed to decode audio: {b''.join(stderr).decode(errors='ignore').strip()}")
+
+    return _pcm16_to_float(raw)
+
+
+class StreamDecoder:
+    """A persistent ffmpeg process for one live recording: container chunks go in as they arrive,
+    continuous 16 kHz PCM comes out
+
+    MediaRecorder only puts the container header in the first chunk, so later chunks cannot be decoded
+    on their own; feeding them all to one process also avoids spawning ffmpeg for every chunk
+    """
+
+    def __init__(self, input_format: Optional[str] = None, sample_rate: int = SAMPLE_RATE, output_wait: float = 0.25):
+        """
+        Args:
+            input_format: ffmpeg demuxer (see container_format); probed from the data when None
+            output_wait: how long feed() waits for the first decoded samples of a chunk
+        """
+        # Decode as soon as data arrives instead of probing several MB of input first
+        input_options = ["-fflags", "nobuffer", "-probesize", "32", "-analyzeduration", "0"]
+        if input_format:
+            input_options += ["-f", input_format]
+        try:
+            self.process = subprocess.Popen(
+                _ffmpeg_command(sample_rate, input_options),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except FileNotFoundError:
+            raise AudioDecodeError("ffmpeg not installed - WebM/Ogg streams cannot be decoded")
+
+        self.output_wait = output_wait
+        self.bytes_fed = 0
+        self._pcm = bytearray()
+        self._eof = False
+        self._stderr = collections.deque(maxlen=20)
+        self._cond = threading.Condition()
+        self._reader = threading.Thread(target=self._read_stdout, name="ffmpeg-stream-out", daemon=True)
+        self._reader.start()
+        threading.Thread(target=self._read_stderr, name="ffmpeg-stream-err", daemon=True).start()
+
+    def feed(self, data: bytes) -> np.ndarray:
+        """Write one container chunk and return the samples decoded so far
+
+        Samples ffmpeg produces after this returns are handed out by the next feed() or by close()
+        """
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            raise AudioDecodeError(f"ffmpeg stream decoder exited: {self._error()}")
+        self.bytes_fed += len(data)
+
+        with self._cond:
+            # Wait for the chunk's first samples, then until ffmpeg has briefly stopped producing more
+            if self._cond.wait_for(lambda: self._pcm or self._eof, timeout=self.output_wait):
+                while not self._eof and self._cond.wait(timeout=0.02):
+                    pass
+            if self._eof and not self._pcm and self.process.poll():
+                raise AudioDecodeError(f"ffmpeg could not decode the stream: {self._error()}")
+            return self._take()
+
+    def close(self, timeout: float = 5.0) -> np.ndarray:
+        """End the stream and return the samples still buffered in ffmpeg"""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self._reader.join(timeout)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        with self._cond:
+            return self._take()
+
+    def kill(self):
+        """Stop the process without collecting its output (client went away)"""
+        self.process.kill()
+        self.process.wait()
+
+    def _take(self) -> np.ndarray:
+        usable = len(self._pcm) - len(self._pcm) % 2
+        audio = np.frombuffer(self._pcm, dtype="<i2", count=usable // 2).astype(np.float32) / 32768.0
+        del self._pcm[:usable]
+        return audio
+
+    def _error(self) -> str:
+        return " ".join(self._stderr) or f"exit code {self.process.poll()}"
+
+    def _read_stdout(self):
+        while True:
+            # read1 returns whatever is available; under gevent the pipe is cooperative, unlike os.read
+            data = self.process.stdout.read1(65536)
+            with self._cond:
+                if not data:
+                    self._eof = True
+                    self._cond.notify_all()
+                    return
+                self._pcm.extend(data)
+                self._cond.notify_all()
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self._stderr.append(line.decode(errors="ignore").strip())
@@ -0,0 +1,230 @@
+"""
+Micro-Batching Module
+Collects short live-audio requests from many sessions and runs them as one batched model pass
+A batch closes after max_wait_ms or max_batch_size items; results fan back out through per-request futures
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from .audio_ingest import SAMPLE_RATE
+from .inference_pool import InferenceQueueFull
+
+logger = logging.getLogger(__name__)
+
+# Whisper's encoder sees fixed 30-second windows - longer audio cannot share a batch
+BATCH_SAMPLES = 30 * SAMPLE_RATE
+# Seconds per Whisper timestamp token
+TIMESTAMP_RESOLUTION = 0.02
+
+
+class MicroBatcher:
+    """Dynamic batching scheduler in front of a batched transcription function
+
+    run_batch(key, audios, prompts) receives all items that share a batch key (e.g. model + language)
+    with each item's prompt (None without one) and returns either a list of results in the same order
+    or a Future resolving to one.
+    Returning a Future (such as an inference pool job) lets several batches run at once.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[np.ndarray], List[Optional[str]]], Any],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 50.0,
+        timeout_seconds: float = 600.0,
+        queue_size: int = 64,
+        retry_after_seconds: int = 5,
+    ):
+        """
+        Args:
+            queue_size: requests waiting for a batch before submit() raises InferenceQueueFull
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout_seconds = timeout_seconds
+        self.queue_size = max(1, int(queue_size))
+        self.retry_after_seconds = int(retry_after_seconds)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "rejected": 0, "batches": 0, "largest_batch": 0, "failed_batches": 0}
+
+    @staticmethod
+    def fits(audio: np.ndarray) -> bool:
+        """Whether audio is short enough to share a batch"""
+        return len(audio) <= BATCH_SAMPLES
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._collect_loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Micro-batcher started (max {self.max_batch_size} items / {self.max_wait * 1000:.0f} ms)")
+
+    def shutdown(self, wait: bool = True, timeout: float = 10):
+        if not self._running:
+            return
+        self._running = False
+        try:
+            # The collector keeps emptying the queue, so a full one frees up unless a batch is stuck
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("⚠️ Micro-batcher queue still full at shutdown")
+        if wait and self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def submit(self, audio: np.ndarray, key: Hashable = None, prompt: Optional[str] = None) -> Future:
+        """Queue one audio segment (at most 30 s) for the next batch
+
+        Args:
+            prompt: text preceding the segment; items with different prompts still share a batch
+        """
+        if not self.fits(audio):
+            raise ValueError(f"Audio longer than {BATCH_SAMPLES // SAMPLE_RATE}s cannot be batched")
+        if not self._running:
+            raise RuntimeError("Micro-batcher is not running")
+
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((key, audio, prompt, future))
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise InferenceQueueFull(self.retry_after_seconds, self.queue_size)
+        with self._lock:
+            self._stats["requests"] += 1
+        return future
+
+    def transcribe(self, audio: np.ndarray, key: Hashable = None, prompt: Optional[str] = None) -> Dict:
+        """Submit and block until this segment's batch has been decoded"""
+        return self.submit(audio, key, prompt).result(timeout=self.timeout_seconds)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["running"] = self._running
+        stats["pending"] = self._queue.qsize()
+        stats["queue_size"] = self.queue_size
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000
+        stats["average_batch_size"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+    def _collect_loop(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            # The first request opens the batching window
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            groups: Dict[Hashable, List] = {}
+            for key, audio, prompt, future in batch:
+                groups.setdefault(key, []).append((audio, prompt, future))
+            for key, items in groups.items():
+                self._dispatch(key, items)
+
+    def _dispatch(self, key, items):
+        futures = [future for _, _, future in items]
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(items))
+
+        try:
+            outcome = self.run_batch(key, [audio for audio, _, _ in items], [prompt for _, prompt, _ in items])
+        except Exception as e:
+            self._fail(futures, e)
+            return
+
+        if isinstance(outcome, Future):
+            outcome.add_done_callback(lambda done: self._fan_out(futures, done))
+        else:
+            self._deliver(futures, outcome)
+
+    def _fan_out(self, futures, done: Future):
+        error = done.exception()
+        if error is not None:
+            self._fail(futures, error)
+        else:
+            self._deliver(futures, done.result())
+
+    def _deliver(self, futures, results):
+        if results is None or len(results) != len(futures):
+            self._fail(futures, RuntimeError("Batched transcription returned the wrong number of results"))
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _fail(self, futures, error):
+        logger.error(f"Batched transcription failed for {len(futures)} requests: {error}")
+        with self._lock:
+            self._stats["failed_batches"] += 1
+        for future in futures:
+            future.set_exception(error)
+
+
+def pad_batch(audios: List[np.ndarray]) -> np.ndarray:
+    """Pad or trim each segment to Whisper's 30-second window and stack them"""
+    batch = np.zeros((len(audios), BATCH_SAMPLES), dtype=np.float32)
+    for row, audio in zip(batch, audios):
+        audio = audio[:BATCH_SAMPLES]
+        row[: len(audio)] = audio
+    return batch
+
+
+def segments_from_tokens(
+    tokens: List[int], timestamp_begin: int, decode: Callable[[List[int]], str], duration: float
+) -> List[Dict]:
+    """Rebuild timed segments, with their text tokens, from a decoded token sequence with timestamp tokens
+
+    Text after the last timestamp (a window cut mid-sentence) runs to the end of the audio
+    """
+    segments = []
+    start = None
+    text_tokens: List[int] = []
+    for token in tokens:
+        if token < timestamp_begin:
+            text_tokens.append(token)
+            continue
+
+        time_offset = (token - timestamp_begin) * TIMESTAMP_RESOLUTION
+        if start is None:
+            start = time_offset
+            continue
+
+        text = decode(text_tokens)
+        if text.strip():
+            segments.append({"start": start, "end": time_offset, "text": text, "tokens": text_tokens})
+        start = None
+        text_tokens = []
+
+    text = decode(text_tokens) if text_tokens else ""
+    if text.strip():
+        segments.append({"start": start or 0.0, "end": max(duration, start or 0.0), "text": text, "tokens": text_tokens})
+    return segments
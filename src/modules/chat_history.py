@@ -4,15 +4,101 @@ Simple SQLite-based chat history for transcriptions with robust fallback
 Stores all transcriptions with timestamps, models, and metadata
 """
 
+import hashlib
+import json
 import logging
+import re
 import sqlite3
 import tempfile
-import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
+
+from .history_writer import HistoryWriter
+from .metrics import HISTORY_ROWS_WRITTEN, HISTORY_WRITE_SECONDS
+from .sqlite_pool import SQLiteConnectionManager
 
 logger = logging.getLogger(__name__)
 
+# PRAGMA user_version of a fully migrated database
+SCHEMA_VERSION = 4
+
+# Statistics rollup bucket expressions by period (timestamps are stored as UTC 'YYYY-MM-DD HH:MM:SS')
+ROLLUP_PERIODS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', {row}.timestamp)",
+    "day": "date({row}.timestamp)",
+}
+
+# Search syntax: "quoted phrases", bare terms, term* prefixes and the AND/OR/NOT operators
+_SEARCH_TOKEN = re.compile(r'"[^"]*"|\S+')
+_SEARCH_OPERATORS = {"AND", "OR", "NOT"}
+
+EXPORT_FORMATS = ("json", "ndjson", "csv")
+CSV_EXPORT_FIELDS = [
+    "timestamp",
+    "text",
+    "language",
+    "model_used",
+    "source_type",
+    "filename",
+    "duration",
+    "confidence",
+    "metadata",
+]
+
+_ROW_COLUMNS = "timestamp, text, language, model_used, source_type, filename, duration, confidence, metadata, content_hash"
+_INSERT_ROW = f"INSERT INTO transcriptions ({_ROW_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# Imports skip rows whose content hash already exists; live and upload writes never do
+_INSERT_NEW_ROW = (
+    f"INSERT INTO transcriptions ({_ROW_COLUMNS}) SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ? "
+    "WHERE NOT EXISTS (SELECT 1 FROM transcriptions WHERE content_hash = ?)"
+)
+
+
+def content_hash(timestamp, text, language, model_used, source_type, filename, duration, metadata) -> str:
+    """Stable identity of a history entry, used to skip duplicates on import"""
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            pass
+    # 3 and 3.0 must hash alike whether a row came from JSON, CSV or the database
+    duration = float(duration) if duration is not None else None
+    payload = json.dumps(
+        [timestamp, text, language, model_used, source_type, filename, duration, metadata],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def history_row(
+    text: str,
+    language: str = None,
+    model_used: str = None,
+    source_type: str = "unknown",
+    filename: str = None,
+    duration: float = None,
+    confidence: float = None,
+    metadata: dict = None,
+    timestamp: str = None,
+) -> tuple:
+    """Build an insert-ready row (matching _ROW_COLUMNS) including its content hash"""
+    # Same format and clock (UTC) as the CURRENT_TIMESTAMP column default
+    timestamp = timestamp or datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+    return (
+        timestamp,
+        text,
+        language,
+        model_used,
+        source_type,
+        filename,
+        duration,
+        confidence,
+        json.dumps(metadata) if metadata else None,
+        content_hash(timestamp, text, language, model_used, source_type, filename, duration, metadata or None),
+    )
+
 
 class ChatHistoryManager:
     """Manages chat history using SQLite database with robust error handling"""
@@ -21,8 +107,10 @@ class ChatHistoryManager:
         import os
 
         self.db_path = None
-        self.db_lock = threading.Lock()
+        self.db = None
         self.database_enabled = False
+        self.fts_enabled = False
+        self.writer = None
 
         # Use different paths for development vs production
         if db_path is None:
@@ -61,12 +149,14 @@ class ChatHistoryManager:
 
         # Initialize database
         try:
+            self.db = SQLiteConnectionManager(self.db_path)
             self._init_database()
             self.database_enabled = True
         except Exception as e:
             logger.error(f"❌ Failed to initialize chat history database: {e}")
             # Create minimal fallback that doesn't crash
             self.db_path = None
+            self.db = None
             self.database_enabled = False
             logger.warning("⚠️ Chat history will be disabled due to database init failure")
 
@@ -77,7 +167,7 @@ class ChatHistoryManager:
             return
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.write() as conn:
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS transcriptions (
@@ -109,13 +199,259 @@ class ChatHistoryManager:
                 """
                 )
 
-                conn.commit()
-                logger.info("✅ Chat history database initialized")
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < 1:
+                    self._migrate_full_text_index(conn)
+                if version < 2:
+                    self._migrate_content_hash(conn)
+                if version < 3:
+                    self._migrate_rollups(conn)
+                if version < 4:
+                    self._migrate_content_hash_index(conn)
+                self.fts_enabled = self._has_full_text_index(conn)
+
+                # Without FTS5 the version stays behind so the index is retried on the next start
+                if self.fts_enabled and version < SCHEMA_VERSION:
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+            logger.info("✅ Chat history database initialized")
 
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
 
+    def _migrate_full_text_index(self, conn):
+        """Schema v1: FTS5 index over transcription text, kept in sync by triggers and backfilled once"""
+        try:
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS transcriptions_fts USING fts5(
+                    text,
+                    content='transcriptions',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """
+            )
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5 - search keeps using LIKE, migration is retried next start
+            logger.warning(f"⚠️ FTS5 not available, chat history search will scan: {e}")
+            return
+
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS transcriptions_fts_insert AFTER INSERT ON transcriptions BEGIN
+                INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+            END
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS transcriptions_fts_delete AFTER DELETE ON transcriptions BEGIN
+                INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END
+        """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS transcriptions_fts_update AFTER UPDATE OF text ON transcriptions BEGIN
+                INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+            END
+        """
+        )
+
+        # Backfill rows written before the index existed
+        conn.execute("INSERT INTO transcriptions_fts(transcriptions_fts) VALUES ('rebuild')")
+        logger.info("✅ Chat history full-text index created")
+
+    def _migrate_content_hash(self, conn):
+        """Schema v2: content hash column for import deduplication"""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(transcriptions)")}
+        if "content_hash" not in columns:
+            conn.execute("ALTER TABLE transcriptions ADD COLUMN content_hash TEXT")
+
+        rows = conn.execute(
+            """
+            SELECT id, timestamp, text, language, model_used, source_type, filename, duration, metadata
+            FROM transcriptions WHERE content_hash IS NULL
+        """
+        )
+        updates = [(content_hash(*tuple(row)[1:]), row["id"]) for row in rows]
+        conn.executemany("UPDATE transcriptions SET content_hash = ? WHERE id = ?", updates)
+        if updates:
+            logger.info(f"✅ Content hashes backfilled for {len(updates)} transcriptions")
+
+    def _migrate_content_hash_index(self, conn):
+        """Schema v4: the content hash index is a lookup for imports, not a constraint on every write
+
+        Two identical results within the same second hash the same and are both real transcriptions
+        """
+        conn.execute("DROP INDEX IF EXISTS idx_content_hash")
+        conn.execute("CREATE INDEX idx_content_hash ON transcriptions(content_hash)")
+
+    def _migrate_rollups(self, conn):
+        """Schema v3: hourly/daily counts by source, model and language, maintained by triggers"""
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transcription_rollups'").fetchone()
+        # NULL dimensions are stored as '' so they can be part of the primary key
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transcription_rollups (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                model_used TEXT NOT NULL,
+                language TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total_duration REAL NOT NULL,
+                duration_count INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket, source_type, model_used, language)
+            ) WITHOUT ROWID
+        """
+        )
+
+        def key(row, bucket):
+            return (
+                f"COALESCE({bucket.format(row=row)}, ''), COALESCE({row}.source_type, ''), "
+                f"COALESCE({row}.model_used, ''), COALESCE({row}.language, '')"
+            )
+
+        def add(period, bucket):
+            return f"""
+                INSERT INTO transcription_rollups VALUES (
+                    '{period}', {key('new', bucket)}, 1,
+                    COALESCE(new.duration, 0), new.duration IS NOT NULL
+                )
+                ON CONFLICT (period, bucket, source_type, model_used, language) DO UPDATE SET
+                    count = count + 1,
+                    total_duration = total_duration + excluded.total_duration,
+                    duration_count = duration_count + excluded.duration_count;
+            """
+
+        def remove(period, bucket):
+            return f"""
+                UPDATE transcription_rollups SET
+                    count = count - 1,
+                    total_duration = total_duration - COALESCE(old.duration, 0),
+                    duration_count = duration_count - (old.duration IS NOT NULL)
+                WHERE (period, bucket, source_type, model_used, language) = ('{period}', {key('old', bucket)});
+            """
+
+        adds = "".join(add(period, bucket) for period, bucket in ROLLUP_PERIODS.items())
+        removes = "".join(remove(period, bucket) for period, bucket in ROLLUP_PERIODS.items())
+        prune = "DELETE FROM transcription_rollups WHERE count <= 0;"
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS transcription_rollups_insert AFTER INSERT ON transcriptions BEGIN {adds} END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS transcription_rollups_delete AFTER DELETE ON transcriptions BEGIN {removes} {prune} END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS transcription_rollups_update "
+            "AFTER UPDATE OF timestamp, source_type, model_used, language, duration ON transcriptions "
+            f"BEGIN {removes} {adds} {prune} END"
+        )
+
+        if exists:
+            return
+        # Backfill from rows written before the rollups existed
+        for period, bucket in ROLLUP_PERIODS.items():
+            conn.execute(
+                f"""
+                INSERT INTO transcription_rollups
+                SELECT '{period}', {key('t', bucket)}, COUNT(*), COALESCE(SUM(duration), 0), COUNT(duration)
+                FROM transcriptions AS t
+                GROUP BY 2, 3, 4, 5
+            """
+            )
+        logger.info("✅ Chat history statistics rollups created")
+
+    @staticmethod
+    def _has_full_text_index(conn) -> bool:
+        row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transcriptions_fts'").fetchone()
+        return row is not None
+
+    @staticmethod
+    def _fts_query(query: str) -> Optional[str]:
+        """Translate user search input into a safe FTS5 MATCH expression"""
+        parts = []
+        for token in _SEARCH_TOKEN.findall(query):
+            if token.startswith('"'):
+                phrase = token.strip('"').strip()
+                if phrase:
+                    parts.append(f'"{phrase}"')
+            elif token in _SEARCH_OPERATORS:
+                # Operators need an operand on both sides
+                if parts and parts[-1] not in _SEARCH_OPERATORS:
+                    parts.append(token)
+            else:
+                prefix = token.endswith("*")
+                term = token.rstrip("*").replace('"', "")
+                if term:
+                    parts.append(f'"{term}"*' if prefix else f'"{term}"')
+
+        while parts and parts[-1] in _SEARCH_OPERATORS:
+            parts.pop()
+        return " ".join(parts) or None
+
+    def enable_write_behind(self, queue_size: int = 10000, batch_size: int = 500, flush_interval_ms: float = 500):
+        """Persist queue_transcription() calls from a background writer thread"""
+        if not self.database_enabled or self.writer is not None:
+            return
+        self.writer = HistoryWriter(self, queue_size=queue_size, batch_size=batch_size, flush_interval_ms=flush_interval_ms)
+        self.writer.start()
+
+    def close(self):
+        """Flush queued writes and close pooled database connections"""
+        if self.writer is not None:
+            self.writer.shutdown()
+            self.writer = None
+        if self.db is not None:
+            self.db.close_all()
+
+    def queue_transcription(
+        self,
+        text: str,
+        language: str = None,
+        model_used: str = None,
+        source_type: str = "unknown",
+        filename: str = None,
+        duration: float = None,
+        confidence: float = None,
+        metadata: dict = None,
+    ) -> bool:
+        """Save a transcription without waiting for SQLite (write-behind when enabled)"""
+        if not self.database_enabled:
+            logger.warning("⚠️ Database disabled, transcription not saved")
+            return False
+
+        # Timestamp is taken now, not when the batch is flushed
+        row = history_row(text, language, model_used, source_type, filename, duration, confidence, metadata)
+
+        try:
+            if self.writer is not None:
+                self.writer.enqueue(row)
+            else:
+                self.insert_rows([row])
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add transcription: {e}")
+            return False
+
+    def insert_rows(self, rows: List[tuple], skip_duplicates: bool = False) -> int:
+        """Insert history_row() tuples in a single transaction; returns rows inserted
+
+        Args:
+            skip_duplicates: leave out rows whose content hash is already stored (imports)
+        """
+        with HISTORY_WRITE_SECONDS.time(operation="batch"), self.db.write() as conn:
+            if skip_duplicates:
+                inserted = conn.executemany(_INSERT_NEW_ROW, [row + (row[-1],) for row in rows]).rowcount
+            else:
+                inserted = conn.executemany(_INSERT_ROW, rows).rowcount
+        HISTORY_ROWS_WRITTEN.inc(inserted)
+        return inserted
+
     def add_transcription(
         self,
         text: str,
@@ -133,22 +469,13 @@ class ChatHistoryManager:
             return -1
 
         try:
-            with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    import json
-
-                    metadata_json = json.dumps(metadata) if metadata else None
-
-                    cursor = conn.execute(
-                        """
-                        INSERT INTO transcriptions 
-                        (text, language, model_used, source_type, filename, duration, confidence, metadata)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                        (text, language, model_used, source_type, filename, duration, confidence, metadata_json),
-                    )
-
-                    return cursor.lastrowid
+            with HISTORY_WRITE_SECONDS.time(operation="single"), self.db.write() as conn:
+                cursor = conn.execute(
+                    _INSERT_ROW,
+                    history_row(text, language, model_used, source_type, filename, duration, confidence, metadata),
+                )
+            HISTORY_ROWS_WRITTEN.inc()
+            return cursor.lastrowid
 
         except Exception as e:
             logger.error(f"Failed to add transcription: {e}")
@@ -160,8 +487,7 @@ class ChatHistoryManager:
             return []
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db.read() as conn:
                 cursor = conn.execute(
                     """
                     SELECT * FROM transcriptions 
@@ -178,13 +504,42 @@ class ChatHistoryManager:
             return []
 
     def search_transcriptions(self, query: str, limit: int = 50) -> List[Dict]:
-        """Search transcriptions by text content"""
+        """Search transcriptions by text content
+
+        Uses the FTS5 index (bm25 ranking, highlighted snippets, "phrase" and prefix* queries)
+        and falls back to a LIKE scan when the index is unavailable
+        """
         if not self.database_enabled:
             return []
 
+        match = self._fts_query(query) if self.fts_enabled else None
+        if match:
+            try:
+                with self.db.read() as conn:
+                    cursor = conn.execute(
+                        """
+                        SELECT t.*,
+                               snippet(transcriptions_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet,
+                               bm25(transcriptions_fts) AS rank
+                        FROM transcriptions_fts
+                        JOIN transcriptions t ON t.id = transcriptions_fts.rowid
+                        WHERE transcriptions_fts MATCH ?
+                        ORDER BY rank, t.timestamp DESC
+                        LIMIT ?
+                    """,
+                        (match, limit),
+                    )
+
+                    return [dict(row) for row in cursor.fetchall()]
+
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Full-text search failed for {query!r}, falling back to LIKE: {e}")
+            except Exception as e:
+                logger.error(f"Failed to search transcriptions: {e}")
+                return []
+
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db.read() as conn:
                 cursor = conn.execute(
                     """
                     SELECT * FROM transcriptions 
@@ -207,8 +562,7 @@ class ChatHistoryManager:
             return []
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db.read() as conn:
                 cursor = conn.execute(
                     """
                     SELECT * FROM transcriptions 
@@ -226,71 +580,125 @@ class ChatHistoryManager:
             return []
 
     def get_statistics(self) -> Dict:
-        """Get chat history statistics"""
+        """Get chat history statistics from the rollup table (cost grows with buckets, not rows)"""
+        empty = {
+            "total_transcriptions": 0,
+            "source_breakdown": {},
+            "model_breakdown": {},
+            "language_breakdown": {},
+            "recent_activity": [],
+            "last_24h": 0,
+            "last_7d": 0,
+            "average_duration": 0.0,
+        }
         if not self.database_enabled:
-            return {
-                "total_transcriptions": 0,
-                "source_breakdown": {},
-                "model_breakdown": {},
-                "recent_activity": [],
-                "database_enabled": False,
-            }
+            return {**empty, "database_enabled": False}
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                # Total count
-                total_count = conn.execute("SELECT COUNT(*) FROM transcriptions").fetchone()[0]
+            with self.db.read() as conn:
+                daily = "FROM transcription_rollups WHERE period = 'day'"
 
-                # Source breakdown
-                source_cursor = conn.execute(
-                    """
-                    SELECT source_type, COUNT(*) as count 
-                    FROM transcriptions 
-                    GROUP BY source_type
-                """
-                )
-                source_breakdown = {row[0]: row[1] for row in source_cursor.fetchall()}
+                def breakdown(column):
+                    rows = conn.execute(f"SELECT {column}, SUM(count) {daily} GROUP BY {column} ORDER BY 2 DESC")
+                    return {value or "unknown": count for value, count in rows}
 
-                # Model breakdown
-                model_cursor = conn.execute(
-                    """
-                    SELECT model_used, COUNT(*) as count 
-                    FROM transcriptions 
-                    WHERE model_used IS NOT NULL 
-                    GROUP BY model_used
-                """
-                )
-                model_breakdown = {row[0]: row[1] for row in model_cursor.fetchall()}
+                total_count, total_duration, duration_count = conn.execute(
+                    f"SELECT COALESCE(SUM(count), 0), COALESCE(SUM(total_duration), 0), COALESCE(SUM(duration_count), 0) {daily}"
+                ).fetchone()
+
+                model_breakdown = breakdown("model_used")
+                model_breakdown.pop("unknown", None)
 
                 # Recent activity (last 7 days)
                 recent_cursor = conn.execute(
-                    """
-                    SELECT DATE(timestamp) as date, COUNT(*) as count 
-                    FROM transcriptions 
-                    WHERE timestamp >= datetime('now', '-7 days') 
-                    GROUP BY DATE(timestamp) 
-                    ORDER BY date DESC
+                    f"""
+                    SELECT bucket, SUM(count) {daily} AND bucket >= DATE('now', '-7 days')
+                    GROUP BY bucket ORDER BY bucket DESC
                 """
                 )
                 recent_activity = [{"date": row[0], "count": row[1]} for row in recent_cursor.fetchall()]
 
+                last_24h, last_7d = conn.execute(
+                    """
+                    SELECT COALESCE(SUM(CASE WHEN bucket >= strftime('%Y-%m-%d %H:00:00', 'now', '-24 hours') THEN count END), 0),
+                           COALESCE(SUM(count), 0)
+                    FROM transcription_rollups
+                    WHERE period = 'hour' AND bucket >= strftime('%Y-%m-%d %H:00:00', 'now', '-7 days')
+                """
+                ).fetchone()
+
                 return {
                     "total_transcriptions": total_count,
-                    "source_breakdown": source_breakdown,
+                    "source_breakdown": breakdown("source_type"),
                     "model_breakdown": model_breakdown,
+                    "language_breakdown": breakdown("language"),
                     "recent_activity": recent_activity,
+                    "last_24h": last_24h,
+                    "last_7d": last_7d,
+                    "average_duration": round(total_duration / duration_count, 2) if duration_count else 0.0,
                     "database_enabled": True,
                 }
 
         except Exception as e:
             logger.error(f"Failed to get statistics: {e}")
-            return {
-                "total_transcriptions": 0,
-                "source_breakdown": {},
-                "model_breakdown": {},
-                "recent_activity": [],
-                "database_enabled": False,
-            }
+            return {**empty, "database_enabled": False}
+
+    def iter_transcriptions(self, page_size: int = 1000, after_id: int = 0) -> Iterator[List[Dict]]:
+        """Yield pages of transcriptions in id order using a keyset cursor (constant memory)"""
+        if not self.database_enabled:
+            return
+
+        while True:
+            with self.db.read() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM transcriptions WHERE id > ? ORDER BY id LIMIT ?", (after_id, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [dict(row) for row in rows]
+            after_id = rows[-1]["id"]
+
+    def iter_export(self, format: str = "json", page_size: int = 1000) -> Iterator[str]:
+        """Stream the whole history as CSV, NDJSON or a JSON document, one chunk per page"""
+        import csv
+        import io
+        import json
+
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+
+        if format == "csv":
+            output = io.StringIO()
+            writer = csv.DictWriter(output, fieldnames=CSV_EXPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            yield output.getvalue()
+            for page in self.iter_transcriptions(page_size):
+                output.seek(0)
+                output.truncate()
+                writer.writerows(page)
+                yield output.getvalue()
+            return
+
+        def encode(row):
+            # metadata is stored as JSON text - export it as a nested object
+            if row.get("metadata"):
+                try:
+                    row["metadata"] = json.loads(row["metadata"])
+                except ValueError:
+                    pass
+            return json.dumps(row, ensure_ascii=False)
+
+        if format == "ndjson":
+            for page in self.iter_transcriptions(page_size):
+                yield "".join(encode(row) + "\n" for row in page)
+            return
+
+        yield '{"export_timestamp": %s, "transcriptions": [' % json.dumps(datetime.now().isoformat())
+        separator = "\n"
+        for page in self.iter_transcriptions(page_size):
+            yield separator + ",\n".join(encode(row) for row in page)
+            separator = ",\n"
+        yield "\n]}\n"
 
     def export_history(self, format: str = "json") -> str:
         """Export chat history in specified format"""
@@ -301,38 +709,7 @@ class ChatHistoryManager:
                 return '{"error": "Database disabled", "transcriptions": []}'
 
         try:
-            transcriptions = self.get_recent_transcriptions(limit=10000)  # Export all
-
-            if format == "csv":
-                import csv
-                import io
-
-                output = io.StringIO()
-                if transcriptions:
-                    writer = csv.DictWriter(
-                        output, fieldnames=["timestamp", "text", "language", "model_used", "source_type", "filename"]
-                    )
-                    writer.writeheader()
-                    for t in transcriptions:
-                        writer.writerow(
-                            {
-                                "timestamp": t.get("timestamp", ""),
-                                "text": t.get("text", ""),
-                                "language": t.get("language", ""),
-                                "model_used": t.get("model_used", ""),
-                                "source_type": t.get("source_type", ""),
-                                "filename": t.get("filename", ""),
-                            }
-                        )
-                else:
-                    output.write("timestamp,text,language,model_used,source_type,filename\n")
-
-                return output.getvalue()
-
-            else:  # JSON format
-                import json
-
-                return json.dumps({"transcriptions": transcriptions, "export_timestamp": datetime.now().isoformat()}, indent=2)
+            return "".join(self.iter_export(format))
 
         except Exception as e:
             logger.error(f"Failed to export history: {e}")
@@ -340,11 +717,6 @@ class ChatHistoryManager:
                 return f"timestamp,text,language,model_used,source_type,filename\n# Export failed: {str(e)}"
             else:
                 return f'{{"error": "Export failed: {str(e)}", "transcriptions": []}}'
-            logger.error(f"Failed to export history: {e}")
-            if format == "csv":
-                return f"timestamp,text,language,model_used,source_type,filename\n# Export failed: {str(e)}"
-            else:
-                return f'{{"error": "Export failed: {str(e)}", "transcriptions": []}}'
 
     def update_transcription(self, transcription_id: int, text: str) -> bool:
         """Update transcription text by ID"""
@@ -353,10 +725,9 @@ class ChatHistoryManager:
             return False
 
         try:
-            with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute("UPDATE transcriptions SET text = ? WHERE id = ?", (text, transcription_id))
-                    return cursor.rowcount > 0
+            with self.db.write() as conn:
+                cursor = conn.execute("UPDATE transcriptions SET text = ? WHERE id = ?", (text, transcription_id))
+                return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Failed to update transcription {transcription_id}: {e}")
             return False
@@ -368,216 +739,21 @@ class ChatHistoryManager:
             return False
 
         try:
-            with self.db_lock:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.execute("DELETE FROM transcriptions WHERE id = ?", (transcription_id,))
-                    return cursor.rowcount > 0
+            with self.db.write() as conn:
+                cursor = conn.execute("DELETE FROM transcriptions WHERE id = ?", (transcription_id,))
+                return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Failed to delete transcription {transcription_id}: {e}")
             return False
 
     def import_history(self, file_content: str, file_format: str, filename: str = None) -> Dict:
-        """Import chat history from JSON or CSV content"""
-        if not self.database_enabled:
-            return {"status": "error", "error": "Database disabled, cannot import history", "imported_count": 0}
-
-        try:
-            imported_count = 0
-            errors = []
-
-            if file_format.lower() == "json":
-                imported_count, errors = self._import_from_json(file_content)
-            elif file_format.lower() == "csv":
-                imported_count, errors = self._import_from_csv(file_content)
-            else:
-                return {
-                    "status": "error",
-                    "error": f"Unsupported format: {file_format}. Use 'json' or 'csv'",
-                    "imported_count": 0,
-                }
-
-            if errors:
-                return {
-                    "status": "partial_success",
-                    "message": f"Imported {imported_count} transcriptions with {len(errors)} errors",
-                    "imported_count": imported_count,
-                    "errors": errors[:10],  # Limit error list
-                }
-            else:
-                return {
-                    "status": "success",
-                    "message": f"Successfully imported {imported_count} transcriptions",
-                    "imported_count": imported_count,
-                }
-
-        except Exception as e:
-            logger.error(f"Failed to import history: {e}")
-            return {"status": "error", "error": f"Import failed: {str(e)}", "imported_count": 0}
-
-    def _import_from_json(self, content: str) -> tuple:
-        """Import transcriptions from JSON content"""
-        import json
-
-        imported_count = 0
-        errors = []
-
-        try:
-            data = json.loads(content)
-
-            # Handle different JSON structures
-            transcriptions = []
-            if isinstance(data, dict):
-                if "transcriptions" in data:
-                    transcriptions = data["transcriptions"]
-                elif "data" in data:
-                    transcriptions = data["data"]
-                else:
-                    # Assume the dict itself is a single transcription
-                    transcriptions = [data]
-            elif isinstance(data, list):
-                transcriptions = data
-            else:
-                raise ValueError(
-                    "Invalid JSON structure. Expected object with 'transcriptions' key or array of transcriptions"
-                )
-
-            for i, item in enumerate(transcriptions):
-                try:
-                    if not isinstance(item, dict):
-                        errors.append(f"Line {i+1}: Invalid item type, expected object")
-                        continue
-
-                    # Extract required text field
-                    text = item.get("text", "").strip()
-                    if not text:
-                        errors.append(f"Line {i+1}: Missing or empty 'text' field")
-                        continue
-
-                    # Extract optional fields with defaults
-                    language = item.get("language")
-                    model_used = item.get("model_used")
-                    source_type = item.get("source_type", "imported")
-                    filename = item.get("filename")
-                    duration = item.get("duration")
-                    confidence = item.get("confidence")
-                    metadata = item.get("metadata")
-
-                    # Convert string numbers to float if needed
-                    if duration and isinstance(duration, str):
-                        try:
-                            duration = float(duration)
-                        except ValueError:
-                            duration = None
-
-                    if confidence and isinstance(confidence, str):
-                        try:
-                            confidence = float(confidence)
-                        except ValueError:
-                            confidence = None
-
-                    # Add to database
-                    result_id = self.add_transcription(
-                        text=text,
-                        language=language,
-                        model_used=model_used,
-                        source_type=source_type,
-                        filename=filename,
-                        duration=duration,
-                        confidence=confidence,
-                        metadata=metadata,
-                    )
-
-                    if result_id > 0:
-                        imported_count += 1
-                    else:
-                        errors.append(f"Line {i+1}: Failed to insert transcription")
-
-                except Exception as e:
-                    errors.append(f"Line {i+1}: {str(e)}")
-                    continue
-
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON format: {str(e)}")
-
-        return imported_count, errors
-
-    def _import_from_csv(self, content: str) -> tuple:
-        """Import transcriptions from CSV content"""
-        import csv
+        """Import chat history from JSON, NDJSON or CSV content"""
         import io
 
-        imported_count = 0
-        errors = []
-
-        try:
-            # Parse CSV content
-            csv_file = io.StringIO(content)
-            csv_reader = csv.DictReader(csv_file)
-
-            # Check for required columns
-            if not csv_reader.fieldnames:
-                raise ValueError("CSV file appears to be empty or invalid")
-
-            required_fields = ["text"]
-            missing_fields = [field for field in required_fields if field not in csv_reader.fieldnames]
-            if missing_fields:
-                raise ValueError(f"Missing required CSV columns: {', '.join(missing_fields)}")
-
-            for row_num, row in enumerate(csv_reader, start=2):  # Start from 2 (header is line 1)
-                try:
-                    # Extract and validate text
-                    text = row.get("text", "").strip()
-                    if not text:
-                        errors.append(f"Line {row_num}: Missing or empty 'text' field")
-                        continue
-
-                    # Extract optional fields
-                    language = row.get("language", "").strip() or None
-                    model_used = row.get("model_used", "").strip() or None
-                    source_type = row.get("source_type", "").strip() or "imported"
-                    filename = row.get("filename", "").strip() or None
-
-                    # Handle numeric fields
-                    duration = None
-                    confidence = None
-
-                    if row.get("duration"):
-                        try:
-                            duration = float(row["duration"])
-                        except ValueError:
-                            errors.append(f"Line {row_num}: Invalid duration value")
-
-                    if row.get("confidence"):
-                        try:
-                            confidence = float(row["confidence"])
-                        except ValueError:
-                            errors.append(f"Line {row_num}: Invalid confidence value")
-
-                    # Add to database
-                    result_id = self.add_transcription(
-                        text=text,
-                        language=language,
-                        model_used=model_used,
-                        source_type=source_type,
-                        filename=filename,
-                        duration=duration,
-                        confidence=confidence,
-                        metadata=None,
-                    )
-
-                    if result_id > 0:
-                        imported_count += 1
-                    else:
-                        errors.append(f"Line {row_num}: Failed to insert transcription")
-
-                except Exception as e:
-                    errors.append(f"Line {row_num}: {str(e)}")
-                    continue
-
-        except Exception as e:
-            raise ValueError(f"CSV parsing error: {str(e)}")
+        from .history_import import HistoryImporter
 
-        return imported_count, errors
+        job = HistoryImporter(self).run(io.BytesIO(file_content.encode("utf-8")), file_format.lower(), filename)
+        return job.to_dict()
 
     def get_transcriptions_by_date_range(self, start_date: str = None, end_date: str = None, limit: int = 100) -> List[Dict]:
         """Get transcriptions filtered by date range"""
@@ -585,9 +761,7 @@ class ChatHistoryManager:
             return []
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-
+            with self.db.read() as conn:
                 query = "SELECT * FROM transcriptions WHERE 1=1"
                 params = []
 
@@ -608,3 +782,16 @@ class ChatHistoryManager:
         except Exception as e:
             logger.error(f"Failed to get transcriptions by date range: {e}")
             return []
+
+
+def gzip_stream(chunks: Iterator, level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a stream of text/bytes chunks incrementally"""
+    import zlib
+
+    # wbits=31 selects the gzip container
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,274 @@
+"""
+Feature Extraction Module
+Whisper's log-mel spectrogram computed by the appliance in vectorized NumPy, so features are reused instead of recomputed
+Live sessions extend their spectrogram incrementally, reusing the STFT frames of audio already seen;
+uploads keep their features in a small LRU cache for retries and re-runs with another model
+"""
+
+import hashlib
+import logging
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .audio_ingest import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Whisper's STFT: 25 ms windows every 10 ms
+N_FFT = 400
+HOP_LENGTH = 160
+# Frames transformed per FFT call, which bounds the temporary frame matrix
+_BLOCK_FRAMES = 2048
+
+
+def _hz_to_mel(hz):
+    """Slaney mel scale: linear below 1 kHz, logarithmic above"""
+    hz = np.asarray(hz, dtype=np.float64)
+    return np.where(hz < 1000.0, hz * 3.0 / 200.0, 15.0 + np.log(np.maximum(hz, 1e-10) / 1000.0) * 27.0 / np.log(6.4))
+
+
+def _mel_to_hz(mel):
+    mel = np.asarray(mel, dtype=np.float64)
+    return np.where(mel < 15.0, mel * 200.0 / 3.0, 1000.0 * np.exp((mel - 15.0) * np.log(6.4) / 27.0))
+
+
+@lru_cache(maxsize=None)
+def mel_filters(n_mels: int) -> np.ndarray:
+    """Slaney-normalised triangular filterbank, shape (n_mels, N_FFT // 2 + 1)
+
+    The same filters Whisper ships in its assets (librosa.filters.mel for 16 kHz, n_fft 400)
+    """
+    fft_freqs = np.linspace(0, SAMPLE_RATE / 2, N_FFT // 2 + 1)
+    mel_freqs = _mel_to_hz(np.linspace(_hz_to_mel(0.0), _hz_to_mel(SAMPLE_RATE / 2), n_mels + 2))
+    ramps = mel_freqs[:, None] - fft_freqs[None, :]
+    widths = np.diff(mel_freqs)
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0.0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_freqs[2:] - mel_freqs[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+@lru_cache(maxsize=None)
+def _hann_window() -> np.ndarray:
+    # Periodic, as torch.hann_window
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+
+
+def _mel_power(signal: np.ndarray, frames: np.ndarray, n_mels: int) -> np.ndarray:
+    """Mel-filtered STFT power of the given frames of an already reflect-padded signal"""
+    windows = np.lib.stride_tricks.sliding_window_view(signal, N_FFT)
+    filters = mel_filters(n_mels)
+    power = np.empty((n_mels, len(frames)), dtype=np.float32)
+    for block in range(0, len(frames), _BLOCK_FRAMES):
+        index = frames[block : block + _BLOCK_FRAMES]
+        spectrum = np.fft.rfft(windows[index * HOP_LENGTH] * _hann_window(), axis=-1)
+        power[:, block : block + len(index)] = filters @ (spectrum.real**2 + spectrum.imag**2).T
+    return power
+
+
+def mel_power(audio: np.ndarray, n_mels: int = 80, padding: int = 0, frames: Optional[np.ndarray] = None) -> np.ndarray:
+    """Mel-filtered power of Whisper's centred STFT over audio followed by `padding` zero samples
+
+    Args:
+        frames: frame indices to compute (default: all (len(audio) + padding) // HOP_LENGTH frames)
+
+    Frames that only see the zero padding are zero and skip the FFT.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    n_frames = (len(audio) + padding) // HOP_LENGTH
+    frames = np.arange(n_frames) if frames is None else np.asarray(frames)
+    power = np.zeros((n_mels, len(frames)), dtype=np.float32)
+
+    # Frame t is centred on sample t * HOP_LENGTH and reaches N_FFT // 2 samples either side
+    last_audible = (len(audio) + N_FFT // 2 - 1) // HOP_LENGTH
+    audible = np.flatnonzero(frames <= last_audible)
+    if len(audible) == 0:
+        return power
+
+    # Only the padding the audible frames reach is materialised: past N_FFT // 2 zeros the reflection is zero too
+    tail = min(padding, N_FFT)
+    signal = np.pad(np.concatenate((audio, np.zeros(tail, dtype=np.float32))), N_FFT // 2, mode="reflect")
+    power[:, audible] = _mel_power(signal, frames[audible], n_mels)
+    return power
+
+
+def normalize(power: np.ndarray) -> np.ndarray:
+    """Whisper's log compression: log10, clamped to 8 below the maximum, scaled to about [-1, 1]"""
+    log_spec = np.log10(np.maximum(power, 1e-10))
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+def log_mel_spectrogram(audio: np.ndarray, n_mels: int = 80, padding: int = 0) -> np.ndarray:
+    """Whisper-compatible log-mel features of 16 kHz audio, shape (n_mels, (len(audio) + padding) // HOP_LENGTH)"""
+    return normalize(mel_power(audio, n_mels, padding))
+
+
+class IncrementalLogMel:
+    """Log-mel features of one live session's sliding window, reusing the frames of audio seen before
+
+    Windows must start on a multiple of HOP_LENGTH (absolute sample position) so frames line up between
+    passes. Frames that lie wholly inside the received audio never change and are kept; only frames at
+    the window edges and over new audio are transformed.
+    """
+
+    def __init__(self):
+        self.n_mels = None
+        self._power = None
+        self._first = 0  # absolute index of the first kept frame
+        self.stats = {"frames_computed": 0, "frames_reused": 0}
+
+    def window(self, audio: np.ndarray, start: int, n_mels: int = 80, padding: int = 0) -> np.ndarray:
+        """Features for `audio` starting at absolute sample `start`, followed by `padding` zero samples"""
+        if start % HOP_LENGTH:
+            raise ValueError(f"window start {start} is not a multiple of {HOP_LENGTH}")
+        if n_mels != self.n_mels:
+            self.n_mels, self._power, self._first = n_mels, np.zeros((n_mels, 0), dtype=np.float32), 0
+
+        first = start // HOP_LENGTH
+        n_frames = (len(audio) + padding) // HOP_LENGTH
+        # Frames whose whole N_FFT span is real audio: the same in every window that contains them
+        stable_from = -(-(N_FFT // 2) // HOP_LENGTH)
+        stable_to = min(n_frames, (len(audio) - N_FFT // 2) // HOP_LENGTH + 1)
+
+        # Drop frames before the window, keep the cached run only if it is still contiguous with it
+        cached_from = max(self._first, first + stable_from)
+        cached_to = min(self._first + self._power.shape[1], first + stable_to)
+        if cached_to <= cached_from:
+            cached_from = cached_to = first
+
+        power = np.empty((n_mels, n_frames), dtype=np.float32)
+        reused = slice(cached_from - first, cached_to - first)
+        power[:, reused] = self._power[:, cached_from - self._first : cached_to - self._first]
+        missing = np.concatenate((np.arange(0, reused.start), np.arange(reused.stop, n_frames)))
+        power[:, missing] = mel_power(audio, n_mels, padding, frames=missing)
+
+        if stable_to > stable_from:
+            self._power = power[:, stable_from:stable_to].copy()
+            self._first = first + stable_from
+        self.stats["frames_computed"] += len(missing)
+        self.stats["frames_reused"] += reused.stop - reused.start
+        return normalize(power)
+
+
+class FeatureExtractor:
+    """The appliance's feature stage: precomputed features by audio identity, cached features by audio content"""
+
+    def __init__(self, cache_mb: float = 128):
+        """
+        Args:
+            cache_mb: memory for cached upload features (0 disables the cache)
+        """
+        self.max_bytes = int(cache_mb * 1024 * 1024)
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._cache_bytes = 0
+        self._provided: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.stats = {"computed": 0, "provided": 0, "cache_hits": 0, "cache_misses": 0, "evictions": 0}
+
+    def provide(self, audio: np.ndarray, compute: Callable[[int, int], np.ndarray]):
+        """Announce how the features of this exact array are built: compute(n_mels, padding)
+
+        Used by streaming sessions, whose features are incremental; the entry goes away with the array.
+        """
+        key = id(audio)
+
+        def forget(ref, key=key):
+            with self._lock:
+                if self._provided.get(key, (None,))[0] is ref:
+                    del self._provided[key]
+
+        with self._lock:
+            self._provided[key] = (weakref.ref(audio, forget), compute)
+
+    def log_mel(self, audio: np.ndarray, n_mels: int = 80, padding: int = 0) -> np.ndarray:
+        """Log-mel features of 16 kHz audio followed by `padding` zero samples"""
+        with self._lock:
+            ref, compute = self._provided.get(id(audio), (None, None))
+        if ref is not None and ref() is audio:
+            self._count("provided")
+            return compute(n_mels, padding)
+
+        if self.max_bytes <= 0:
+            self._count("computed")
+            return log_mel_spectrogram(audio, n_mels, padding)
+
+        digest = hashlib.blake2b(np.ascontiguousarray(audio, dtype=np.float32).tobytes(), digest_size=16).digest()
+        key = (digest, n_mels, padding)
+        with self._lock:
+            features = self._cache.get(key)
+            if features is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return features
+            self.stats["cache_misses"] += 1
+
+        features = log_mel_spectrogram(audio, n_mels, padding)
+        features.flags.writeable = False  # shared between callers
+        self._count("computed")
+        self._store(key, features)
+        return features
+
+    def install(self, whisper_module) -> bool:
+        """Serve openai-whisper's own feature call from this stage, so transcribe() gets features straight from it
+
+        whisper.transcribe() computes features through the log_mel_spectrogram name of its own module;
+        file paths and tensors still go to the original function.
+        """
+        transcribe_module = sys.modules.get(f"{whisper_module.__name__}.transcribe")
+        if transcribe_module is None or not hasattr(transcribe_module, "log_mel_spectrogram"):
+            logger.warning("⚠️ openai-whisper has no feature hook - it keeps computing its own log-mel features")
+            return False
+
+        import torch
+
+        original = getattr(transcribe_module.log_mel_spectrogram, "__wrapped__", transcribe_module.log_mel_spectrogram)
+
+        def log_mel_spectrogram(audio, n_mels=80, padding=0, device=None):
+            if not isinstance(audio, np.ndarray):
+                return original(audio, n_mels, padding, device)
+            mel = torch.from_numpy(np.array(self.log_mel(audio, n_mels, padding)))
+            return mel.to(device) if device is not None else mel
+
+        log_mel_spectrogram.__wrapped__ = original
+        transcribe_module.log_mel_spectrogram = log_mel_spectrogram
+        logger.info("✅ openai-whisper uses the appliance feature stage")
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "cache_entries": len(self._cache),
+                "cache_mb": round(self._cache_bytes / (1024 * 1024), 2),
+                "max_cache_mb": round(self.max_bytes / (1024 * 1024), 2),
+                **self.stats,
+            }
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _store(self, key: tuple, features: np.ndarray):
+        if features.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = features
+            self._cache_bytes += features.nbytes
+            while self._cache_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.nbytes
+                self.stats["evictions"] += 1
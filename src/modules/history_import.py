@@ -0,0 +1,415 @@
+"""
+History Import Module
+Bulk import of chat history from JSON, NDJSON or CSV uploads
+Files are parsed as a stream, validated in batches and inserted with executemany, one transaction per batch;
+rows whose content hash is already stored are counted as duplicates instead of being inserted again
+"""
+
+import csv
+import io
+import json
+import logging
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from .chat_history import history_row
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("json", "ndjson", "csv")
+# File extensions accepted for each import format
+FORMAT_EXTENSIONS = {"json": "json", "ndjson": "ndjson", "jsonl": "ndjson", "csv": "csv"}
+# Errors kept per job (the rest are only counted)
+MAX_REPORTED_ERRORS = 100
+
+_WHITESPACE = re.compile(r"\s*")
+_decoder = json.JSONDecoder()
+
+
+class ImportJob:
+    """Progress and outcome of one import, safe to read from other threads while it runs"""
+
+    def __init__(self, file_format: str, filename: str = None, total_bytes: int = None):
+        self.id = uuid.uuid4().hex
+        self.format = file_format
+        self.filename = filename
+        self.total_bytes = total_bytes
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.processed = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors: List[str] = []
+        self.bytes_read = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("success", "partial_success", "error")
+
+    def add_error(self, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def progress(self) -> Optional[float]:
+        """Fraction of the file consumed, if its size is known"""
+        if self.finished:
+            return 1.0
+        if not self.total_bytes:
+            return None
+        return round(min(1.0, self.bytes_read / self.total_bytes), 4)
+
+    def to_dict(self) -> Dict:
+        """Import result in the shape returned by ChatHistoryManager.import_history"""
+        result = {
+            "job_id": self.id,
+            "status": self.status,
+            "imported_count": self.imported,
+            "duplicate_count": self.duplicates,
+            "processed_count": self.processed,
+            "error_count": self.error_count,
+            "progress": self.progress(),
+        }
+        if self.status == "error":
+            result["error"] = self.error
+            result["message"] = f"Import failed after {self.imported} transcriptions: {self.error}"
+        elif self.status in ("pending", "running"):
+            result["message"] = f"Processed {self.processed} transcriptions so far"
+        else:
+            message = f"Imported {self.imported} transcriptions"
+            if self.duplicates:
+                message += f", skipped {self.duplicates} duplicates"
+            if self.error_count:
+                message += f" with {self.error_count} errors"
+            result["message"] = message
+        if self.errors:
+            result["errors"] = self.errors[:10] if self.finished else self.errors[-10:]
+        if self.started_at is not None:
+            result["elapsed_seconds"] = round((self.finished_at or time.time()) - self.started_at, 3)
+        return result
+
+
+class HistoryImporter:
+    """Import engine for a ChatHistoryManager, with a registry of recent jobs for progress polling"""
+
+    def __init__(self, chat_history, batch_size: int = 1000, max_jobs: int = 50):
+        self.chat_history = chat_history
+        self.batch_size = max(1, batch_size)
+        self.max_jobs = max(1, max_jobs)
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, stream: BinaryIO, file_format: str, filename: str = None, total_bytes: int = None) -> ImportJob:
+        """Import a binary file stream in the calling thread"""
+        job = self._register(ImportJob(file_format, filename, total_bytes))
+        self._import(job, stream)
+        return job
+
+    def start(self, stream: BinaryIO, file_format: str, filename: str = None) -> ImportJob:
+        """Spool the upload to disk and import it in a background thread; poll get_job() for progress"""
+        spool = tempfile.TemporaryFile()
+        try:
+            shutil.copyfileobj(stream, spool)
+            total_bytes = spool.tell()
+            spool.seek(0)
+        except Exception:
+            spool.close()
+            raise
+
+        job = self._register(ImportJob(file_format, filename, total_bytes))
+
+        def worker():
+            with spool:
+                self._import(job, spool)
+
+        threading.Thread(target=worker, name=f"history-import-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ImportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "batch_size": self.batch_size,
+            "jobs": len(jobs),
+            "running": sum(1 for job in jobs if not job.finished),
+        }
+
+    def _register(self, job: ImportJob) -> ImportJob:
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs
+            for job_id in [job_id for job_id, old in self._jobs.items() if old.finished]:
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                del self._jobs[job_id]
+        return job
+
+    def _import(self, job: ImportJob, stream: BinaryIO):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            if not self.chat_history.database_enabled:
+                raise ValueError("Database disabled, cannot import history")
+            if job.format not in IMPORT_FORMATS:
+                raise ValueError(f"Unsupported format: {job.format}. Use 'json', 'ndjson' or 'csv'")
+
+            text = io.TextIOWrapper(io.BufferedReader(_ProgressReader(stream, job)), encoding="utf-8-sig", newline="")
+            batch = []
+            for line, record in _iter_records(text, job.format):
+                job.processed += 1
+                row = _validate(record, line, job)
+                if row is not None:
+                    batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._insert(job, batch)
+                    batch = []
+            if batch:
+                self._insert(job, batch)
+
+            if job.processed == 0:
+                raise ValueError("No transcriptions found in file")
+            job.status = "partial_success" if job.error_count else "success"
+            logger.info(
+                f"✅ History import {job.id[:8]}: {job.imported} imported, {job.duplicates} duplicates, "
+                f"{job.error_count} errors in {time.time() - job.started_at:.2f}s"
+            )
+        except UnicodeDecodeError:
+            self._fail(job, "File encoding error. Please ensure the file is UTF-8 encoded.")
+        except json.JSONDecodeError as e:
+            self._fail(job, f"Invalid JSON format: {e}")
+        except csv.Error as e:
+            self._fail(job, f"CSV parsing error: {e}")
+        except ValueError as e:
+            self._fail(job, str(e))
+        except Exception as e:
+            logger.error(f"History import {job.id[:8]} failed: {e}")
+            self._fail(job, f"Import failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _insert(self, job: ImportJob, batch: List[tuple]):
+        inserted = self.chat_history.insert_rows(batch, skip_duplicates=True)
+        job.imported += inserted
+        job.duplicates += len(batch) - inserted
+
+    @staticmethod
+    def _fail(job: ImportJob, message: str):
+        # Batches committed before the failure stay imported
+        job.error = message
+        job.status = "error"
+
+
+class _ProgressReader(io.RawIOBase):
+    """Raw stream adapter that counts bytes consumed for job progress"""
+
+    def __init__(self, stream: BinaryIO, job: ImportJob):
+        self._stream = stream
+        self._job = job
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self._job.bytes_read += size
+        return size
+
+
+class _JSONReader:
+    """Incremental JSON tokenizer: walks the outer structure and decodes one element at a time"""
+
+    def __init__(self, text: io.TextIOBase, chunk_size: int = 64 * 1024):
+        self._text = text
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ("" at end of input)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON format: expected '{char}' but found '{found or 'end of file'}'")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Possibly just cut off at the chunk boundary
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self._pos += 1
+            else:
+                self.expect("]")
+                return
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._text.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+
+def _iter_json(text: io.TextIOBase) -> Iterator:
+    """Records of an array, of the array under "transcriptions"/"data", or a single object"""
+    reader = _JSONReader(text)
+    if reader.peek() == "[":
+        yield from reader.array()
+    elif reader.peek() == "{":
+        reader.expect("{")
+        record = {}
+        streamed = False
+        while reader.peek() != "}":
+            key = reader.value()
+            reader.expect(":")
+            if key in ("transcriptions", "data") and not streamed and reader.peek() == "[":
+                streamed = True
+                yield from reader.array()
+            else:
+                record[key] = reader.value()
+            if reader.peek() != "}":
+                reader.expect(",")
+        reader.expect("}")
+        if not streamed:
+            yield record
+    else:
+        raise ValueError("Invalid JSON structure. Expected object with 'transcriptions' key or array of transcriptions")
+
+    if reader.peek():
+        raise ValueError("Invalid JSON format: unexpected data after the end of the document")
+
+
+def _iter_records(text: io.TextIOBase, file_format: str) -> Iterator[Tuple[int, object]]:
+    """(line/record number, record) pairs in file order"""
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        if not reader.fieldnames:
+            raise ValueError("CSV file appears to be empty or invalid")
+        if "text" not in reader.fieldnames:
+            raise ValueError("Missing required CSV columns: text")
+        # Line numbers count the header as line 1
+        for line, row in enumerate(reader, start=2):
+            yield line, row
+    elif file_format == "ndjson":
+        for line, raw in enumerate(text, start=1):
+            if raw.strip():
+                try:
+                    yield line, json.loads(raw)
+                except ValueError:
+                    yield line, None
+    else:
+        for line, record in enumerate(_iter_json(text), start=1):
+            yield line, record
+
+
+def _validate(record, line: int, job: ImportJob) -> Optional[tuple]:
+    """Insert-ready row for one record, or None if it cannot be imported"""
+    if not isinstance(record, dict):
+        job.add_error(f"Line {line}: Invalid item type, expected object")
+        return None
+
+    def field(name):
+        value = record.get(name)
+        if isinstance(value, str):
+            value = value.strip()
+        return value if value not in ("", None) else None
+
+    text = field("text")
+    if not isinstance(text, str):
+        job.add_error(f"Line {line}: Missing or empty 'text' field")
+        return None
+
+    numbers = {}
+    for name in ("duration", "confidence"):
+        value = field(name)
+        try:
+            numbers[name] = float(value) if value is not None else None
+        except (TypeError, ValueError):
+            numbers[name] = None
+            job.add_error(f"Line {line}: Invalid {name} value")
+
+    metadata = field("metadata")
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            metadata = None
+    if metadata is not None and not isinstance(metadata, dict):
+        metadata = None
+        job.add_error(f"Line {line}: Invalid metadata, expected an object")
+
+    timestamp = field("timestamp")
+    if timestamp is not None:
+        timestamp = _normalize_timestamp(timestamp)
+        if timestamp is None:
+            job.add_error(f"Line {line}: Invalid timestamp, using import time")
+
+    return history_row(
+        text=text,
+        language=field("language"),
+        model_used=field("model_used"),
+        source_type=field("source_type") or "imported",
+        filename=field("filename"),
+        duration=numbers["duration"],
+        confidence=numbers["confidence"],
+        metadata=metadata,
+        timestamp=timestamp,
+    )
+
+
+def _normalize_timestamp(value) -> Optional[str]:
+    """ISO 8601 / SQLite timestamps in the stored format (UTC, second precision)"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
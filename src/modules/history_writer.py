@@ -0,0 +1,132 @@
+"""
+History Writer Module
+Write-behind persistence for transcription history
+Records are queued by request threads and batch-inserted by a background thread, one transaction per flush
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Background thread that drains queued history rows into SQLite with executemany"""
+
+    def __init__(self, chat_history, queue_size: int = 10000, batch_size: int = 500, flush_interval_ms: float = 500):
+        self.chat_history = chat_history
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "written": 0, "flushes": 0, "failed": 0, "overflow": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"History write-behind started (batch {self.batch_size}, every {self.flush_interval * 1000:.0f} ms)")
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop the writer after everything queued so far has been written"""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def enqueue(self, row: Tuple) -> bool:
+        """Queue one history row; returns False if it had to be written synchronously"""
+        if self._running:
+            try:
+                self._queue.put_nowait(row)
+                with self._lock:
+                    self._stats["queued"] += 1
+                return True
+            except queue.Full:
+                with self._lock:
+                    self._stats["overflow"] += 1
+                logger.warning("⚠️ History write queue full, writing synchronously")
+
+        self.chat_history.insert_rows([row])
+        return False
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every queued row has been written (used by shutdown paths and tests)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["running"] = self._running
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            row = self._queue.get()
+            if row is None:
+                self._queue.task_done()
+                break
+
+            # Collect everything that arrives within one flush interval
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    self._queue.task_done()
+                    break
+                batch.append(row)
+
+            self._write(batch)
+
+        # Rows queued after the stop sentinel still get written
+        leftover = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not None:
+                leftover.append(row)
+            else:
+                self._queue.task_done()
+        if leftover:
+            self._write(leftover)
+
+    def _write(self, batch):
+        try:
+            self.chat_history.insert_rows(batch)
+            with self._lock:
+                self._stats["written"] += len(batch)
+                self._stats["flushes"] += 1
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} history rows: {e}")
+            with self._lock:
+                self._stats["failed"] += len(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,222 @@
+"""
+Inference Pool Module
+Bounded worker pool that owns the Whisper model instances
+All transcription entry points submit jobs here instead of calling the model on the request thread
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import QUEUE_WAIT_SECONDS
+from .serving import offload
+
+logger = logging.getLogger(__name__)
+
+# How often an idle worker re-checks for shutdown when its stop sentinel did not fit in a full queue
+_STOP_POLL_SECONDS = 0.2
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue cannot accept another job"""
+
+    def __init__(self, retry_after: int, queue_size: int):
+        super().__init__(f"Inference queue full ({queue_size} jobs pending), retry in {retry_after}s")
+        self.retry_after = retry_after
+        self.queue_size = queue_size
+
+
+class InferenceJob:
+    """A single unit of work executed by an inference worker"""
+
+    def __init__(self, run: Callable[[Any], Any], model_name: str):
+        self.run = run
+        self.model_name = model_name
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+
+
+class InferencePool:
+    """Fixed set of worker threads fed by a bounded queue
+
+    Model instances live in the ModelManager's model cache, one slot per worker, so a worker
+    switching between models reuses instances that are still resident instead of reloading
+    """
+
+    def __init__(
+        self,
+        model_manager,
+        workers: int = 2,
+        queue_size: int = 8,
+        retry_after_seconds: int = 5,
+        job_timeout_seconds: float = 600,
+    ):
+        self.model_manager = model_manager
+        self.worker_count = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.retry_after_seconds = int(retry_after_seconds)
+        self.job_timeout_seconds = job_timeout_seconds
+
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._threads = []
+        self._worker_models = {}  # worker index -> model name of its last job
+        self._stats_lock = threading.Lock()
+        self._busy_workers = 0
+        self._running = False
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def start(self):
+        """Start the worker threads"""
+        if self._running:
+            return
+
+        self._running = True
+        self._limit_torch_threads()
+
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._worker_loop, args=(index,), name=f"inference-worker-{index}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"✅ Inference pool started: {self.worker_count} workers, queue size {self.queue_size}")
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """Stop accepting jobs and stop the workers once the queue is drained
+
+        Args:
+            timeout: with wait, give up waiting for the queue to drain after this many seconds;
+                jobs still queued then are failed instead of left waiting
+        """
+        if not self._running:
+            return
+
+        self._running = False
+        # Wakes idle workers at once; a full queue has no room, and busy workers see the flag when it empties
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in self._threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if any(thread.is_alive() for thread in self._threads):
+                failed = self._fail_queued()
+                logger.warning(f"⚠️ Inference pool stopped with jobs still running ({failed} queued jobs failed)")
+
+        self._threads = []
+        self._worker_models.clear()
+        logger.info("Inference pool stopped")
+
+    def submit(self, run: Callable[[Any], Any], model_name: Optional[str] = None) -> Future:
+        """Queue a callable that receives a loaded model; raises InferenceQueueFull when saturated"""
+        if not self._running:
+            raise RuntimeError("Inference pool is not running")
+
+        job = InferenceJob(run, model_name or self.model_manager.get_current_model_name())
+
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._stats_lock:
+                self.stats["rejected"] += 1
+            raise InferenceQueueFull(self.retry_after_seconds, self.queue_size)
+
+        with self._stats_lock:
+            self.stats["submitted"] += 1
+        return job.future
+
+    def submit_transcription(self, audio, model_name: Optional[str] = None, **options) -> Future:
+        """Queue a model.transcribe() call"""
+        return self.submit(lambda model: model.transcribe(audio, **options), model_name)
+
+    def transcribe(self, audio, model_name: Optional[str] = None, **options) -> Dict:
+        """Submit a transcription and block until a worker has finished it"""
+        future = self.submit_transcription(audio, model_name, **options)
+        return future.result(timeout=self.job_timeout_seconds)
+
+    def get_status(self) -> Dict:
+        """Get pool utilisation for status endpoints"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            busy = self._busy_workers
+
+        return {
+            "running": self._running,
+            "workers": self.worker_count,
+            "busy_workers": busy,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "loaded_models": dict(self._worker_models),
+            **stats,
+        }
+
+    def _fail_queued(self) -> int:
+        """Fail the futures of jobs no worker has picked up; returns how many"""
+        failed = 0
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return failed
+            if job is not None and job.future.set_running_or_notify_cancel():
+                job.future.set_exception(RuntimeError("Inference pool shut down before the job started"))
+                failed += 1
+
+    def _limit_torch_threads(self):
+        """Split the cores between workers so they don't oversubscribe each other"""
+        try:
+            import torch
+
+            threads = max(1, (os.cpu_count() or 1) // self.worker_count)
+            torch.set_num_threads(threads)
+            logger.info(f"Torch intra-op threads per worker: {threads}")
+        except ImportError:
+            pass
+
+    def _worker_loop(self, index: int):
+        """Process jobs until a shutdown sentinel is received or the pool is stopped with an empty queue"""
+        while True:
+            try:
+                job = self._queue.get(timeout=_STOP_POLL_SECONDS)
+            except queue.Empty:
+                if self._running:
+                    continue
+                break
+            if job is None:
+                break
+
+            if not job.future.set_running_or_notify_cancel():
+                continue
+
+            job.started_at = time.monotonic()
+            QUEUE_WAIT_SECONDS.observe(job.started_at - job.submitted_at, model=job.model_name)
+            with self._stats_lock:
+                self._busy_workers += 1
+
+            try:
+                # Each worker has its own cache slot; worker 0 shares the ModelManager's default model
+                with self.model_manager.model_cache.use(job.model_name, slot=index) as model:
+                    if model is None:
+                        raise RuntimeError(f"Model {job.model_name} could not be loaded")
+                    self._worker_models[index] = job.model_name
+                    # A native thread even when the server runs on gevent
+                    job.future.set_result(offload(job.run, model))
+                with self._stats_lock:
+                    self.stats["completed"] += 1
+            except Exception as e:
+                logger.error(f"Inference worker {index} job failed: {e}")
+                job.future.set_exception(e)
+                with self._stats_lock:
+                    self.stats["failed"] += 1
+            finally:
+                with self._stats_lock:
+                    self._busy_workers -= 1
@@ -5,25 +5,126 @@ Preserves all original WebSocket features and enhances with real implementation
 """
 
 import logging
-import os
-import tempfile
+import threading
+import time
 from datetime import datetime
 
+import numpy as np
 from flask import request
 from flask_socketio import emit
 
+from .audio_frames import CODEC_ENCODED, FrameDecoder, capabilities, negotiate, parse_frame
+from .audio_ingest import AudioDecodeError, StreamDecoder, audio_duration, container_format, decode_audio
+from .batching import MicroBatcher
+from .inference_pool import InferenceQueueFull
+from .metrics import DECODE_SECONDS, count_failed_request, observe_transcription
+from .streaming import StreamingEngine
+
 logger = logging.getLogger(__name__)
 
+# Options a batched decode honours: fp16 follows the worker's device there, and a single 30 s window
+# has no previous text to condition on. Streaming passes set nothing else, so they batch across sessions
+BATCHABLE_OPTIONS = {"language", "fp16", "word_timestamps", "initial_prompt", "condition_on_previous_text"}
+
 
 class LiveSpeechHandler:
     """Manages WebSocket connections and live speech transcription"""
 
-    def __init__(self, model_manager, whisper_available, system_stats, connected_clients, chat_history):
+    def __init__(
+        self,
+        model_manager,
+        whisper_available,
+        system_stats,
+        connected_clients,
+        chat_history,
+        inference_pool=None,
+        streaming_config=None,
+        vad=None,
+        batching_config=None,
+    ):
         self.model_manager = model_manager
         self.whisper_available = whisper_available
         self.system_stats = system_stats
         self.connected_clients = connected_clients
         self.chat_history = chat_history
+        self.inference_pool = inference_pool
+        self.vad = vad
+        # Clients that negotiated binary audio frames: sid -> language, model and frame decoder
+        self.frame_clients = {}
+        # Recording sessions streaming WebM/Ogg chunks: sid -> persistent ffmpeg decoder
+        self.stream_decoders = {}
+        self._decoders_lock = threading.Lock()
+
+        streaming_config = streaming_config or {}
+        self.streaming = StreamingEngine(
+            self._transcribe_stream,
+            window_seconds=streaming_config.get("window_seconds", 30.0),
+            min_chunk_seconds=streaming_config.get("min_chunk_seconds", 1.0),
+            trim_seconds=streaming_config.get("trim_seconds", 15.0),
+            features=model_manager.features if model_manager else None,
+        )
+
+        # Live chunks from concurrent sessions share batched model passes
+        batching_config = batching_config or {}
+        self.batcher = None
+        if whisper_available and batching_config.get("enabled", False):
+            self.batcher = MicroBatcher(
+                self._run_batch,
+                max_batch_size=batching_config.get("max_batch_size", 8),
+                max_wait_ms=batching_config.get("max_wait_ms", 50),
+                queue_size=batching_config.get("queue_size", 64),
+                retry_after_seconds=batching_config.get("retry_after_seconds", 5),
+            )
+            self.batcher.start()
+
+    def _transcribe(self, audio, model_name=None, **options):
+        """Transcribe on the inference pool, or on the shared model when no pool is configured
+
+        Live segments of up to 30 s go through the micro-batcher when it is enabled, the backend decodes
+        batches natively and the request sets nothing a batched decode cannot honour (temperature, beams, ...)
+        """
+        if (
+            self.batcher is not None
+            and self.model_manager.backend.supports_batching
+            and MicroBatcher.fits(audio)
+            and set(options) <= BATCHABLE_OPTIONS
+        ):
+            key = (model_name, options.get("language"), bool(options.get("word_timestamps")))
+            return self.batcher.transcribe(audio, key=key, prompt=options.get("initial_prompt"))
+
+        if self.inference_pool is not None:
+            return self.inference_pool.transcribe(audio, model_name=model_name, **options)
+
+        model = self.model_manager.get_model_for(model_name)
+        if model is None:
+            raise RuntimeError(f"Model {model_name or self.model_manager.get_current_model_name()} could not be loaded")
+        return model.transcribe(audio, **options)
+
+    def _transcribe_stream(self, audio, model_name=None, **options):
+        """Streaming engine callback - one pass over the session window, recorded in metrics"""
+        started = time.perf_counter()
+        result = self._transcribe(audio, model_name=model_name, **options)
+        observe_transcription(
+            model_name or self.model_manager.get_current_model_name(),
+            "live_stream",
+            result.get("language") or options.get("language"),
+            audio_duration(audio),
+            time.perf_counter() - started,
+        )
+        return result
+
+    def _run_batch(self, key, audios, prompts):
+        """Micro-batcher callback: one batched decode per (model, language, word timestamps) group"""
+        model_name, language, word_timestamps = key
+
+        def run(model):
+            return self.model_manager.transcribe_batch(
+                audios, model=model, language=language, prompts=prompts, word_timestamps=word_timestamps
+            )
+
+        if self.inference_pool is not None:
+            return self.inference_pool.submit(run, model_name=model_name)
+        return run(self.model_manager.get_model_for(model_name))
 
     def handle_connect(self):
         """Handle WebSocket connection - Original functionality preserved"""
@@ -36,6 +137,7 @@ class LiveSpeechHandler:
                 "status": "connected",
                 "message": "WebSocket connected successfully",
                 "real_connection": True,  # Now it's real, not simulated!
+                "audio_frames": capabilities(),
             },
         )
 
@@ -43,6 +145,11 @@ class LiveSpeechHandler:
         """Handle WebSocket disconnection - Original functionality preserved"""
         if request.sid in self.connected_clients:
             self.connected_clients.remove(request.sid)
+        self.streaming.discard(request.sid)
+        self.frame_clients.pop(request.sid, None)
+        decoder = self._pop_stream_decoder(request.sid)
+        if decoder is not None:
+            decoder.kill()
         self.system_stats["active_connections"] = len(self.connected_clients)
         logger.info(f"Client disconnected: {request.sid}")
 
@@ -50,10 +157,10 @@ class LiveSpeechHandler:
         """Broadcast transcription result to client - Original functionality + save to history"""
         # Save to chat history
         try:
-            self.chat_history.add_transcription(
+            self.chat_history.queue_transcription(
                 text=data.get("text", ""),
                 language=data.get("language", "unknown"),
-                model_used=self.model_manager.get_current_model_name(),
+                model_used=self._client_model(data.get("model")),
                 source_type="live",
                 metadata={"timestamp": datetime.now().isoformat()},
             )
@@ -62,96 +169,312 @@ class LiveSpeechHandler:
 
         emit("transcription_result", data)
 
+    def _client_model(self, requested=None):
+        """Model serving the calling client: the one it asked for, its session's or frame protocol's, else the current"""
+        client = self.frame_clients.get(request.sid) or {}
+        return (
+            requested
+            or self.streaming.session_model(request.sid)
+            or client.get("model")
+            or self.model_manager.get_current_model_name()
+        )
+
     def handle_transcription_error(self, data):
         """Broadcast transcription error to client - Original functionality"""
         emit("transcription_error", data)
 
     def handle_audio_chunk(self, data):
-        """Handle incoming audio chunk for real-time transcription - NEW REAL IMPLEMENTATION"""
+        """Handle incoming audio chunk for real-time transcription - NEW REAL IMPLEMENTATION
+
+        audio_data is base64 text or SocketIO binary; clients that negotiated binary frames send audio_frame instead
+        """
         if not self.whisper_available:
             emit("transcription_error", {"error": "Whisper model not available"})
             return
 
+        # Optional client sequence number, echoed on the reply so clients can match replies to chunks
+        echo = {"seq": data["seq"]} if isinstance(data, dict) and "seq" in data else {}
+
         try:
             # Get audio data and language from WebSocket
             audio_data = data.get("audio_data")
             language = data.get("language", "auto")  # Get language from frontend
+            # Chunks may name a model; it runs from the model cache without a global switch
+            model_name = data.get("model") or self.model_manager.get_current_model_name()
+            if data.get("model") and model_name not in self.model_manager.get_available_models():
+                emit("transcription_error", {"error": f"Invalid model: {model_name}", **echo})
+                return
             if not audio_data:
-                emit("transcription_error", {"error": "No audio data received"})
+                emit("transcription_error", {"error": "No audio data received", **echo})
                 return
 
-            # Save audio chunk temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                # Assuming audio_data is base64 encoded or binary
-                if isinstance(audio_data, str):
-                    import base64
+            # Assuming audio_data is base64 encoded or binary
+            if isinstance(audio_data, str):
+                import base64
 
-                    audio_bytes = base64.b64decode(audio_data)
+                audio_bytes = base64.b64decode(audio_data)
+            else:
+                audio_bytes = audio_data
+
+            # Decode in memory - the chunk never touches the filesystem
+            with DECODE_SECONDS.time(source_type="live"):
+                audio = self._decode_chunk(audio_bytes)
+            self._process_audio(audio, language, model_name, echo)
+        except Exception as e:
+            self._report_error(e, echo)
+
+    def handle_negotiate_audio(self, data):
+        """Agree on the binary frame protocol; the language and model offered here apply to the client's frames"""
+        data = data or {}
+        model_name = data.get("model")
+        if model_name and model_name not in self.model_manager.get_available_models():
+            emit("transcription_error", {"error": f"Invalid model: {model_name}"})
+            return
+
+        reply = negotiate(data)
+        if reply["version"] is not None:
+            self.frame_clients[request.sid] = {
+                "language": data.get("language", "auto"),
+                "model": model_name,
+                "decoder": FrameDecoder(),
+            }
+        else:
+            self.frame_clients.pop(request.sid, None)
+        emit("audio_negotiated", reply)
+
+    def handle_audio_frame(self, data):
+        """Handle a binary audio frame (header + raw audio, see audio_frames) from a client that negotiated it"""
+        if not self.whisper_available:
+            emit("transcription_error", {"error": "Whisper model not available"})
+            return
+        client = self.frame_clients.get(request.sid)
+        if client is None:
+            emit("transcription_error", {"error": "Send negotiate_audio before binary audio frames"})
+            return
+
+        echo = {}
+        try:
+            frame = parse_frame(data)
+            echo = {"seq": frame.seq, "session": frame.session} if frame.session else {"seq": frame.seq}
+            # PCM payloads are read in place from the WebSocket message
+            with DECODE_SECONDS.time(source_type="live"):
+                if frame.codec == CODEC_ENCODED:
+                    audio = self._decode_chunk(bytes(frame.payload))
                 else:
-                    audio_bytes = audio_data
-
-                tmp_file.write(audio_bytes)
-                tmp_file.flush()
-
-                # Transcribe in real-time using model manager
-                logger.info(f"Processing live audio chunk with language: {language}")
-                model = self.model_manager.get_model()
-                if model is None:
-                    emit("transcription_error", {"error": "No model loaded"})
-                    return
-
-                # Use language parameter if specified
-                transcribe_options = {"fp16": False}
-                if language and language != "auto":
-                    transcribe_options["language"] = language
-
-                result = model.transcribe(tmp_file.name, **transcribe_options)
-
-                # Clean up
-                os.unlink(tmp_file.name)
-
-                # Send result back via WebSocket AND save to history
-                transcription_data = {
-                    "text": result["text"],
-                    "language": result.get("language", "unknown"),
-                    "timestamp": datetime.now().isoformat(),
-                    "confidence": getattr(result, "confidence", 0.0),
-                }
-
-                # Save to chat history
-                try:
-                    self.chat_history.add_transcription(
-                        text=result["text"],
-                        language=result.get("language", "unknown"),
-                        model_used=self.model_manager.get_current_model_name(),
-                        source_type="live",
-                        metadata={"timestamp": datetime.now().isoformat()},
-                    )
-                    logger.info(f"✅ Saved live speech to history: {result['text'][:50]}...")
-                except Exception as e:
-                    logger.warning(f"Failed to save live speech to history: {e}")
-
-                emit("transcription_result", transcription_data)
-
-                # Update stats
-                self.system_stats["total_transcriptions"] += 1
+                    audio = client["decoder"].decode(frame)
+            model_name = client["model"] or self.model_manager.get_current_model_name()
+            self._process_audio(audio, client["language"], model_name, echo)
+        except Exception as e:
+            self._report_error(e, echo)
+
+    def _decode_chunk(self, audio_bytes):
+        """Decode an encoded chunk; WebM/Ogg chunks of a recording session go through its persistent decoder
+
+        MediaRecorder sends the container header only with the first chunk, so the session's decoder is
+        started by a chunk that carries one and fed every chunk after it; anything else is decoded on its own
+        """
+        sid = request.sid
+        input_format = container_format(audio_bytes[:4])
+        with self._decoders_lock:
+            decoder = self.stream_decoders.get(sid)
+        if decoder is None and (input_format is None or not self.streaming.has_session(sid)):
+            return decode_audio(audio_bytes)
+
+        if input_format is None:
+            try:
+                return decoder.feed(audio_bytes)
+            except AudioDecodeError:
+                # A broken stream is not resumable - the next chunk with a header starts a new one
+                self._pop_stream_decoder(sid)
+                decoder.kill()
+                raise
+
+        # A header starts a new stream; whatever the previous one still held comes first
+        leftover = self._finish_stream(sid)
+        decoder = StreamDecoder(input_format)
+        with self._decoders_lock:
+            self.stream_decoders[sid] = decoder
+        logger.info(f"Started {input_format} stream decoder for {sid}")
+        return np.concatenate((leftover, decoder.feed(audio_bytes)))
+
+    def _pop_stream_decoder(self, sid):
+        with self._decoders_lock:
+            return self.stream_decoders.pop(sid, None)
+
+    def _finish_stream(self, sid):
+        """Close the client's stream decoder, returning the samples it still held"""
+        decoder = self._pop_stream_decoder(sid)
+        if decoder is None:
+            return np.zeros(0, dtype=np.float32)
+        return decoder.close()
+
+    def _process_audio(self, audio, language, model_name, echo):
+        """Shared by JSON chunks and binary frames once their audio is decoded"""
+        chunk_duration = audio_duration(audio)
 
+        # Only speech goes to the model - silent chunks stop here
+        streaming = self.streaming.has_session(request.sid)
+        if self.vad is not None:
+            if streaming:
+                # Session audio stays continuous: trimming each chunk would glue words across chunk boundaries
+                if self.vad.is_silent(audio):
+                    audio = audio[:0]
+            else:
+                audio, _ = self.vad.compact(audio)
+        if len(audio) == 0:
+            logger.debug(f"Dropping silent audio chunk from {request.sid}")
+            if not streaming:
+                emit(
+                    "transcription_result",
+                    {
+                        "text": "",
+                        "language": language,
+                        "no_speech": True,
+                        "timestamp": datetime.now().isoformat(),
+                        **echo,
+                    },
+                )
+            return
+
+        # Chunks inside a recording session feed the streaming engine
+        if streaming:
+            update = self.streaming.feed(request.sid, audio)
+            if update:
+                update["timestamp"] = datetime.now().isoformat()
+                update.update(echo)
+                emit("transcription_partial", update)
+            return
+
+        # One-shot chunk outside a session: transcribe the whole payload
+        logger.info(f"Processing live audio chunk with language: {language}")
+
+        # Use language parameter if specified
+        transcribe_options = {"fp16": False}
+        if language and language != "auto":
+            transcribe_options["language"] = language
+
+        started = time.perf_counter()
+        result = self._transcribe(audio, model_name=model_name, **transcribe_options)
+        observe_transcription(
+            model_name,
+            "live",
+            result.get("language"),
+            audio_duration(audio),
+            time.perf_counter() - started,
+        )
+
+        # Send result back via WebSocket AND save to history
+        transcription_data = {
+            "text": result["text"],
+            "language": result.get("language", "unknown"),
+            "timestamp": datetime.now().isoformat(),
+            "confidence": getattr(result, "confidence", 0.0),
+            **echo,
+        }
+
+        # Save to chat history
+        try:
+            self.chat_history.queue_transcription(
+                text=result["text"],
+                language=result.get("language", "unknown"),
+                model_used=model_name,
+                source_type="live",
+                duration=chunk_duration,
+                metadata={"timestamp": datetime.now().isoformat()},
+            )
+            logger.info(f"✅ Queued live speech for history: {result['text'][:50]}...")
         except Exception as e:
+            logger.warning(f"Failed to save live speech to history: {e}")
+
+        emit("transcription_result", transcription_data)
+
+        # Update stats
+        self.system_stats["total_transcriptions"] += 1
+
+    def _report_error(self, e, echo):
+        """Count and report a failed live chunk or frame to its client"""
+        if isinstance(e, AudioDecodeError):
+            logger.warning(f"Could not decode live audio chunk: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "live", "bad_audio")
+            emit(
+                "transcription_error",
+                {"error": f"Could not decode audio: {e}", "timestamp": datetime.now().isoformat(), **echo},
+            )
+        elif isinstance(e, InferenceQueueFull):
+            logger.warning(f"Dropping live audio chunk: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "live", "busy")
+            emit(
+                "transcription_error",
+                {"error": "Server busy", "retry_after": e.retry_after, "timestamp": datetime.now().isoformat(), **echo},
+            )
+        else:
             logger.error(f"Live transcription error: {e}")
-            emit("transcription_error", {"error": str(e), "timestamp": datetime.now().isoformat()})
+            count_failed_request(self.model_manager.get_current_model_name(), "live", "error")
+            emit("transcription_error", {"error": str(e), "timestamp": datetime.now().isoformat(), **echo})
 
     def handle_start_recording(self, data):
-        """Start live recording session - NEW FEATURE"""
+        """Start live recording session - opens a streaming session for this client"""
         logger.info(f"Starting live recording session for client: {request.sid}")
+        data = data or {}
+        streaming = bool(self.whisper_available)
+        if streaming:
+            self.streaming.start_session(request.sid, language=data.get("language"), model_name=data.get("model"))
         emit(
             "recording_started",
-            {"status": "recording", "message": "Live recording started", "timestamp": datetime.now().isoformat()},
+            {
+                "status": "recording",
+                "message": "Live recording started",
+                "streaming": streaming,
+                "timestamp": datetime.now().isoformat(),
+            },
         )
 
     def handle_stop_recording(self, data):
-        """Stop live recording session - NEW FEATURE"""
+        """Stop live recording session - flushes the streaming session and emits the final transcript"""
         logger.info(f"Stopping live recording session for client: {request.sid}")
+        try:
+            # The end of a WebM/Ogg stream is still inside its decoder
+            tail = self._finish_stream(request.sid)
+            if len(tail) and not (self.vad is not None and self.vad.is_silent(tail)):
+                self.streaming.feed(request.sid, tail)
+        except Exception as e:
+            logger.warning(f"Failed to flush the stream decoder of {request.sid}: {e}")
+        try:
+            final = self.streaming.finish(request.sid)
+        except Exception as e:
+            logger.error(f"Failed to finish streaming session: {e}")
+            final = None
+
         emit(
             "recording_stopped",
             {"status": "stopped", "message": "Live recording stopped", "timestamp": datetime.now().isoformat()},
         )
+
+        # Sessions that never received audio (e.g. clients sending one blob after stop) end here
+        if not final or not final["text"]:
+            return
+
+        # Save the whole session to history once
+        try:
+            self.chat_history.queue_transcription(
+                text=final["text"],
+                language=final["language"],
+                model_used=final["model_name"] or self.model_manager.get_current_model_name(),
+                source_type="live",
+                duration=final["duration"],
+                metadata={"timestamp": datetime.now().isoformat(), "streaming": True, "passes": final["passes"]},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to save live speech to history: {e}")
+
+        emit(
+            "transcription_result",
+            {
+                "text": final["text"],
+                "language": final["language"],
+                "timestamp": datetime.now().isoformat(),
+                "confidence": 0.0,
+                "final": True,
+            },
+        )
+        self.system_stats["total_transcriptions"] += 1
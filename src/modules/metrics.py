@@ -0,0 +1,272 @@
+"""
+Metrics Module
+Prometheus/OpenMetrics counters and histograms for the transcription pipeline
+Each thread updates its own shard without locking; shards are summed only when /metrics is scraped
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from fast decodes up to long uploads
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Processing time / audio time (below 1 is faster than realtime)
+REALTIME_FACTOR_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0, 10.0)
+
+
+class _ShardedMetric:
+    """Per-thread value dicts keyed by label tuple; dead threads are folded into a retired shard"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: Dict[int, Tuple[weakref.ref, dict]] = {}
+        self._retired: dict = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            thread = threading.current_thread()
+            with self._lock:
+                self._retire_dead_threads()
+                self._shards[thread.ident] = (weakref.ref(thread), shard)
+        return shard
+
+    def _retire_dead_threads(self):
+        for ident, (thread_ref, shard) in list(self._shards.items()):
+            thread = thread_ref()
+            if thread is None or not thread.is_alive():
+                for key, value in shard.items():
+                    self._retired[key] = self._merge(self._retired.get(key), value)
+                del self._shards[ident]
+
+    def collect(self) -> Dict[Tuple, object]:
+        """Totals per label set across every thread"""
+        with self._lock:
+            self._retire_dead_threads()
+            totals = {key: self._merge(None, value) for key, value in self._retired.items()}
+            for _, shard in list(self._shards.values()):
+                # Copied in one step - the owning thread may be writing
+                for key, value in list(shard.items()):
+                    totals[key] = self._merge(totals.get(key), value)
+        return totals
+
+    def _merge(self, total, value):
+        raise NotImplementedError
+
+    def _labels(self, key: Tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_ShardedMetric):
+    """Monotonic counter"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, total, value):
+        return (total or 0) + value
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._labels(key)} {_format(value)}" for key, value in sorted(self.collect().items())]
+
+
+class Histogram(_ShardedMetric):
+    """Bucketed distribution with sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # Per-bucket (non-cumulative) counts + overflow bucket, then sum
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format(state[-1])}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time (queue depths, connection counts)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} unavailable: {e}")
+            return []
+        return [] if value is None else [f"{self.name} {_format(value)}"]
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        # Gauges are re-bound when a component is recreated
+        with self._lock:
+            self._metrics[name] = Gauge(name, documentation, read)
+            return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REGISTRY = MetricsRegistry()
+
+TRANSCRIPTION_REQUESTS = REGISTRY.counter(
+    "whisper_transcription_requests_total",
+    "Transcription requests by outcome and result cache use (hit, miss, bypass, or off without a cache lookup)",
+    ("model", "source_type", "language", "status", "cache"),
+)
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "whisper_queue_wait_seconds", "Time jobs wait in the inference queue before a worker picks them up", ("model",)
+)
+DECODE_SECONDS = REGISTRY.histogram("whisper_decode_seconds", "Audio decode time", ("source_type",))
+INFERENCE_SECONDS = REGISTRY.histogram(
+    "whisper_inference_seconds", "Transcription time including queueing", ("model", "source_type", "language")
+)
+REALTIME_FACTOR = REGISTRY.histogram(
+    "whisper_realtime_factor",
+    "Transcription time divided by audio duration",
+    ("model", "source_type", "language"),
+    buckets=REALTIME_FACTOR_BUCKETS,
+)
+HISTORY_WRITE_SECONDS = REGISTRY.histogram(
+    "whisper_history_write_seconds", "Chat history write transaction time", ("operation",)
+)
+HISTORY_ROWS_WRITTEN = REGISTRY.counter("whisper_history_rows_written_total", "Chat history rows inserted")
+RESULT_CACHE_LOOKUPS = REGISTRY.counter(
+    "whisper_result_cache_lookups_total", "Transcription result cache lookups by outcome (hit, miss, bypass)", ("result",)
+)
+
+
+def observe_transcription(
+    model: str,
+    source_type: str,
+    language: str,
+    audio_seconds: float,
+    elapsed_seconds: float,
+    status: str = "ok",
+    cache: str = "off",
+):
+    """Record one finished transcription: request count, latency and realtime factor"""
+    labels = {"model": model or "unknown", "source_type": source_type, "language": language or "unknown"}
+    TRANSCRIPTION_REQUESTS.inc(status=status, cache=cache, **labels)
+    INFERENCE_SECONDS.observe(elapsed_seconds, **labels)
+    if audio_seconds and audio_seconds > 0:
+        REALTIME_FACTOR.observe(elapsed_seconds / audio_seconds, **labels)
+
+
+def count_cache_hit(model: str, source_type: str, language: str = None):
+    """Count a request answered from the result cache; no inference ran, so latency is not observed"""
+    TRANSCRIPTION_REQUESTS.inc(
+        model=model or "unknown", source_type=source_type, language=language or "unknown", status="ok", cache="hit"
+    )
+
+
+def count_failed_request(model: str, source_type: str, status: str, language: str = None):
+    """Count a request that produced no transcription (busy, undecodable audio, error)"""
+    TRANSCRIPTION_REQUESTS.inc(
+        model=model or "unknown", source_type=source_type, language=language or "unknown", status=status, cache="off"
+    )
@@ -0,0 +1,215 @@
+"""
+Model Cache Module
+Keeps several Whisper models resident under a RAM budget, evicting the least recently used
+Entries are keyed by (model name, slot): every inference worker owns its own instances because
+Whisper models are not safe to decode from two threads at once
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+class ModelEntry:
+    """A resident model instance and its memory accounting"""
+
+    def __init__(self, model_name: str, slot: int, model, size_mb: float, measured: bool):
+        self.model_name = model_name
+        self.slot = slot
+        self.model = model
+        self.size_mb = size_mb
+        self.measured = measured
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+        self.in_use = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "slot": self.slot,
+            "size_mb": round(self.size_mb, 1),
+            "size_source": "measured" if self.measured else "estimate",
+            "in_use": self.in_use,
+            "uses": self.uses,
+            "idle_seconds": round(time.time() - self.last_used, 1),
+        }
+
+
+class ModelCache:
+    """LRU cache of loaded models bounded by an approximate resident-memory budget"""
+
+    def __init__(self, loader: Callable[[str], object], budget_mb: float = 3072, estimates_mb: Dict[str, float] = None):
+        """
+        Args:
+            loader: callable(model_name) returning a new model instance, or None on failure
+            budget_mb: memory all resident models may use together
+            estimates_mb: expected resident size per model name, used until a load has been measured
+        """
+        self.loader = loader
+        self.budget_mb = float(budget_mb)
+        self.estimates_mb = dict(estimates_mb or {})
+        self._entries: "OrderedDict[tuple, ModelEntry]" = OrderedDict()  # least recently used first
+        self._measured_mb: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # One load at a time: keeps peak memory predictable and makes the RSS delta attributable
+        self._load_lock = threading.Lock()
+        self._process = psutil.Process(os.getpid())
+        self._pinned = None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "load_failures": 0}
+
+    def get(self, model_name: str, slot: int = 0):
+        """Return the model for (name, slot), loading it (and evicting others) if needed"""
+        with self._checkout(model_name, slot) as model:
+            return model
+
+    @contextmanager
+    def use(self, model_name: str, slot: int = 0):
+        """Check a model out for the duration of a job; models in use are never evicted"""
+        with self._checkout(model_name, slot) as model:
+            yield model
+
+    def peek(self, model_name: str, slot: int = 0):
+        """The resident model for (name, slot) without loading or touching LRU order"""
+        with self._lock:
+            entry = self._entries.get((model_name, slot))
+            return entry.model if entry else None
+
+    def pin(self, model_name: Optional[str], slot: int = 0):
+        """Exempt one model from eviction (the default model); None unpins"""
+        with self._lock:
+            self._pinned = (model_name, slot) if model_name else None
+
+    def is_resident(self, model_name: str) -> bool:
+        """Whether any slot holds this model"""
+        with self._lock:
+            return any(key[0] == model_name for key in self._entries)
+
+    def evict(self, model_name: str, slot: Optional[int] = None) -> int:
+        """Drop a model from one slot (or all slots); returns how many instances were dropped"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == model_name and (slot is None or key[1] == slot)]
+            for key in keys:
+                del self._entries[key]
+        if keys:
+            logger.info(f"Evicted model {model_name} from {len(keys)} slot(s)")
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def resident_mb(self) -> float:
+        with self._lock:
+            return sum(entry.size_mb for entry in self._entries.values())
+
+    def expected_mb(self, model_name: str) -> float:
+        """Measured size of a previous load of this model, else the configured estimate"""
+        return self._measured_mb.get(model_name, self.estimates_mb.get(model_name, 0.0))
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            entries = [entry.to_dict() for entry in reversed(self._entries.values())]  # most recent first
+            stats = dict(self.stats)
+        return {
+            "budget_mb": self.budget_mb,
+            "resident_mb": round(sum(entry["size_mb"] for entry in entries), 1),
+            "pinned": self._pinned[0] if self._pinned else None,
+            "models": entries,
+            **stats,
+        }
+
+    @contextmanager
+    def _checkout(self, model_name: str, slot: int):
+        key = (model_name, slot)
+        entry = self._acquire(key)
+        if entry is None:
+            with self._load_lock:
+                # Another thread may have loaded it while we waited
+                entry = self._acquire(key, count_miss=False)
+                if entry is None:
+                    entry = self._load(key)
+
+        if entry is None:
+            yield None
+            return
+        try:
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+
+    def _acquire(self, key, count_miss: bool = True) -> Optional[ModelEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count_miss:
+                    self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.in_use += 1
+            entry.uses += 1
+            entry.last_used = time.time()
+            if count_miss:
+                self.stats["hits"] += 1
+            return entry
+
+    def _load(self, key) -> Optional[ModelEntry]:
+        """Make room for the model, load it and record its size (called with the load lock held)"""
+        model_name, slot = key
+        self._make_room(self.expected_mb(model_name))
+
+        rss_before = self._process.memory_info().rss
+        started = time.monotonic()
+        model = self.loader(model_name)
+        if model is None:
+            with self._lock:
+                self.stats["load_failures"] += 1
+            return None
+
+        delta_mb = (self._process.memory_info().rss - rss_before) / (1024 * 1024)
+        # A load that reused memory freed by an eviction shows a small delta - trust the estimate then
+        measured = delta_mb > 0.5 * self.estimates_mb.get(model_name, 0.0) and delta_mb > 0
+        size_mb = delta_mb if measured else self.expected_mb(model_name)
+        if measured:
+            self._measured_mb[model_name] = delta_mb
+
+        entry = ModelEntry(model_name, slot, model, size_mb, measured)
+        entry.in_use = 1
+        entry.uses = 1
+        with self._lock:
+            self._entries[key] = entry
+        logger.info(
+            f"📦 Loaded model {model_name} (slot {slot}) in {time.monotonic() - started:.1f}s, "
+            f"~{size_mb:.0f} MB, {self.resident_mb():.0f}/{self.budget_mb:.0f} MB resident"
+        )
+        return entry
+
+    def _make_room(self, needed_mb: float):
+        """Evict idle models, least recently used first, until needed_mb fits in the budget"""
+        with self._lock:
+            resident = sum(entry.size_mb for entry in self._entries.values())
+            for key in list(self._entries):
+                if resident + needed_mb <= self.budget_mb:
+                    break
+                entry = self._entries[key]
+                if entry.in_use or key == self._pinned:
+                    continue
+                del self._entries[key]
+                resident -= entry.size_mb
+                self.stats["evictions"] += 1
+                logger.info(f"♻️ Evicting model {entry.model_name} (slot {entry.slot}, ~{entry.size_mb:.0f} MB)")
+
+        if resident + needed_mb > self.budget_mb:
+            logger.warning(
+                f"⚠️ Model cache over budget: {resident + needed_mb:.0f} MB needed, {self.budget_mb:.0f} MB allowed "
+                f"(remaining models are in use or pinned)"
+            )
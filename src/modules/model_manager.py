@@ -5,12 +5,16 @@ Provides model switching functionality for Live Speech and Admin Panel
 """
 
 import logging
-import os
 import threading
-import hashlib # Added for SHA256 checksum
-import requests # Added for downloading files
 from typing import Dict, List, Optional
 
+import numpy as np
+import requests
+
+from .features import FeatureExtractor
+from .model_cache import ModelCache
+from .whisper_backends import OPENAI_WHISPER, DownloadCancelled, StubBackend, create_backend
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +25,7 @@ class ModelManager:
         "tiny": {
             "name": "Tiny",
             "size": "~39 MB",
+            "ram_mb": 150,
             "speed": "Fast",
             "quality": "Basic",
             "description": "Fastest processing, good for testing",
@@ -30,6 +35,7 @@ class ModelManager:
         "base": {
             "name": "Base",
             "size": "~74 MB",
+            "ram_mb": 300,
             "speed": "Fast",
             "quality": "Good",
             "description": "Balanced speed and accuracy (recommended)",
@@ -39,6 +45,7 @@ class ModelManager:
         "small": {
             "name": "Small",
             "size": "~244 MB",
+            "ram_mb": 800,
             "speed": "Medium",
             "quality": "Better",
             "description": "Better accuracy, moderate speed",
@@ -48,6 +55,7 @@ class ModelManager:
         "medium": {
             "name": "Medium",
             "size": "~769 MB",
+            "ram_mb": 2000,
             "speed": "Slow",
             "quality": "High",
             "description": "High accuracy, slower processing",
@@ -57,6 +65,7 @@ class ModelManager:
         "large": { # This corresponds to large-v3 in openai-whisper
             "name": "Large",
             "size": "~1550 MB",
+            "ram_mb": 4000,
             "speed": "Very Slow",
             "quality": "Excellent",
             "description": "Best accuracy, slowest processing (uses large-v3)",
@@ -84,48 +93,61 @@ class ModelManager:
         # }
     }
 
-    def __init__(self):
-        self.current_model = None
+    def __init__(
+        self,
+        stub_realtime_factor: Optional[float] = None,
+        cache_budget_mb: float = 3072,
+        backend: str = OPENAI_WHISPER,
+        backend_options: Optional[Dict] = None,
+        feature_cache_mb: float = 128,
+    ):
+        """
+        Args:
+            stub_realtime_factor: use a stub model with this realtime factor instead of whisper (load testing)
+            cache_budget_mb: RAM the resident models may use together before the least recently used is evicted
+            backend: inference engine, openai-whisper or faster-whisper (falls back to the other if not installed)
+            backend_options: device, compute_type and cpu_threads for faster-whisper
+            feature_cache_mb: memory for cached log-mel features of uploads (0 disables the cache)
+        """
         self.current_model_name = "base"  # Default model
+        # Switching models keeps the previous ones resident until the budget forces them out
+        self.model_cache = ModelCache(
+            self.create_model_instance,
+            budget_mb=cache_budget_mb,
+            estimates_mb={name: info["ram_mb"] for name, info in self.AVAILABLE_MODELS.items()},
+        )
         self.model_loading = False
         self.model_load_lock = threading.Lock()
-        self.whisper_available = False
         self.downloaded_models = set()  # Track which models are actually downloaded
         self.download_progress = {}  # Stores progress of ongoing downloads
-
-        # Try to import whisper
-        try:
-            import whisper
-
-            self.whisper = whisper
-            self.whisper_available = True
-            logger.info("✅ Whisper library available")
-
+        self.features = FeatureExtractor(cache_mb=feature_cache_mb)
+
+        if stub_realtime_factor is not None:
+            self.backend = StubBackend(stub_realtime_factor)
+            logger.warning(
+                f"⚠️ Using stub Whisper model (realtime factor {stub_realtime_factor}) - transcripts are placeholders"
+            )
+        else:
+            self.backend = create_backend(backend, **(backend_options or {}))
+
+        self.whisper_available = self.backend is not None
+        if self.whisper_available:
+            logger.info(f"✅ Whisper backend available: {self.backend.name}")
+            self.backend.use_features(self.features)
             # Check which models are already downloaded
             self._check_downloaded_models()
-        except ImportError:
-            self.whisper = None
-            self.whisper_available = False
-            logger.warning("⚠️ Whisper library not available - install with: pip install openai-whisper")
+        else:
+            logger.warning("⚠️ No Whisper backend available - install with: pip install faster-whisper (or openai-whisper)")
 
     def _check_downloaded_models(self):
         """Check which models are already downloaded to avoid re-downloading"""
         if not self.whisper_available:
             return
 
-        import os
-
         try:
-            # Whisper stores models in ~/.cache/whisper/
-            whisper_cache = os.path.expanduser("~/.cache/whisper/")
-            if os.path.exists(whisper_cache):
-                for model_name in self.AVAILABLE_MODELS.keys():
-                    # Check for .pt files that match model names
-                    model_files = [f for f in os.listdir(whisper_cache) if f.startswith(model_name) and f.endswith(".pt")]
-                    if model_files:
-                        self.downloaded_models.add(model_name)
-                        logger.info(f"📦 Found downloaded model: {model_name}")
-
+            self.downloaded_models = self.backend.find_downloaded(self.AVAILABLE_MODELS)
+            for model_name in sorted(self.downloaded_models):
+                logger.info(f"📦 Found downloaded model: {model_name}")
             logger.info(f"📊 Downloaded models: {list(self.downloaded_models) if self.downloaded_models else 'None'}")
         except Exception as e:
             logger.warning(f"Could not check downloaded models: {e}")
@@ -149,8 +171,10 @@ class ModelManager:
                 self.model_loading = True
                 logger.info(f"Loading Whisper model: {model_name}")
 
-                # Load the model
-                self.current_model = self.whisper.load_model(model_name)
+                # Resident models are switched to instantly; others are loaded into the cache
+                if self.model_cache.get(model_name) is None:
+                    return False
+                self.model_cache.pin(model_name)
                 self.current_model_name = model_name
 
                 logger.info(f"Successfully loaded model: {model_name}")
@@ -162,10 +186,41 @@ class ModelManager:
             finally:
                 self.model_loading = False
 
+    def create_model_instance(self, model_name: str):
+        """Load an independent model instance (used by inference workers, does not touch current_model)"""
+        if not self.whisper_available:
+            logger.error("Whisper library not available")
+            return None
+
+        if model_name not in self.AVAILABLE_MODELS:
+            logger.error(f"Invalid model name: {model_name}")
+            return None
+
+        try:
+            return self.backend.load_model(model_name)
+        except Exception as e:
+            logger.error(f"Failed to load model instance {model_name}: {e}")
+            return None
+
+    @property
+    def current_model(self):
+        """The default model if it is resident (never triggers a load)"""
+        return self.model_cache.peek(self.current_model_name) if self.current_model_name else None
+
     def get_current_model(self):
         """Get the currently loaded model"""
         return self.current_model
 
+    def get_model_for(self, model_name: Optional[str] = None):
+        """A model by name (default: the current model), loading it into the cache if needed
+
+        Lets a request use another model without switching the global default
+        """
+        model_name = model_name or self.current_model_name
+        if not model_name or model_name not in self.AVAILABLE_MODELS:
+            return None
+        return self.model_cache.get(model_name)
+
     def get_current_model_name(self) -> str:
         """Get the name of the currently loaded model"""
         return self.current_model_name
@@ -182,20 +237,108 @@ class ModelManager:
         """Get information about a specific model"""
         return self.AVAILABLE_MODELS.get(model_name)
 
-    def transcribe(self, audio_path: str, **kwargs) -> Optional[Dict]:
-        """Transcribe audio using the current model"""
-        if not self.current_model:
-            logger.error("No model loaded")
+    def transcribe(self, audio, model_name: Optional[str] = None, **kwargs) -> Optional[Dict]:
+        """Transcribe audio (file path or 16 kHz float32 array) using the named or current model"""
+        model_name = model_name or self.current_model_name
+        model = self.get_model_for(model_name)
+        if model is None:
+            logger.error(f"Model {model_name} not loaded")
             return None
 
         try:
-            logger.info(f"Transcribing with model: {self.current_model_name}")
-            result = self.current_model.transcribe(audio_path, **kwargs)
+            logger.info(f"Transcribing with model: {model_name}")
+            result = model.transcribe(audio, **kwargs)
             return result
         except Exception as e:
             logger.error(f"Transcription failed: {e}")
             return None
 
+    def transcribe_batch(
+        self,
+        audios: List,
+        model=None,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        prompts: Optional[List[Optional[str]]] = None,
+        word_timestamps: bool = False,
+    ) -> List[Dict]:
+        """Decode several segments of up to 30 s with one batched encoder pass
+
+        Segments sharing a prompt also share the decoder pass; each segment is a single window, so
+        condition_on_previous_text has nothing to condition on and needs no handling.
+
+        Args:
+            audios: 16 kHz float32 arrays, one per request
+            model: model instance to use (an inference worker's own model); defaults to the current model
+            language: shared language for the batch, None detects it per segment
+            prompts: per-segment initial prompt (None for none)
+            word_timestamps: align words in each segment, as whisper.transcribe(word_timestamps=True)
+        """
+        from .batching import BATCH_SAMPLES, SAMPLE_RATE, segments_from_tokens
+        from .features import HOP_LENGTH
+
+        model = model or self.current_model
+        if model is None:
+            raise RuntimeError("No model loaded")
+        prompts = prompts or [None] * len(audios)
+        if not self.backend.supports_batching:
+            return [
+                model.transcribe(audio, language=language, task=task, initial_prompt=prompt, word_timestamps=word_timestamps)
+                for audio, prompt in zip(audios, prompts)
+            ]
+
+        import torch
+
+        whisper = self.backend.module
+        fp16 = model.device.type == "cuda"
+        # log-mel normalisation is per recording, so features are computed row by row over the 30 s window
+        features = []
+        for audio in audios:
+            # Slicing only when needed keeps the array streaming sessions provided features for
+            audio = audio[:BATCH_SAMPLES] if len(audio) > BATCH_SAMPLES else audio
+            features.append(self.features.log_mel(audio, model.dims.n_mels, padding=BATCH_SAMPLES - len(audio)))
+        mel = torch.from_numpy(np.stack(features)).to(model.device)
+        if fp16:
+            mel = mel.half()
+
+        with torch.no_grad():
+            audio_features = model.embed_audio(mel)
+
+        # whisper.decode skips the encoder when handed encoded features
+        decoded = [None] * len(audios)
+        by_prompt: Dict[Optional[str], List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            by_prompt.setdefault(prompt or None, []).append(index)
+        for prompt, indices in by_prompt.items():
+            options = whisper.DecodingOptions(language=language, task=task, fp16=fp16, prompt=prompt)
+            for index, result in zip(indices, whisper.decode(model, audio_features[indices], options)):
+                decoded[index] = result
+
+        results = []
+        for index, (audio, result) in enumerate(zip(audios, decoded)):
+            # Same silence heuristic as whisper.transcribe
+            if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                results.append({"text": "", "language": result.language, "segments": []})
+                continue
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual, num_languages=model.num_languages, language=result.language, task=task
+            )
+            duration = min(len(audio), BATCH_SAMPLES) / SAMPLE_RATE
+            segments = segments_from_tokens(result.tokens, tokenizer.timestamp_begin, tokenizer.decode, duration)
+            if word_timestamps and segments:
+                for segment in segments:
+                    segment["seek"] = 0
+                whisper.timing.add_word_timestamps(
+                    segments=segments,
+                    model=model,
+                    tokenizer=tokenizer,
+                    mel=mel[index],
+                    num_frames=min(len(audio), BATCH_SAMPLES) // HOP_LENGTH,
+                    last_speech_timestamp=0.0,
+                )
+            results.append({"text": result.text.strip(), "language": result.language, "segments": segments})
+        return results
+
     def get_model(self):
         """Get the current loaded model instance"""
         return self.current_model
@@ -205,9 +348,11 @@ class ModelManager:
         # This structure is more aligned with what admin-models.js expects for availableModels
         return {
             "whisper_available": self.whisper_available,
+            "backend": self.backend.get_status() if self.backend else None,
             "current_model_name": self.get_current_model_name(), # Changed from current_model to current_model_name for clarity
             "model_loaded": self.current_model is not None,
             "model_loading": self.model_loading,
+            "model_cache": self.model_cache.get_status(),
             "available_models_info": self.get_available_models(), # Provides full details
             "downloaded_model_ids": list(self.downloaded_models), # List of IDs
         }
@@ -216,6 +361,12 @@ class ModelManager:
         """Check if a specific model is downloaded"""
         return model_name in self.downloaded_models
 
+    def is_model_loadable(self, model_name: str) -> bool:
+        """A model a request may use: already resident, or downloaded so it loads without network access"""
+        return model_name in self.AVAILABLE_MODELS and (
+            self.model_cache.is_resident(model_name) or model_name in self.downloaded_models
+        )
+
     def get_download_status(self) -> Dict:
         """Get detailed download status for all models"""
         status = {}
@@ -227,12 +378,17 @@ class ModelManager:
             }
         return status
 
-    def _get_model_cache_dir(self):
-        """Gets the Whisper model cache directory."""
-        return os.path.join(os.path.expanduser("~"), ".cache", "whisper")
+    def get_model_size(self, model_id: str) -> int:
+        """Bytes a downloaded model takes on disk (0 if it is not downloaded)"""
+        if not self.whisper_available:
+            return 0
+        try:
+            return self.backend.model_size(model_id)
+        except OSError:
+            return 0
 
     def _perform_download(self, model_id: str):
-        """Performs the actual download of a model file."""
+        """Performs the actual download of a model through the backend."""
         if model_id not in self.AVAILABLE_MODELS:
             logger.error(f"Attempted to download unknown model: {model_id}")
             self.download_progress[model_id] = {
@@ -245,90 +401,33 @@ class ModelManager:
             }
             return
 
-        model_info = self.AVAILABLE_MODELS[model_id]
-        url = model_info["url"]
-        expected_sha256 = model_info["sha256"]
-
-        models_dir = self._get_model_cache_dir()
-        os.makedirs(models_dir, exist_ok=True)
-
-        # Use a temporary filename during download
-        base_filename = f"{model_id}.pt"
-        download_target_path = os.path.join(models_dir, base_filename)
-        temp_download_path = download_target_path + ".tmp"
-
-        self.download_progress[model_id] = {
+        progress = {
             "status": "downloading",
             "error_message": "",
             "progress": 0,
             "downloaded_size": 0,
-            "total_size": 0, # Will be updated once headers are received
+            "total_size": 0,  # Updated by the backend once it knows
             "cancel_requested": False,
         }
+        self.download_progress[model_id] = progress
 
         try:
-            logger.info(f"Starting download for model {model_id} from {url}")
-            response = requests.get(url, stream=True, timeout=30) # Increased timeout
-            response.raise_for_status()
-
-            total_size = int(response.headers.get('content-length', 0))
-            self.download_progress[model_id]["total_size"] = total_size
-            downloaded_size = 0
-
-            hasher = hashlib.sha256()
-
-            with open(temp_download_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if self.download_progress[model_id].get("cancel_requested", False):
-                        logger.info(f"Download cancelled for model {model_id}")
-                        self.download_progress[model_id]["status"] = "cancelled"
-                        if os.path.exists(temp_download_path):
-                            os.remove(temp_download_path)
-                        return
-
-                    f.write(chunk)
-                    hasher.update(chunk)
-                    downloaded_size += len(chunk)
-                    self.download_progress[model_id]["downloaded_size"] = downloaded_size
-                    if total_size > 0:
-                        self.download_progress[model_id]["progress"] = int((downloaded_size / total_size) * 100)
-
-            calculated_sha256 = hasher.hexdigest()
-            if calculated_sha256 != expected_sha256:
-                self.download_progress[model_id]["status"] = "failed"
-                self.download_progress[model_id]["error_message"] = f"SHA256 checksum mismatch. Expected {expected_sha256}, got {calculated_sha256}"
-                logger.error(self.download_progress[model_id]["error_message"])
-                if os.path.exists(temp_download_path):
-                    os.remove(temp_download_path)
-                return
-
-            # Download successful and checksum matches, move temp file to final destination
-            os.rename(temp_download_path, download_target_path)
-            self.download_progress[model_id]["status"] = "completed"
-            self.download_progress[model_id]["progress"] = 100
+            self.backend.fetch(model_id, self.AVAILABLE_MODELS[model_id], progress)
+            progress["status"] = "completed"
+            progress["progress"] = 100
             self.downloaded_models.add(model_id)
             logger.info(f"Model {model_id} downloaded and verified successfully.")
-
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Download failed for model {model_id}: {str(e)}"
-            logger.error(error_msg)
-            self.download_progress[model_id]["status"] = "failed"
-            self.download_progress[model_id]["error_message"] = str(e)
-            if os.path.exists(temp_download_path):
-                os.remove(temp_download_path)
+        except DownloadCancelled:
+            logger.info(f"Download cancelled for model {model_id}")
+            progress["status"] = "cancelled"
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Download failed for model {model_id}: {str(e)}")
+            progress["status"] = "failed"
+            progress["error_message"] = str(e)
         except Exception as e:
-            error_msg = f"An unexpected error occurred during download of {model_id}: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            self.download_progress[model_id]["status"] = "failed"
-            self.download_progress[model_id]["error_message"] = "An unexpected error occurred."
-            if os.path.exists(temp_download_path):
-                os.remove(temp_download_path)
-        finally:
-            # If download was successful, the entry in download_progress will be 'completed'.
-            # If failed or cancelled, it will reflect that.
-            # We might want to remove completed/failed entries after some time or leave them for history.
-            pass
-
+            logger.error(f"An unexpected error occurred during download of {model_id}: {str(e)}", exc_info=True)
+            progress["status"] = "failed"
+            progress["error_message"] = "An unexpected error occurred."
 
     def start_download_model(self, model_id: str) -> bool:
         """Initiates download of a model in a background thread."""
@@ -339,10 +438,11 @@ class ModelManager:
         if self.is_model_downloaded(model_id):
             logger.info(f"Model {model_id} is already downloaded.")
             # Optionally update progress to completed if it's not already reflected
+            size = self.get_model_size(model_id)
             self.download_progress[model_id] = {
                 "status": "completed", "progress": 100,
-                "downloaded_size": os.path.getsize(os.path.join(self._get_model_cache_dir(), f"{model_id}.pt")) if os.path.exists(os.path.join(self._get_model_cache_dir(), f"{model_id}.pt")) else 0,
-                "total_size": os.path.getsize(os.path.join(self._get_model_cache_dir(), f"{model_id}.pt")) if os.path.exists(os.path.join(self._get_model_cache_dir(), f"{model_id}.pt")) else 0,
+                "downloaded_size": size,
+                "total_size": size,
                 "error_message": "", "cancel_requested": False
             }
             return True
@@ -391,16 +491,8 @@ class ModelManager:
             # Consider if this should return True or False. True if "delete succeeded" means "it's not there".
             return True
 
-        model_cache_dir = self._get_model_cache_dir()
-        model_filename = f"{model_id}.pt" # Assuming .pt extension, align with _perform_download
-        model_path = os.path.join(model_cache_dir, model_filename)
-
         try:
-            if os.path.exists(model_path):
-                os.remove(model_path)
-                logger.info(f"Successfully deleted model file: {model_path}")
-            else:
-                logger.warning(f"Model file not found at {model_path}, though it was marked as downloaded.")
+            self.backend.delete(model_id)
 
             # Update internal state
             if model_id in self.downloaded_models:
@@ -415,14 +507,15 @@ class ModelManager:
 
 
             # If the deleted model was the current model, unload it
+            self.model_cache.evict(model_id)
             if self.current_model_name == model_id:
-                self.current_model = None
+                self.model_cache.pin(None)
                 self.current_model_name = None # Or set to a default like "base" if one must always be "current"
                 logger.info(f"Unloaded model {model_id} as it was deleted.")
 
             return True
         except OSError as e:
-            logger.error(f"Error deleting model file {model_path}: {e}")
+            logger.error(f"Error deleting model files for {model_id}: {e}")
             return False
         except Exception as e:
             logger.error(f"Unexpected error deleting model {model_id}: {e}")
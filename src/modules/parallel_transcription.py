@@ -0,0 +1,317 @@
+"""
+Parallel Transcription Module
+Long-file mode: a recording is split at silences and its pieces are transcribed side by side in worker processes
+Every worker process holds its own preloaded model; results are stitched back in order on the original timeline
+"""
+
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional
+
+import numpy as np
+import psutil
+
+from .audio_ingest import SAMPLE_RATE
+from .vad import Region, SpeechTimeline, remap_result
+
+logger = logging.getLogger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Interpreter, numpy and backend imports of one worker process, on top of its model
+WORKER_OVERHEAD_MB = 150
+# Shorter pieces waste most of Whisper's 30 s window and lose context at every cut
+MIN_PIECE_SECONDS = 30
+
+
+def plan_pieces(regions: List[Region], target_samples: int, max_samples: int) -> List[List[Region]]:
+    """Group speech regions into pieces of about target_samples of speech, cutting only between regions
+
+    Cuts fall in the silence between two regions; a region longer than max_samples has no silence
+    to cut in and is split hard
+    """
+    split = []
+    for start, end in regions:
+        while end - start > max_samples:
+            split.append((start, start + max_samples))
+            start += max_samples
+        split.append((start, end))
+
+    pieces, current, size = [], [], 0
+    for start, end in split:
+        if current and size + (end - start) > target_samples:
+            pieces.append(current)
+            current, size = [], 0
+        current.append((start, end))
+        size += end - start
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def stitch(results: List[Dict], pieces: List[List[Region]], language: Optional[str] = None) -> Dict:
+    """Merge piece results in order, mapping their timestamps back to the original recording"""
+    text, segments = [], []
+    for result, regions in zip(results, pieces):
+        remap_result(result, SpeechTimeline(regions))
+        for segment in result.get("segments") or []:
+            segments.append(dict(segment, id=len(segments)))
+        if result.get("text", "").strip():
+            text.append(result["text"].strip())
+            language = language or result.get("language")
+    return {"text": " ".join(text), "language": language or "unknown", "segments": segments}
+
+
+class WorkerProcess:
+    """A worker process with one preloaded model, and the parent's end of its socket"""
+
+    def __init__(self, index: int, model_name: str, backend_spec: Dict, threads: int):
+        self.index = index
+        self.model_name = model_name
+        parent_sock, child_sock = socket.socketpair()
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])),
+            OMP_NUM_THREADS=str(threads),
+            MKL_NUM_THREADS=str(threads),
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "modules.parallel_worker", str(child_sock.fileno())],
+            pass_fds=(child_sock.fileno(),),
+            env=env,
+            cwd=SRC_DIR,
+            stdin=subprocess.DEVNULL,
+        )
+        child_sock.close()
+        self.conn = Connection(parent_sock.detach())
+        self.conn.send({"backend": backend_spec, "model": model_name, "threads": threads})
+
+    def wait_ready(self, timeout: float):
+        reply = self._recv(timeout)
+        if "error" in reply:
+            raise RuntimeError(f"Worker {self.index}: {reply['error']}")
+
+    def transcribe(self, piece_id: int, audio: np.ndarray, options: Dict, timeout: float) -> Dict:
+        self.conn.send((piece_id, audio, options))
+        _, result, error = self._recv(timeout)
+        if error:
+            raise RuntimeError(f"Worker {self.index} failed on piece {piece_id}: {error}")
+        return result
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def _recv(self, timeout: float):
+        try:
+            if not self.conn.poll(timeout):
+                raise TimeoutError(f"Worker {self.index} did not answer within {timeout:.0f}s")
+            return self.conn.recv()
+        except EOFError:
+            raise RuntimeError(f"Worker {self.index} exited with code {self.process.poll()}")
+
+
+class ParallelTranscriber:
+    """Process pool for long recordings, sized by core count and a free-memory guard
+
+    One long file runs at a time and uses every worker; workers stay loaded between files and are
+    stopped after idle_timeout_seconds without work
+    """
+
+    def __init__(
+        self,
+        model_manager,
+        vad=None,
+        max_processes: int = 0,
+        min_duration_seconds: float = 600,
+        piece_seconds: float = 60,
+        memory_reserve_mb: float = 1024,
+        idle_timeout_seconds: float = 300,
+        piece_timeout_seconds: float = 600,
+    ):
+        """
+        Args:
+            model_manager: ModelManager whose backend and model size estimates the workers use
+            vad: VoiceActivityDetector that finds the silences to cut at (fixed-length cuts without it)
+            max_processes: upper bound on worker processes (0: one per CPU core)
+            min_duration_seconds: shorter recordings are transcribed in one piece as before
+            piece_seconds: longest stretch of speech per piece
+            memory_reserve_mb: RAM left free for the server and the inference pool when sizing the pool
+            idle_timeout_seconds: stop the workers (and free their models) after this long without work
+            piece_timeout_seconds: give up on a worker that takes longer than this for one piece
+        """
+        self.model_manager = model_manager
+        self.vad = vad
+        self.max_processes = int(max_processes)
+        self.min_duration_seconds = min_duration_seconds
+        self.piece_samples = int(piece_seconds * SAMPLE_RATE)
+        self.memory_reserve_mb = memory_reserve_mb
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.piece_timeout_seconds = piece_timeout_seconds
+
+        self._workers: List[WorkerProcess] = []
+        self._model_name = None
+        # One long file at a time: each one already occupies every worker
+        self._lock = threading.Lock()
+        self._idle_timer = None
+        self.stats = {"runs": 0, "pieces": 0, "worker_starts": 0, "failures": 0}
+
+    def process_limit(self) -> int:
+        return self.max_processes or os.cpu_count() or 1
+
+    def worker_budget(self, model_name: Optional[str] = None) -> int:
+        """Workers the memory guard allows: free RAM above the reserve divided by one worker's footprint"""
+        model_name = model_name or self.model_manager.get_current_model_name()
+        per_worker_mb = self.model_manager.model_cache.expected_mb(model_name) + WORKER_OVERHEAD_MB
+        available_mb = psutil.virtual_memory().available / (1024 * 1024) - self.memory_reserve_mb
+        # Workers already running this model are part of the memory in use
+        running = len(self._workers) if self._model_name == model_name else 0
+        return min(self.process_limit(), running + max(0, int(available_mb // per_worker_mb)))
+
+    def should_use(self, duration: float, model_name: Optional[str] = None) -> bool:
+        """Long enough to split, and room for at least two workers"""
+        return duration >= self.min_duration_seconds and self.worker_budget(model_name) >= 2
+
+    def transcribe(self, audio: np.ndarray, model_name: Optional[str] = None, **options) -> Dict:
+        """Transcribe a long 16 kHz recording across the worker processes"""
+        model_name = model_name or self.model_manager.get_current_model_name()
+        with self._lock:
+            self._cancel_idle_timer()
+            try:
+                regions = self.vad.speech_regions(audio) if self.vad is not None else [(0, len(audio))]
+                if not regions:
+                    logger.info("No speech detected, skipping inference")
+                    return {"text": "", "language": options.get("language", "unknown"), "segments": []}
+
+                workers = self._ensure_workers(model_name, self.worker_budget(model_name))
+                speech_samples = sum(end - start for start, end in regions)
+                # Enough pieces to keep every worker busy, none shorter than a Whisper window
+                target = min(self.piece_samples, max(MIN_PIECE_SECONDS * SAMPLE_RATE, speech_samples // len(workers)))
+                pieces = plan_pieces(regions, target, self.piece_samples)
+                logger.info(
+                    f"⚡ Long-file mode: {len(audio) / SAMPLE_RATE:.0f}s in {len(pieces)} pieces "
+                    f"on {len(workers)} {model_name} workers"
+                )
+                results = self._run(workers, audio, pieces, options)
+                self.stats["runs"] += 1
+                self.stats["pieces"] += len(pieces)
+            except Exception:
+                self.stats["failures"] += 1
+                self._stop_workers()
+                raise
+            finally:
+                self._arm_idle_timer()
+        return stitch(results, pieces, options.get("language"))
+
+    def shutdown(self):
+        with self._lock:
+            self._cancel_idle_timer()
+            self._stop_workers()
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": True,
+            "workers": len(self._workers),
+            "model": self._model_name,
+            "max_processes": self.process_limit(),
+            "min_duration_seconds": self.min_duration_seconds,
+            **self.stats,
+        }
+
+    def _ensure_workers(self, model_name: str, count: int) -> List[WorkerProcess]:
+        """Reuse the running workers if they hold this model, otherwise (re)start them"""
+        if count < 1:
+            raise RuntimeError("Not enough free memory for a transcription worker")
+        if self._model_name != model_name:
+            self._stop_workers()
+        if len(self._workers) >= count:
+            return self._workers
+
+        threads = max(1, (os.cpu_count() or 1) // count)
+        spec = self.model_manager.backend.spec()
+        if "cpu_threads" in spec:
+            spec["cpu_threads"] = threads
+        started = [WorkerProcess(len(self._workers) + i, model_name, spec, threads) for i in range(count - len(self._workers))]
+        try:
+            # The new workers load their models concurrently
+            for worker in started:
+                worker.wait_ready(self.piece_timeout_seconds)
+        except Exception:
+            for worker in started:
+                worker.stop()
+            raise
+        self._workers.extend(started)
+        self._model_name = model_name
+        self.stats["worker_starts"] += len(started)
+        logger.info(f"✅ Started {len(started)} transcription worker processes ({model_name}, {threads} threads each)")
+        return self._workers
+
+    def _run(self, workers: List[WorkerProcess], audio: np.ndarray, pieces: List[List[Region]], options: Dict):
+        """Hand pieces to whichever worker is free; returns results in piece order"""
+        pending = queue.Queue()
+        for index in range(len(pieces)):
+            pending.put(index)
+        results: List[Optional[Dict]] = [None] * len(pieces)
+        errors = []
+
+        def drive(worker: WorkerProcess):
+            while not errors:
+                try:
+                    index = pending.get_nowait()
+                except queue.Empty:
+                    return
+                piece = np.concatenate([audio[start:end] for start, end in pieces[index]])
+                try:
+                    results[index] = worker.transcribe(index, piece, options, self.piece_timeout_seconds)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [
+            threading.Thread(target=drive, args=(worker,), name=f"parallel-transcribe-{worker.index}") for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def _stop_workers(self):
+        for worker in self._workers:
+            worker.stop()
+        if self._workers:
+            logger.info(f"Stopped {len(self._workers)} transcription worker processes")
+        self._workers = []
+        self._model_name = None
+
+    def _arm_idle_timer(self):
+        self._idle_timer = threading.Timer(self.idle_timeout_seconds, self._stop_if_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _stop_if_idle(self):
+        # A file that started in the meantime re-arms the timer when it finishes
+        if self._lock.acquire(blocking=False):
+            try:
+                self._stop_workers()
+            finally:
+                self._lock.release()
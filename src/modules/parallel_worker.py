@@ -0,0 +1,47 @@
+"""
+Parallel Transcription Worker
+Child process of ParallelTranscriber: loads one model, then transcribes the audio pieces sent over its socket
+Started as `python -m modules.parallel_worker <fd>` so it never re-imports the server's main module
+"""
+
+import sys
+from multiprocessing.connection import Connection
+
+
+def main(fd: int) -> int:
+    conn = Connection(fd)
+    config = conn.recv()
+
+    try:
+        import torch
+
+        torch.set_num_threads(config["threads"])
+    except ImportError:
+        pass
+
+    try:
+        from .whisper_backends import backend_from_spec
+
+        model = backend_from_spec(config["backend"]).load_model(config["model"])
+    except Exception as e:
+        conn.send({"error": f"Could not load model {config['model']}: {e}"})
+        return 1
+    conn.send({"ready": True})
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        piece_id, audio, options = message
+        try:
+            conn.send((piece_id, model.transcribe(audio, **options), None))
+        except Exception as e:
+            conn.send((piece_id, None, str(e)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1])))
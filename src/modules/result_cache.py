@@ -0,0 +1,137 @@
+"""
+Result Cache Module
+Content-addressed cache of finished transcriptions, so re-uploaded audio is answered without inference
+Keys hash the decoded PCM together with the model, backend and decoding options; entries live in SQLite
+and are evicted by age and, least recently used first, by total size
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .metrics import RESULT_CACHE_LOOKUPS
+from .sqlite_pool import SQLiteConnectionManager
+
+logger = logging.getLogger(__name__)
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS result_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    result TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+_CREATE_INDEX = "CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache(last_used_at)"
+
+
+class ResultCache:
+    """SQLite-backed transcription results keyed by audio content and decoding settings"""
+
+    def __init__(self, db_path: str, max_mb: float = 256, max_age_hours: float = 720):
+        """
+        Args:
+            db_path: SQLite database file for the cache table
+            max_mb: total size of stored results before the least recently used are evicted
+            max_age_hours: entries older than this are never returned and are purged on the next store
+        """
+        self.db = SQLiteConnectionManager(db_path)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_hours * 3600
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "stored": 0, "evictions": 0}
+        with self.db.write() as conn:
+            conn.execute(_CREATE_TABLE)
+            conn.execute(_CREATE_INDEX)
+
+    @staticmethod
+    def key(audio: np.ndarray, settings: Dict) -> str:
+        """Cache key for decoded 16 kHz audio and everything that changes its transcript"""
+        digest = hashlib.blake2b(digest_size=32)
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The cached result, or None on a miss (expired entries are misses)"""
+        now = time.time()
+        with self.db.read() as conn:
+            row = conn.execute(
+                "SELECT result FROM result_cache WHERE key = ? AND created_at >= ?", (key, now - self.max_age_seconds)
+            ).fetchone()
+        if row is None:
+            self._count("misses", "miss")
+            return None
+
+        with self.db.write() as conn:
+            conn.execute("UPDATE result_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._count("hits", "hit")
+        return json.loads(row["result"])
+
+    def record_bypass(self):
+        """Count a request that asked not to be served from the cache"""
+        self._count("bypassed", "bypass")
+
+    def put(self, key: str, model: str, result: Dict):
+        """Store a result, then evict expired and least recently used entries beyond the size limit"""
+        payload = json.dumps(result)
+        now = time.time()
+        with self.db.write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, model, result, size_bytes, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, payload, len(payload), now, now),
+            )
+        with self._stats_lock:
+            self.stats["stored"] += 1
+        self._evict(now)
+
+    def clear(self):
+        with self.db.write() as conn:
+            conn.execute("DELETE FROM result_cache")
+
+    def get_status(self) -> Dict:
+        with self.db.read() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM result_cache").fetchone()
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "enabled": True,
+            "entries": entries,
+            "size_mb": round(size / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else None,
+            **stats,
+        }
+
+    def _count(self, stat: str, result: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+        RESULT_CACHE_LOOKUPS.inc(result=result)
+
+    def _evict(self, now: float):
+        with self.db.write() as conn:
+            evicted = conn.execute("DELETE FROM result_cache WHERE created_at < ?", (now - self.max_age_seconds,)).rowcount
+            excess = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM result_cache").fetchone()[0] - self.max_bytes
+            if excess > 0:
+                victims = []
+                for row in conn.execute("SELECT key, size_bytes FROM result_cache ORDER BY last_used_at"):
+                    if excess <= 0:
+                        break
+                    victims.append((row["key"],))
+                    excess -= row["size_bytes"]
+                conn.executemany("DELETE FROM result_cache WHERE key = ?", victims)
+                evicted += len(victims)
+        if evicted:
+            with self._stats_lock:
+                self.stats["evictions"] += evicted
+            logger.info(f"♻️ Evicted {evicted} cached transcription results")
@@ -0,0 +1,152 @@
+"""
+Serving Module
+Production serving for the appliance: Werkzeug threads by default, the gevent WSGI server when configured
+On gevent every WebSocket connection is a greenlet, so thousands of idle clients cost almost nothing; model
+inference is offloaded to native threads so it never stalls them. SIGTERM drains in-flight work before exit.
+"""
+
+import _thread
+import logging
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def gevent_active() -> bool:
+    """Whether the standard library was monkey-patched by gevent (the server runs in gevent mode)"""
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def offload(fn: Callable, *args, **kwargs):
+    """Run CPU-bound work on a native OS thread when serving on gevent, directly otherwise
+
+    Under gevent, "threads" are greenlets sharing one OS thread: a model call made on one would block every
+    connection until it returns. The hub's thread pool runs it on a real thread while the greenlet waits.
+    """
+    if not gevent_active():
+        return fn(*args, **kwargs)
+
+    import gevent
+
+    return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+
+
+def server_options(async_mode: str, ssl_cert: str = None, ssl_key: str = None) -> Dict:
+    """socketio.run() keyword arguments for the selected server"""
+    if async_mode == "gevent":
+        options = {"log_output": False}
+        if ssl_cert and ssl_key:
+            options.update(certfile=ssl_cert, keyfile=ssl_key)
+        return options
+    options = {"allow_unsafe_werkzeug": True}
+    if ssl_cert and ssl_key:
+        options["ssl_context"] = (ssl_cert, ssl_key)
+    return options
+
+
+def stop_server(socketio, timeout: float = 5.0):
+    """Make socketio.run() return in the main thread"""
+    if socketio.server.eio.async_mode == "gevent":
+        # Stops accepting, then waits for the open requests
+        socketio.wsgi_server.stop(timeout=timeout)
+    else:
+        # Werkzeug's serve_forever() ends on KeyboardInterrupt, which a simulated SIGINT raises in the main thread
+        _thread.interrupt_main()
+
+
+class GracefulShutdown:
+    """Drains in-flight work when the process is asked to stop
+
+    Once draining, new requests are turned away (the health check reports it so load balancers stop routing);
+    the registered drain steps run in order with whatever is left of one shared deadline.
+    """
+
+    def __init__(self, timeout_seconds: float = 60):
+        """
+        Args:
+            timeout_seconds: total time the drain steps and open requests may take
+        """
+        self.timeout_seconds = timeout_seconds
+        self.draining = False
+        self._steps: List[Tuple[str, Callable[[float], None]]] = []
+        self._active_requests = 0
+        self._idle = threading.Condition()
+        self._stopped = threading.Event()
+
+    def add(self, name: str, drain: Callable[[float], None]):
+        """Register a drain step; it receives the seconds left before the deadline"""
+        self._steps.append((name, drain))
+
+    def request_started(self):
+        with self._idle:
+            self._active_requests += 1
+
+    def request_finished(self):
+        with self._idle:
+            self._active_requests -= 1
+            self._idle.notify_all()
+
+    def wait_for_requests(self, timeout: float) -> bool:
+        """Wait until no request is being handled (usable as a drain step)"""
+        with self._idle:
+            if self._idle.wait_for(lambda: self._active_requests <= 0, timeout=max(0.0, timeout)):
+                return True
+        logger.warning("⚠️ Drain deadline reached with requests still open")
+        return False
+
+    def drain(self):
+        """Stop taking work and run the drain steps; safe to call more than once"""
+        if self.draining:
+            self._stopped.wait()
+            return
+        self.draining = True
+        started = time.monotonic()
+        deadline = started + self.timeout_seconds
+        logger.info(f"🛑 Draining in-flight work (up to {self.timeout_seconds:.0f}s)...")
+
+        for name, step in self._steps:
+            try:
+                step(max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                logger.error(f"❌ Drain step {name} failed: {e}")
+
+        logger.info(f"✅ Drained in {time.monotonic() - started:.1f}s")
+        self._stopped.set()
+
+    def install(self, on_drained: Callable[[], None]):
+        """Drain on SIGTERM/SIGINT, then call on_drained (stops the server); a second signal exits at once"""
+
+        def run():
+            self.drain()
+            on_drained()
+
+        signalled = threading.Event()
+
+        def handle(signum, frame=None):
+            if self._stopped.is_set():
+                raise KeyboardInterrupt  # stop_server() after the drain
+            if signalled.is_set():
+                logger.warning("⚠️ Second stop signal - exiting without waiting for the drain")
+                raise SystemExit(1)
+            signalled.set()
+            threading.Thread(target=run, name="graceful-shutdown", daemon=True).start()
+
+        if gevent_active():
+            import gevent
+
+            # Signal handlers must not run inside the hub; gevent calls these from a greenlet
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                gevent.signal_handler(signum, handle, signum)
+        else:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, handle)
+
+    def get_status(self) -> Dict:
+        with self._idle:
+            active = self._active_requests
+        return {"draining": self.draining, "active_requests": active, "timeout_seconds": self.timeout_seconds}
@@ -0,0 +1,179 @@
+"""
+SQLite Connection Manager
+A bounded pool of shared SQLite connections in WAL mode with tuned pragmas
+Connections are opened once and checked out per use, whichever thread or greenlet serves the request;
+readers never wait on writers, and writes go through one dedicated connection, serialized in-process
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteConnectionManager:
+    """Bounded connection pool for a single SQLite database file"""
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 8,
+        cache_size_kb: int = 20000,
+        mmap_size: int = 256 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+        cached_statements: int = 256,
+        checkout_timeout: float = 30.0,
+    ):
+        """
+        Args:
+            db_path: database file path
+            pool_size: reader connections shared by all threads (opened on demand up to this many)
+            cache_size_kb: page cache per connection in KiB
+            mmap_size: bytes of the database file memory-mapped for reads
+            busy_timeout_ms: how long to wait on locks held by other processes
+            cached_statements: prepared statements kept per connection
+            checkout_timeout: how long read() waits for a free connection when all are in use
+        """
+        self.db_path = db_path
+        self.pool_size = max(1, int(pool_size))
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.checkout_timeout = checkout_timeout
+
+        # LIFO hands out the most recently used connection, whose page cache is warm
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._generation = 0
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+
+        # WAL is a persistent property of the database file - switch once up front
+        # (outside a transaction, where journal_mode cannot change)
+        with self._write_lock:
+            self.journal_mode = self._writer_connection().execute("PRAGMA journal_mode=WAL").fetchone()[0].lower()
+        if self.journal_mode != "wal":
+            logger.warning(f"⚠️ SQLite WAL mode unavailable for {db_path}, using journal_mode={self.journal_mode}")
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Pooled connection for queries - no locking, WAL readers see the last committed snapshot"""
+        conn, generation = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn, generation)
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Writer connection inside a write transaction, committed on success and rolled back on error"""
+        with self._write_lock:
+            conn = self._writer_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+
+    def close_all(self):
+        """Close the idle connections now and the checked-out ones when they are returned; later use reconnects"""
+        with self._pool_lock:
+            self._generation += 1
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+                self._close(conn)
+        with self._write_lock:
+            if self._writer is not None:
+                self._close(self._writer)
+                self._writer = None
+
+    def get_status(self) -> Dict:
+        with self._pool_lock:
+            opened = self._opened
+        return {
+            "db_path": self.db_path,
+            "pool_size": self.pool_size,
+            "open_connections": opened + (self._writer is not None),
+            "idle_connections": self._idle.qsize(),
+            "journal_mode": self.journal_mode,
+        }
+
+    def _checkout(self):
+        with self._pool_lock:
+            generation = self._generation
+            try:
+                return self._idle.get_nowait(), generation
+            except queue.Empty:
+                pass
+            if self._opened < self.pool_size:
+                self._opened += 1
+                opening = True
+            else:
+                opening = False
+
+        if opening:
+            try:
+                return self._connect(), generation
+            except BaseException:
+                with self._pool_lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.checkout_timeout), generation
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"No free SQLite connection for {self.db_path} after {self.checkout_timeout:.0f}s ({self.pool_size} in use)"
+            )
+
+    def _checkin(self, conn: sqlite3.Connection, generation: int):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._pool_lock:
+            if generation == self._generation:
+                self._idle.put(conn)
+                return
+            self._opened -= 1
+        self._close(conn)
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        # Called with the write lock held
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly by write()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    @staticmethod
+    def _close(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.debug(f"Error closing SQLite connection: {e}")
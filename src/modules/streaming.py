@@ -0,0 +1,369 @@
+"""
+Streaming Transcription Module
+Per-session rolling audio buffer with incremental decoding for live speech
+Stable text is committed with a local-agreement policy across successive decoding passes
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .audio_ingest import SAMPLE_RATE
+from .features import HOP_LENGTH, IncrementalLogMel
+
+logger = logging.getLogger(__name__)
+
+# Words ending this close to the commit point are treated as already committed
+_COMMIT_TOLERANCE = 0.1
+# Longest committed n-gram checked when a new pass repeats words across the commit point
+_MAX_OVERLAP_WORDS = 5
+# Characters of committed text passed back to the model as context
+_PROMPT_CHARS = 200
+
+
+@dataclass
+class Word:
+    """A single transcribed word with absolute start/end times in seconds"""
+
+    start: float
+    end: float
+    text: str
+
+    @property
+    def key(self) -> str:
+        return re.sub(r"[^\w']", "", self.text.lower())
+
+
+class RingBuffer:
+    """Fixed-capacity float32 sample buffer addressed by absolute sample positions"""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._capacity = capacity
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def start(self) -> int:
+        """Absolute position of the oldest retained sample"""
+        return self._start
+
+    @property
+    def end(self) -> int:
+        """Absolute position one past the newest sample"""
+        return self._end
+
+    def append(self, samples) -> int:
+        """Append samples, returning how many of the oldest samples were overwritten"""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        count = len(samples)
+        if count == 0:
+            return 0
+
+        if count > self._capacity:
+            samples = samples[-self._capacity :]
+        write_from = self._end + count - len(samples)
+
+        pos = write_from % self._capacity
+        first = min(len(samples), self._capacity - pos)
+        self._data[pos : pos + first] = samples[:first]
+        self._data[: len(samples) - first] = samples[first:]
+
+        self._end += count
+        dropped = max(0, self._end - self._start - self._capacity)
+        self._start += dropped
+        return dropped
+
+    def read(self, start: Optional[int] = None) -> np.ndarray:
+        """Copy retained samples from an absolute position (default: oldest) to the end"""
+        start = self._start if start is None else min(max(start, self._start), self._end)
+        length = self._end - start
+        pos = start % self._capacity
+        if pos + length <= self._capacity:
+            return self._data[pos : pos + length].copy()
+        return np.concatenate((self._data[pos:], self._data[: length - (self._capacity - pos)]))
+
+    def discard_until(self, position: int):
+        """Drop samples before an absolute position"""
+        self._start = min(max(position, self._start), self._end)
+
+
+class LocalAgreement:
+    """LocalAgreement-2: commit the word prefix two consecutive hypotheses agree on"""
+
+    def __init__(self):
+        self.committed: List[Word] = []
+        self.pending: List[Word] = []
+
+    @property
+    def committed_until(self) -> float:
+        return self.committed[-1].end if self.committed else 0.0
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        """Merge a new hypothesis and return the words that became committed"""
+        words = self._strip_committed(words)
+
+        agreed = 0
+        for previous, current in zip(self.pending, words):
+            if previous.key != current.key:
+                break
+            agreed += 1
+
+        newly_committed = words[:agreed]
+        self.committed.extend(newly_committed)
+        self.pending = words[agreed:]
+        return newly_committed
+
+    def commit_before(self, seconds: float) -> List[Word]:
+        """Force-commit pending words that end before a point no longer in the audio window"""
+        forced = [word for word in self.pending if word.end <= seconds]
+        if forced:
+            self.committed.extend(forced)
+            self.pending = self.pending[len(forced) :]
+        return forced
+
+    def flush(self) -> List[Word]:
+        """Commit whatever is still pending (end of stream)"""
+        flushed, self.pending = self.pending, []
+        self.committed.extend(flushed)
+        return flushed
+
+    def prompt(self, before: float) -> str:
+        """Committed text that precedes the current audio window, used as decoding context"""
+        text = "".join(word.text for word in self.committed if word.end <= before)
+        return text[-_PROMPT_CHARS:].strip()
+
+    def _strip_committed(self, words: List[Word]) -> List[Word]:
+        limit = self.committed_until - _COMMIT_TOLERANCE
+        words = [word for word in words if word.end > limit]
+
+        # A pass starting inside committed audio can repeat the last committed words
+        if self.committed and words:
+            tail = [word.key for word in self.committed[-_MAX_OVERLAP_WORDS:]]
+            for size in range(min(len(tail), len(words)), 0, -1):
+                if tail[-size:] == [word.key for word in words[:size]]:
+                    return words[size:]
+        return words
+
+
+class StreamingSession:
+    """Streaming state for a single live recording"""
+
+    def __init__(self, session_id, capacity: int, language=None, model_name=None):
+        self.session_id = session_id
+        self.language = language
+        self.model_name = model_name
+        self.buffer = RingBuffer(capacity)
+        self.agreement = LocalAgreement()
+        self.features = IncrementalLogMel()
+        self.detected_language = None
+        self.decoded_until = 0
+        self.passes = 0
+        self.started_at = time.time()
+        # Guards the buffer; decode_lock keeps a single decoding pass in flight per session
+        self.lock = threading.Lock()
+        self.decode_lock = threading.Lock()
+
+    @property
+    def committed_text(self) -> str:
+        return "".join(word.text for word in self.agreement.committed).strip()
+
+    @property
+    def pending_text(self) -> str:
+        return "".join(word.text for word in self.agreement.pending).strip()
+
+
+class StreamingEngine:
+    """Per-client streaming sessions decoded over a sliding window"""
+
+    def __init__(
+        self,
+        transcribe: Callable,
+        sample_rate: int = SAMPLE_RATE,
+        window_seconds: float = 30.0,
+        min_chunk_seconds: float = 1.0,
+        trim_seconds: float = 15.0,
+        features=None,
+    ):
+        """
+        Args:
+            transcribe: callable(audio, model_name=None, **options) returning a Whisper result dict
+            window_seconds: maximum audio kept for a decoding pass (Whisper's context is 30s)
+            min_chunk_seconds: new audio required before another decoding pass runs
+            trim_seconds: window length after which committed audio is dropped
+            features: FeatureExtractor that serves each pass the session's incrementally computed log-mel
+        """
+        self._transcribe = transcribe
+        self.features = features
+        self.sample_rate = sample_rate
+        self.capacity = int(window_seconds * sample_rate)
+        self.min_chunk_samples = int(min_chunk_seconds * sample_rate)
+        self.trim_samples = int(trim_seconds * sample_rate)
+        self._sessions: Dict[str, StreamingSession] = {}
+        self._lock = threading.Lock()
+        self._stats = {"sessions_started": 0, "sessions_finished": 0, "passes": 0}
+
+    def start_session(self, session_id, language=None, model_name=None) -> StreamingSession:
+        """Create (or restart) the streaming session for a client"""
+        if language == "auto":
+            language = None
+        session = StreamingSession(session_id, self.capacity, language, model_name)
+        with self._lock:
+            self._sessions[session_id] = session
+            self._stats["sessions_started"] += 1
+        logger.info(f"Streaming session started: {session_id}")
+        return session
+
+    def has_session(self, session_id) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def session_model(self, session_id) -> Optional[str]:
+        """Model the client chose for its session (None: the current model)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        return session.model_name if session is not None else None
+
+    def feed(self, session_id, audio: np.ndarray) -> Optional[Dict]:
+        """Append audio to a session and run a decoding pass when enough new audio arrived
+
+        Returns a partial update dict, or None if no pass ran
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        with session.lock:
+            dropped = session.buffer.append(audio)
+            if dropped:
+                session.agreement.commit_before(session.buffer.start / self.sample_rate)
+            ready = session.buffer.end - session.decoded_until >= self.min_chunk_samples
+
+        # Chunks arriving while a pass is running just accumulate for the next one
+        if not ready or not session.decode_lock.acquire(blocking=False):
+            return None
+        try:
+            newly_committed = self._decode(session)
+        finally:
+            session.decode_lock.release()
+
+        return {
+            "session_id": session_id,
+            "committed": session.committed_text,
+            "pending": session.pending_text,
+            "new_text": "".join(word.text for word in newly_committed).strip(),
+            "text": " ".join(filter(None, (session.committed_text, session.pending_text))),
+            "language": session.detected_language or session.language or "unknown",
+        }
+
+    def finish(self, session_id) -> Optional[Dict]:
+        """Flush and close a session, returning the final transcript (None if no session)"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return None
+
+        with session.decode_lock:
+            if session.buffer.end > session.decoded_until:
+                try:
+                    self._decode(session)
+                except Exception as e:
+                    logger.warning(f"Final streaming pass failed for {session_id}, keeping partial text: {e}")
+            session.agreement.flush()
+
+        with self._lock:
+            self._stats["sessions_finished"] += 1
+        logger.info(f"Streaming session finished: {session_id} ({session.passes} passes)")
+
+        return {
+            "session_id": session_id,
+            "text": session.committed_text,
+            "language": session.detected_language or session.language or "unknown",
+            "duration": session.buffer.end / self.sample_rate,
+            "passes": session.passes,
+            "model_name": session.model_name,
+        }
+
+    def discard(self, session_id):
+        """Drop a session without a final pass (client disconnected)"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {"active_sessions": len(self._sessions), **self._stats}
+
+    def _decode(self, session: StreamingSession) -> List[Word]:
+        """Run one decoding pass over the current window and update the agreement state"""
+        with session.lock:
+            # Windows start on a feature frame boundary, so the STFT frames of earlier passes line up
+            window_start = -(-session.buffer.start // HOP_LENGTH) * HOP_LENGTH
+            window_end = session.buffer.end
+            audio = session.buffer.read(window_start)
+
+        offset = window_start / self.sample_rate
+        options = {"fp16": False, "word_timestamps": True, "condition_on_previous_text": False}
+        if session.language:
+            options["language"] = session.language
+        prompt = session.agreement.prompt(offset)
+        if prompt:
+            options["initial_prompt"] = prompt
+
+        if self.features is not None:
+            self.features.provide(audio, partial(session.features.window, audio, window_start))
+        result = self._transcribe(audio, model_name=session.model_name, **options)
+
+        session.passes += 1
+        session.decoded_until = window_end
+        session.detected_language = result.get("language") or session.detected_language
+        with self._lock:
+            self._stats["passes"] += 1
+
+        newly_committed = session.agreement.insert(result_words(result, offset, len(audio) / self.sample_rate))
+
+        # Drop committed audio once the window grows long, so it is never decoded again
+        if window_end - window_start > self.trim_samples and session.agreement.committed_until > offset:
+            with session.lock:
+                position = int(session.agreement.committed_until * self.sample_rate)
+                session.buffer.discard_until(position - position % HOP_LENGTH)
+
+        return newly_committed
+
+
+def result_words(result: Dict, offset: float = 0.0, duration: float = 0.0) -> List[Word]:
+    """Flatten a Whisper result into absolute-time words
+
+    Uses word timestamps when present, otherwise spreads segment text evenly over the segment
+    """
+    segments = result.get("segments") or []
+    if not segments and result.get("text"):
+        segments = [{"start": 0.0, "end": duration, "text": result["text"]}]
+
+    words = []
+    for segment in segments:
+        if segment.get("words"):
+            for word in segment["words"]:
+                words.append(Word(offset + word["start"], offset + word["end"], word["word"]))
+            continue
+
+        tokens = re.findall(r"\s*\S+", segment.get("text", ""))
+        if not tokens:
+            continue
+        start, end = float(segment.get("start", 0.0)), float(segment.get("end", duration))
+        step = (end - start) / len(tokens)
+        for i, token in enumerate(tokens):
+            words.append(Word(offset + start + i * step, offset + start + (i + 1) * step, token))
+
+    return words
@@ -0,0 +1,39 @@
+"""
+Stub Whisper Model
+Stands in for a Whisper model when load testing the appliance without a model, GPU or network
+Loaded through whisper_backends.StubBackend
+Transcription sleeps for audio duration x realtime factor and returns placeholder words
+"""
+
+import time
+from typing import Dict
+
+from .audio_ingest import SAMPLE_RATE
+
+# One placeholder word per this many seconds of audio
+_SECONDS_PER_WORD = 0.4
+
+
+class StubWhisperModel:
+    """Answers model.transcribe() like openai-whisper, with a fixed realtime factor"""
+
+    def __init__(self, name: str, realtime_factor: float = 0.05):
+        self.name = name
+        self.realtime_factor = realtime_factor
+
+    def transcribe(self, audio, language=None, **options) -> Dict:
+        duration = len(audio) / SAMPLE_RATE
+        time.sleep(duration * self.realtime_factor)
+
+        segments = []
+        if duration > 0:
+            count = max(1, int(duration / _SECONDS_PER_WORD))
+            step = duration / count
+            words = [{"start": i * step, "end": (i + 1) * step, "word": f" w{i}"} for i in range(count)]
+            segments.append({"start": 0.0, "end": duration, "text": "".join(w["word"] for w in words), "words": words})
+
+        return {
+            "text": "".join(segment["text"] for segment in segments).strip(),
+            "language": language or "en",
+            "segments": segments,
+        }
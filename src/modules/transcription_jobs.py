@@ -0,0 +1,416 @@
+"""
+Transcription Jobs Module
+Background transcription of long uploads: submit returns a job id at once, a worker transcribes the file
+Jobs and their spooled audio are persisted in SQLite so queued and interrupted jobs resume after a restart
+"""
+
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .audio_ingest import SAMPLE_RATE, audio_duration, decode_stream
+from .inference_pool import InferenceQueueFull
+from .metrics import DECODE_SECONDS, count_failed_request, observe_transcription
+from .parallel_transcription import plan_pieces, stitch
+from .sqlite_pool import SQLiteConnectionManager
+from .transcription_options import TranscriptionOptions
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+RESULT_FORMATS = {"json": "application/json", "srt": "application/x-subrip", "vtt": "text/vtt"}
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS transcription_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    audio_path TEXT,
+    options TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    duration REAL,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+_CREATE_INDEX = "CREATE INDEX IF NOT EXISTS idx_transcription_jobs_status ON transcription_jobs(status, created_at)"
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled"""
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def to_srt(segments: List[Dict]) -> str:
+    """SubRip subtitles, one cue per segment"""
+    cues = []
+    for index, segment in enumerate(segments, start=1):
+        cues.append(
+            f"{index}\n{_timestamp(segment['start'], ',')} --> {_timestamp(segment['end'], ',')}\n"
+            f"{segment['text'].strip()}\n"
+        )
+    return "\n".join(cues)
+
+
+def to_vtt(segments: List[Dict]) -> str:
+    """WebVTT subtitles, one cue per segment"""
+    cues = [
+        f"{_timestamp(segment['start'], '.')} --> {_timestamp(segment['end'], '.')}\n{segment['text'].strip()}\n"
+        for segment in segments
+    ]
+    return "\n".join(["WEBVTT\n"] + cues)
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+class TranscriptionJobManager:
+    """Persistent job queue worked by a few threads that feed the inference pool chunk by chunk
+
+    Chunking gives jobs their progress and cancellation points, and keeps a long file from holding an
+    inference worker for its whole duration - live requests interleave with the job's chunks
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        transcribe: Callable[..., Dict],
+        spool_dir: str = None,
+        workers: int = 1,
+        chunk_seconds: float = 120,
+        retention_hours: float = 168,
+        vad=None,
+        chat_history=None,
+        on_update: Callable[[Dict], None] = None,
+    ):
+        """
+        Args:
+            db_path: SQLite database file for the job table
+            transcribe: callable(audio, model_name=None, **options) -> result dict (inference pool or model manager)
+            spool_dir: where uploads wait until their job has run (default: next to the database)
+            workers: jobs transcribed at the same time
+            chunk_seconds: most speech per inference call; with a VAD chunks end in silences.
+                Progress is reported after each chunk
+            retention_hours: finished jobs older than this are deleted at startup
+            vad: VoiceActivityDetector that drops silence before transcription
+            chat_history: ChatHistoryManager that records finished jobs like uploads
+            on_update: called with the job dict whenever its status or progress changes
+        """
+        self.db = SQLiteConnectionManager(db_path)
+        self.transcribe = transcribe
+        self.spool_dir = spool_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), "job_audio")
+        self.worker_count = max(1, int(workers))
+        self.chunk_samples = max(1, int(chunk_seconds * SAMPLE_RATE))
+        self.retention_seconds = retention_hours * 3600
+        self.vad = vad
+        self.chat_history = chat_history
+        self.on_update = on_update
+
+        self._queue = queue.Queue()
+        self._threads = []
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._running = False
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with self.db.write() as conn:
+            conn.execute(_CREATE_TABLE)
+            conn.execute(_CREATE_INDEX)
+
+    def start(self):
+        """Purge expired jobs, re-queue unfinished ones and start the workers"""
+        if self._running:
+            return
+        self._running = True
+        self._purge_expired()
+        recovered = self._recover()
+
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._worker_loop, name=f"transcription-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"✅ Transcription jobs started: {self.worker_count} workers, {recovered} jobs resumed")
+
+    def shutdown(self, wait: bool = False, timeout: Optional[float] = None):
+        """Stop the workers; a job interrupted mid-run is resumed from the start on the next start()
+
+        Args:
+            wait: let the running jobs finish; jobs still queued stay queued for the next start()
+            timeout: with wait, stop waiting after this many seconds
+        """
+        if not self._running:
+            return
+        self._running = False
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in self._threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if any(thread.is_alive() for thread in self._threads):
+                logger.warning("⚠️ Stopped waiting for running transcription jobs - they resume on the next start")
+                return
+        self._threads = []
+        self.db.close_all()
+
+    def submit(self, stream: BinaryIO, filename: str, options: TranscriptionOptions) -> Dict:
+        """Spool an upload to disk and queue it; returns the new job"""
+        job_id = uuid.uuid4().hex
+        audio_path = os.path.join(self.spool_dir, job_id)
+        with open(audio_path, "wb") as spool:
+            shutil.copyfileobj(stream, spool)
+
+        with self.db.write() as conn:
+            conn.execute(
+                "INSERT INTO transcription_jobs (id, status, filename, audio_path, options, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, filename, audio_path, json.dumps(options.to_dict()), time.time()),
+            )
+        logger.info(f"Queued transcription job {job_id} ({filename}, {os.path.getsize(audio_path)} bytes)")
+        # Announce the queued state before a worker can pick the job up
+        job = self._notify(job_id)
+        self._queue.put(job_id)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        row = self._row(job_id)
+        return self._to_dict(row) if row else None
+
+    def get_result(self, job_id: str) -> Optional[Dict]:
+        """Transcription result of a completed job (text, language, segments)"""
+        row = self._row(job_id)
+        return json.loads(row["result"]) if row and row["result"] else None
+
+    def list_jobs(self, limit: int = 50) -> List[Dict]:
+        with self.db.read() as conn:
+            rows = conn.execute("SELECT * FROM transcription_jobs ORDER BY created_at DESC LIMIT ?", (int(limit),)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued or running job; a running job stops before its next chunk"""
+        row = self._row(job_id)
+        if row is None:
+            return None
+        if row["status"] in FINISHED_STATES:
+            return self._to_dict(row)
+
+        with self._lock:
+            # Kept until a worker has seen it: the one that dequeues the job skips it, a running job stops
+            self._cancelled.add(job_id)
+        if row["status"] == "queued":
+            with self.db.write() as conn:
+                cancelled = conn.execute(
+                    "UPDATE transcription_jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                    (time.time(), job_id),
+                ).rowcount
+            # Otherwise a worker claimed it first and stops before its next chunk
+            if cancelled:
+                self._remove_audio(job_id)
+                self._notify(job_id)
+        return self.get_job(job_id)
+
+    def get_status(self) -> Dict:
+        with self.db.read() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM transcription_jobs GROUP BY status").fetchall())
+        return {"running": self._running, "workers": self.worker_count, "queue_depth": self._queue.qsize(), "jobs": counts}
+
+    def _row(self, job_id: str):
+        with self.db.read() as conn:
+            return conn.execute("SELECT * FROM transcription_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def _update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.db.write() as conn:
+            conn.execute(f"UPDATE transcription_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _notify(self, job_id: str) -> Optional[Dict]:
+        job = self.get_job(job_id)
+        if job and self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                logger.warning(f"Job update callback failed: {e}")
+        return job
+
+    def _finish(self, job_id: str, status: str, error: str = None, result: Dict = None):
+        self._update(
+            job_id,
+            status=status,
+            error=error,
+            result=json.dumps(result) if result is not None else None,
+            progress=1.0 if status == "completed" else self._row(job_id)["progress"],
+            finished_at=time.time(),
+        )
+        self._remove_audio(job_id)
+        with self._lock:
+            self._cancelled.discard(job_id)
+        self._notify(job_id)
+
+    def _remove_audio(self, job_id: str):
+        row = self._row(job_id)
+        if row["audio_path"] and os.path.exists(row["audio_path"]):
+            os.remove(row["audio_path"])
+
+    def _claim(self, job_id: str) -> bool:
+        """Move a queued job to running; False when it was cancelled (or claimed) in the meantime"""
+        with self.db.write() as conn:
+            cursor = conn.execute(
+                "UPDATE transcription_jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+        return cursor.rowcount == 1
+
+    def _recover(self) -> int:
+        """Re-queue jobs that were queued or running when the server stopped"""
+        with self.db.read() as conn:
+            rows = conn.execute(
+                "SELECT id, audio_path FROM transcription_jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        resumed = 0
+        for row in rows:
+            if not row["audio_path"] or not os.path.exists(row["audio_path"]):
+                self._finish(row["id"], "failed", error="Uploaded audio was lost before the job could run")
+                continue
+            self._update(row["id"], status="queued", progress=0.0, started_at=None)
+            self._queue.put(row["id"])
+            resumed += 1
+        return resumed
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        with self.db.write() as conn:
+            deleted = conn.execute(
+                "DELETE FROM transcription_jobs WHERE status IN ('completed', 'failed', 'cancelled') AND finished_at < ?",
+                (cutoff,),
+            ).rowcount
+        if deleted:
+            logger.info(f"Deleted {deleted} expired transcription jobs")
+
+    def _is_cancelled(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancelled
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None or not self._running:
+                break
+            row = self._row(job_id)
+            if row is None or row["status"] != "queued" or not self._claim(job_id):
+                with self._lock:
+                    self._cancelled.discard(job_id)
+                continue
+            try:
+                self._run(row)
+            except JobCancelled:
+                logger.info(f"Transcription job {job_id} cancelled")
+                self._finish(job_id, "cancelled")
+            except Exception as e:
+                logger.error(f"Transcription job {job_id} failed: {e}")
+                options = json.loads(row["options"])
+                count_failed_request(options.get("model") or "unknown", "job", "error")
+                self._finish(job_id, "failed", error=str(e))
+
+    def _run(self, row):
+        job_id = row["id"]
+        options = TranscriptionOptions.from_dict(json.loads(row["options"]))
+        started = time.perf_counter()
+        self._notify(job_id)
+
+        with open(row["audio_path"], "rb") as audio_file, DECODE_SECONDS.time(source_type="job"):
+            audio = decode_stream(audio_file)
+        duration = audio_duration(audio)
+        self._update(job_id, duration=duration)
+
+        if self.vad is not None:
+            regions = self.vad.compact(audio)[1].regions
+        else:
+            regions = [(0, len(audio))] if len(audio) else []
+        result = self._transcribe_chunks(job_id, audio, regions, options)
+
+        observe_transcription(options.model_name, "job", result["language"], duration, time.perf_counter() - started)
+        if self.chat_history is not None:
+            try:
+                self.chat_history.queue_transcription(
+                    text=result["text"],
+                    language=result["language"],
+                    model_used=options.model_name,
+                    source_type="job",
+                    filename=row["filename"],
+                    duration=duration,
+                    metadata={"job_id": job_id, "options": options.to_dict(), "timestamp": datetime.now().isoformat()},
+                )
+            except Exception as e:
+                logger.warning(f"Failed to save job transcription to history: {e}")
+        self._finish(job_id, "completed", result=result)
+        logger.info(f"Transcription job {job_id} completed ({duration:.1f}s of audio)")
+
+    def _transcribe_chunks(self, job_id: str, audio: np.ndarray, regions: List, options: TranscriptionOptions) -> Dict:
+        """Transcribe the speech regions chunk by chunk and report progress after each one
+
+        Chunks are cut between regions, so no word is split at a boundary; only a region longer than a
+        chunk is cut inside speech. Timestamps are mapped back to the original recording.
+        """
+        chunks = plan_pieces(regions, self.chunk_samples, self.chunk_samples)
+        results = []
+        for done, chunk in enumerate(chunks, start=1):
+            if self._is_cancelled(job_id):
+                raise JobCancelled()
+            speech = np.concatenate([audio[start:end] for start, end in chunk])
+            results.append(self._transcribe_chunk(job_id, speech, options))
+            self._update(job_id, progress=round(done / len(chunks), 4))
+            self._notify(job_id)
+
+        return stitch(results, chunks, options.language)
+
+    def _transcribe_chunk(self, job_id: str, chunk: np.ndarray, options: TranscriptionOptions) -> Dict:
+        """One inference call; waits and retries while live traffic has the queue full"""
+        while True:
+            try:
+                result = self.transcribe(chunk, model_name=options.model_name, **options.transcribe_kwargs())
+            except InferenceQueueFull as e:
+                if self._is_cancelled(job_id):
+                    raise JobCancelled()
+                time.sleep(e.retry_after)
+                continue
+            if result is None:
+                raise RuntimeError("Transcription failed")
+            return result
+
+    def _to_dict(self, row) -> Dict:
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "filename": row["filename"],
+            "options": json.loads(row["options"]),
+            "duration": row["duration"],
+            "created_at": _iso(row["created_at"]),
+            "started_at": _iso(row["started_at"]),
+            "finished_at": _iso(row["finished_at"]),
+        }
+        if row["error"]:
+            job["error"] = row["error"]
+        if row["status"] == "completed":
+            job["result_urls"] = {fmt: f"/api/jobs/{row['id']}/result?format={fmt}" for fmt in RESULT_FORMATS}
+        return job
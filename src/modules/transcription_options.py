@@ -0,0 +1,208 @@
+"""
+Transcription Options Module
+Per-request model and decoding options, validated against one schema
+The same schema documents the form fields in the OpenAPI spec
+"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+# Whisper's prompt window is 224 tokens; this comfortably covers it in characters
+MAX_PROMPT_CHARS = 1000
+
+# Language codes whisper accepts (whisper.tokenizer.LANGUAGES)
+WHISPER_LANGUAGES = (
+    "en zh de es ru ko fr ja pt tr pl ca nl ar sv it id hi fi vi he uk el ms cs ro da hu ta no th ur hr bg lt la mi ml "
+    "cy sk te fa lv bn sr az sl kn et mk br eu is hy ne mn bs kk sq sw gl mr pa si km sn yo so af oc ka be tg sd gu am "
+    "yi lo uz fo ht ps tk nn mt sa lb my bo tl mg as tt haw ln ha ba jw su yue"
+).split()
+
+OPTION_SCHEMA = {
+    "model": {"type": "string", "description": "Whisper model for this request only (default: the current model)"},
+    "language": {
+        "type": "string",
+        "enum": ["auto", *WHISPER_LANGUAGES],
+        "default": "auto",
+        "description": "Language code, or auto to detect it",
+    },
+    "beam_size": {
+        "type": "integer",
+        "minimum": 1,
+        "maximum": 10,
+        "description": "Beam search width (omit or 1 for greedy decoding)",
+    },
+    "temperature": {
+        "type": "number_list",
+        "minimum": 0.0,
+        "maximum": 1.0,
+        "max_items": 6,
+        "description": "Temperature, or comma-separated fallback temperatures tried in order (e.g. 0,0.2,0.4)",
+    },
+    "condition_on_previous_text": {
+        "type": "boolean",
+        "description": "Feed each window's text into the next as context",
+    },
+    "word_timestamps": {"type": "boolean", "description": "Return word-level timestamps in the segments"},
+    "initial_prompt": {
+        "type": "string",
+        "max_length": MAX_PROMPT_CHARS,
+        "description": "Vocabulary or style hint passed to the first window",
+    },
+}
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off"}
+
+
+class InvalidOptionsError(ValueError):
+    """Raised when request options do not match the schema; errors lists every problem"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+@dataclass
+class TranscriptionOptions:
+    """Validated options: which model to run and how to decode"""
+
+    model_name: Optional[str] = None
+    language: Optional[str] = None
+    decoding: Dict[str, Any] = field(default_factory=dict)
+
+    def transcribe_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for model.transcribe()"""
+        kwargs = dict(self.decoding)
+        if self.language:
+            kwargs["language"] = self.language
+        return kwargs
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Requested options as stored with the transcription"""
+        options = {"model": self.model_name, "language": self.language or "auto", **self.decoding}
+        if "temperature" in options:
+            options["temperature"] = list(options["temperature"])
+        return options
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TranscriptionOptions":
+        """Rebuild options stored with to_dict() (already validated when they were stored)"""
+        decoding = dict(data)
+        model_name = decoding.pop("model", None)
+        language = decoding.pop("language", "auto")
+        if "temperature" in decoding:
+            decoding["temperature"] = tuple(decoding["temperature"])
+        return cls(model_name=model_name, language=None if language == "auto" else language, decoding=decoding)
+
+
+def parse_options(source: Mapping[str, Any], available_models: Iterable[str], default_model: Optional[str] = None):
+    """Validate request options (form fields, query args or JSON) and coerce them to their types
+
+    Unknown keys are ignored so clients can send extra form fields (e.g. the audio file name)
+    """
+    errors = []
+    values = {}
+    for name, spec in OPTION_SCHEMA.items():
+        raw = source.get(name)
+        if raw is None or raw == "":
+            continue
+        try:
+            values[name] = _coerce(raw, spec)
+        except ValueError as e:
+            errors.append(f"{name}: {e}")
+
+    model_name = values.pop("model", None) or default_model
+    available_models = list(available_models)
+    if model_name and model_name not in available_models:
+        errors.append(f"model: must be one of {', '.join(available_models)}")
+
+    if errors:
+        raise InvalidOptionsError(errors)
+
+    language = values.pop("language", "auto")
+    return TranscriptionOptions(
+        model_name=model_name,
+        language=None if language == "auto" else language,
+        decoding=values,
+    )
+
+
+def openapi_properties() -> Dict[str, Dict]:
+    """OpenAPI form-field definitions generated from the schema"""
+    properties = {}
+    for name, spec in OPTION_SCHEMA.items():
+        if spec["type"] == "number_list":
+            properties[name] = {"type": "string", "example": "0,0.2,0.4", "description": spec["description"]}
+            continue
+        prop = {"type": spec["type"]}
+        for key, openapi_key in (
+            ("minimum", "minimum"),
+            ("maximum", "maximum"),
+            ("enum", "enum"),
+            ("max_length", "maxLength"),
+            ("default", "default"),
+        ):
+            if key in spec:
+                prop[openapi_key] = spec[key]
+        prop["description"] = spec["description"]
+        properties[name] = prop
+    return properties
+
+
+def _coerce(raw, spec: Dict) -> Any:
+    kind = spec["type"]
+    if kind == "string":
+        if not isinstance(raw, str):
+            raise ValueError("must be a string")
+        if "enum" in spec and raw not in spec["enum"]:
+            raise ValueError("must be auto or a Whisper language code")
+        if len(raw) > spec.get("max_length", len(raw)):
+            raise ValueError(f"must be at most {spec['max_length']} characters")
+        return raw
+
+    if kind == "boolean":
+        if isinstance(raw, bool):
+            return raw
+        if str(raw).lower() in _TRUE:
+            return True
+        if str(raw).lower() in _FALSE:
+            return False
+        raise ValueError("must be true or false")
+
+    if kind == "integer":
+        if isinstance(raw, bool) or (isinstance(raw, float) and not raw.is_integer()):
+            raise ValueError("must be an integer")
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            raise ValueError("must be an integer")
+        _check_range(value, spec)
+        return value
+
+    if kind == "number_list":
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw) if raw.strip().startswith("[") else raw.split(",")
+            except json.JSONDecodeError:
+                raise ValueError("must be a number or a list of numbers")
+        items = raw if isinstance(raw, (list, tuple)) else [raw]
+        if not items or len(items) > spec["max_items"]:
+            raise ValueError(f"must have 1 to {spec['max_items']} values")
+        try:
+            values = tuple(float(item) for item in items)
+        except (TypeError, ValueError):
+            raise ValueError("must be a number or a list of numbers")
+        for value in values:
+            _check_range(value, spec)
+        return values
+
+    raise ValueError(f"unsupported option type {kind}")
+
+
+def _check_range(value, spec: Dict):
+    if not math.isfinite(value):
+        raise ValueError("must be a finite number")
+    if value < spec.get("minimum", value) or value > spec.get("maximum", value):
+        raise ValueError(f"must be between {spec['minimum']} and {spec['maximum']}")
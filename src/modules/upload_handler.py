@@ -5,24 +5,154 @@ Preserves all original upload features from enhanced_app.py
 """
 
 import logging
-import os
-import tempfile
+import time
 from datetime import datetime
 
-from flask import jsonify, request
+from flask import Response, jsonify, request
 from werkzeug.utils import secure_filename
 
+from .audio_ingest import AudioDecodeError, audio_duration, decode_stream
+from .inference_pool import InferenceQueueFull
+from .metrics import DECODE_SECONDS, count_cache_hit, count_failed_request, observe_transcription
+from .transcription_jobs import RESULT_FORMATS, to_srt, to_vtt
+from .transcription_options import InvalidOptionsError, parse_options
+from .vad import remap_result
+
 logger = logging.getLogger(__name__)
 
 
 class UploadHandler:
     """Handles audio file upload and transcription"""
 
-    def __init__(self, model_manager, whisper_available, system_stats, chat_history):
+    def __init__(
+        self,
+        model_manager,
+        whisper_available,
+        system_stats,
+        chat_history,
+        inference_pool=None,
+        vad=None,
+        jobs=None,
+        parallel=None,
+        result_cache=None,
+    ):
         self.model_manager = model_manager
         self.whisper_available = whisper_available
         self.system_stats = system_stats
         self.chat_history = chat_history
+        self.inference_pool = inference_pool
+        self.vad = vad
+        self.jobs = jobs
+        self.parallel = parallel
+        self.result_cache = result_cache
+
+    def _transcribe(self, audio, **kwargs):
+        """Run a transcription on the inference pool (direct model call if no pool is configured)"""
+        if self.inference_pool is None:
+            return self.model_manager.transcribe(audio, **kwargs)
+        return self.inference_pool.transcribe(audio, **kwargs)
+
+    def _transcribe_speech(self, audio, **kwargs):
+        """Transcribe only the speech regions of a recording, with timestamps mapped back"""
+        # Long recordings are split at silences and spread over the worker processes
+        if self.parallel is not None and self.parallel.should_use(audio_duration(audio), kwargs.get("model_name")):
+            return self.parallel.transcribe(audio, **kwargs)
+
+        if self.vad is None:
+            return self._transcribe(audio, **kwargs)
+
+        speech, timeline = self.vad.compact(audio)
+        if len(speech) == 0:
+            logger.info("No speech detected, skipping inference")
+            return {"text": "", "language": kwargs.get("language", "unknown"), "segments": []}
+        return remap_result(self._transcribe(speech, **kwargs), timeline)
+
+    def _transcribe_cached(self, audio, options, source_type: str):
+        """Transcribe with the request's options, answering audio seen before from the result cache
+
+        Returns (result, cache_status); cache_status is HIT, MISS, BYPASS, or None without a cache.
+        A bypass (Cache-Control: no-cache or X-Cache-Bypass: 1) skips the lookup but refreshes the entry
+        """
+        key = cache_status = None
+        if self.result_cache is not None:
+            key = self.result_cache.key(
+                audio, {"backend": self.model_manager.backend.name, "vad": self.vad is not None, **options.to_dict()}
+            )
+            if self._cache_bypassed():
+                self.result_cache.record_bypass()
+                cache_status = "BYPASS"
+            else:
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    count_cache_hit(options.model_name, source_type, cached.get("language"))
+                    return cached, "HIT"
+                cache_status = "MISS"
+
+        started = time.perf_counter()
+        result = self._transcribe_speech(audio, model_name=options.model_name, **options.transcribe_kwargs())
+        if result:
+            elapsed = time.perf_counter() - started
+            observe_transcription(
+                options.model_name,
+                source_type,
+                result.get("language"),
+                audio_duration(audio),
+                elapsed,
+                cache=(cache_status or "off").lower(),
+            )
+            if key is not None:
+                try:
+                    self.result_cache.put(key, options.model_name, result)
+                except Exception as e:
+                    logger.warning(f"Failed to cache transcription result: {e}")
+        return result, cache_status
+
+    @staticmethod
+    def _cache_bypassed() -> bool:
+        return request.headers.get("X-Cache-Bypass", "").lower() in ("1", "true") or "no-cache" in request.headers.get(
+            "Cache-Control", ""
+        )
+
+    @staticmethod
+    def _with_cache_status(response, cache_status):
+        if cache_status:
+            response.headers["X-Cache"] = cache_status
+        return response
+
+    def _request_options(self):
+        """Model and decoding options from the form fields / query string, validated against the schema"""
+        options = parse_options(
+            {**request.args.to_dict(), **request.form.to_dict()},
+            self.model_manager.get_available_models(),
+            default_model=self.model_manager.get_current_model_name(),
+        )
+        if not self.model_manager.is_model_loadable(options.model_name):
+            raise InvalidOptionsError([f"model: {options.model_name} is not downloaded"])
+        return options
+
+    def _result_payload(self, result, options):
+        """JSON body for a finished transcription with its segments (word timings when they were requested)"""
+        return {
+            "text": result["text"],
+            "language": result.get("language", "unknown"),
+            "segments": result.get("segments", []),
+            "model_used": options.model_name,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def _invalid_options_response(self, error: InvalidOptionsError, source_type: str):
+        """400 response listing every invalid option"""
+        count_failed_request(self.model_manager.get_current_model_name(), source_type, "invalid_options")
+        return jsonify({"error": "Invalid transcription options", "details": error.errors}), 400
+
+    def _busy_response(self, error: InferenceQueueFull):
+        """503 response telling the client when to retry"""
+        logger.warning(f"Rejecting transcription request: {error}")
+        return (
+            jsonify({"error": "Server busy, transcription queue is full", "retry_after": error.retry_after}),
+            503,
+            {"Retry-After": str(error.retry_after)},
+        )
 
     def transcribe_upload(self):
         """Transcribe uploaded audio file - Original functionality preserved"""
@@ -40,49 +170,57 @@ class UploadHandler:
             # Secure filename
             filename = secure_filename(audio_file.filename)
 
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                audio_file.save(tmp_file.name)
-
-                # Transcribe audio using ModelManager
-                current_model = self.model_manager.get_current_model_name()
-                logger.info(f"Transcribing file: {filename} with model: {current_model}")
-                result = self.model_manager.transcribe(tmp_file.name)
-
-                # Clean up temp file
-                os.unlink(tmp_file.name)
-
-                # Update statistics
-                self.system_stats["total_transcriptions"] += 1
-                logger.info("Transcription completed successfully")
-
-                if result:
-                    # Save to chat history
-                    try:
-                        self.chat_history.add_transcription(
-                            text=result["text"],
-                            language=result.get("language", "unknown"),
-                            model_used=current_model,
-                            source_type="upload",
-                            filename=filename,
-                            metadata={"timestamp": datetime.now().isoformat()},
-                        )
-                    except Exception as e:
-                        logger.warning(f"Failed to save transcription to history: {e}")
-
-                    return jsonify(
-                        {
-                            "text": result["text"],
-                            "language": result.get("language", "unknown"),
-                            "model_used": current_model,
+            # The requested model runs from the model cache without switching the global model
+            options = self._request_options()
+
+            # Decode the upload in memory - no temp file round trip
+            with DECODE_SECONDS.time(source_type="upload"):
+                audio = decode_stream(audio_file.stream)
+
+            # Transcribe audio using ModelManager
+            current_model = options.model_name
+            logger.info(f"Transcribing file: {filename} ({audio_duration(audio):.1f}s) with model: {current_model}")
+            result, cache_status = self._transcribe_cached(audio, options, "upload")
+
+            # Update statistics
+            self.system_stats["total_transcriptions"] += 1
+            logger.info("Transcription completed successfully")
+
+            if result:
+                # Save to chat history
+                try:
+                    self.chat_history.queue_transcription(
+                        text=result["text"],
+                        language=result.get("language", "unknown"),
+                        model_used=current_model,
+                        source_type="upload",
+                        filename=filename,
+                        duration=audio_duration(audio),
+                        metadata={
                             "timestamp": datetime.now().isoformat(),
-                        }
+                            "options": options.to_dict(),
+                            "cached": cache_status == "HIT",
+                        },
                     )
-                else:
-                    return jsonify({"error": "Transcription failed"})
+                except Exception as e:
+                    logger.warning(f"Failed to save transcription to history: {e}")
+
+                return self._with_cache_status(jsonify(self._result_payload(result, options)), cache_status)
+            else:
+                return jsonify({"error": "Transcription failed"})
 
+        except InvalidOptionsError as e:
+            return self._invalid_options_response(e, "upload")
+        except AudioDecodeError as e:
+            logger.warning(f"Could not decode uploaded audio: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "upload", "bad_audio")
+            return jsonify({"error": f"Could not decode audio: {e}"}), 400
+        except InferenceQueueFull as e:
+            count_failed_request(self.model_manager.get_current_model_name(), "upload", "busy")
+            return self._busy_response(e)
         except Exception as e:
             logger.error(f"Transcription error: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "upload", "error")
             return jsonify({"error": str(e)})
 
     def transcribe_live_api(self):
@@ -95,42 +233,110 @@ class UploadHandler:
                 return jsonify({"error": "No audio data provided"})
 
             audio_file = request.files["audio"]
-            language = request.form.get("language", "auto")
+            options = self._request_options()
+            language = options.language or "auto"
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-                audio_file.save(tmp_file.name)
+            with DECODE_SECONDS.time(source_type="live_api"):
+                audio = decode_stream(audio_file.stream)
 
-                logger.info(f"Live transcribing audio (lang: {language})")
+            logger.info(f"Live transcribing audio (lang: {language}, model: {options.model_name})")
 
-                kwargs = {}
-                if language != "auto":
-                    kwargs["language"] = language
+            result, cache_status = self._transcribe_cached(audio, options, "live_api")
 
-                result = self.model_manager.transcribe(tmp_file.name, **kwargs)
-                os.unlink(tmp_file.name)
+            self.system_stats["total_transcriptions"] += 1
 
-                self.system_stats["total_transcriptions"] += 1
-
-                # Save to chat history
-                try:
-                    self.chat_history.add_transcription(
-                        text=result["text"],
-                        language=result.get("language", "unknown"),
-                        model_used=self.model_manager.get_current_model_name(),
-                        source_type="live_api",
-                        metadata={"language_requested": language, "timestamp": datetime.now().isoformat()},
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to save live transcription to history: {e}")
-
-                return jsonify(
-                    {
-                        "text": result["text"],
-                        "language": result.get("language", "unknown"),
+            # Save to chat history
+            try:
+                self.chat_history.queue_transcription(
+                    text=result["text"],
+                    language=result.get("language", "unknown"),
+                    model_used=options.model_name,
+                    source_type="live_api",
+                    duration=audio_duration(audio),
+                    metadata={
+                        "language_requested": language,
+                        "options": options.to_dict(),
+                        "cached": cache_status == "HIT",
                         "timestamp": datetime.now().isoformat(),
-                    }
+                    },
                 )
+            except Exception as e:
+                logger.warning(f"Failed to save live transcription to history: {e}")
+
+            return self._with_cache_status(jsonify(self._result_payload(result, options)), cache_status)
 
+        except InvalidOptionsError as e:
+            return self._invalid_options_response(e, "live_api")
+        except AudioDecodeError as e:
+            logger.warning(f"Could not decode live audio: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "live_api", "bad_audio")
+            return jsonify({"error": f"Could not decode audio: {e}"}), 400
+        except InferenceQueueFull as e:
+            count_failed_request(self.model_manager.get_current_model_name(), "live_api", "busy")
+            return self._busy_response(e)
         except Exception as e:
             logger.error(f"Live transcription error: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "live_api", "error")
             return jsonify({"error": str(e)})
+
+    def submit_job(self):
+        """Queue an upload as a background transcription job - 202 with the job id, no waiting on inference"""
+        if not self.whisper_available or self.jobs is None:
+            return jsonify({"error": "Transcription jobs not available"}), 503
+
+        try:
+            if "audio" not in request.files:
+                return jsonify({"error": "No audio file provided"}), 400
+
+            audio_file = request.files["audio"]
+            if audio_file.filename == "":
+                return jsonify({"error": "No audio file selected"}), 400
+
+            options = self._request_options()
+            job = self.jobs.submit(audio_file.stream, secure_filename(audio_file.filename), options)
+            return jsonify(job), 202, {"Location": f"/api/jobs/{job['job_id']}"}
+
+        except InvalidOptionsError as e:
+            return self._invalid_options_response(e, "job")
+        except Exception as e:
+            logger.error(f"Failed to queue transcription job: {e}")
+            count_failed_request(self.model_manager.get_current_model_name(), "job", "error")
+            return jsonify({"error": str(e)}), 500
+
+    def get_job(self, job_id):
+        """Status and progress of a transcription job"""
+        job = self.jobs.get_job(job_id) if self.jobs else None
+        if job is None:
+            return jsonify({"error": f"Job {job_id} not found"}), 404
+        return jsonify(job)
+
+    def get_job_result(self, job_id):
+        """Result of a completed job as JSON, SRT or VTT (?format=)"""
+        job = self.jobs.get_job(job_id) if self.jobs else None
+        if job is None:
+            return jsonify({"error": f"Job {job_id} not found"}), 404
+        if job["status"] != "completed":
+            return jsonify({"error": f"Job {job_id} is {job['status']}", "job": job}), 409
+
+        result_format = request.args.get("format", "json").lower()
+        if result_format not in RESULT_FORMATS:
+            return jsonify({"error": f"format must be one of {', '.join(RESULT_FORMATS)}"}), 400
+
+        result = self.jobs.get_result(job_id)
+        if result_format == "json":
+            return jsonify({**result, "job_id": job_id, "model_used": job["options"].get("model")})
+
+        body = to_srt(result["segments"]) if result_format == "srt" else to_vtt(result["segments"])
+        filename = f"{(job['filename'] or job_id).rsplit('.', 1)[0]}.{result_format}"
+        return Response(
+            body,
+            mimetype=RESULT_FORMATS[result_format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    def cancel_job(self, job_id):
+        """Cancel a queued or running job"""
+        job = self.jobs.cancel(job_id) if self.jobs else None
+        if job is None:
+            return jsonify({"error": f"Job {job_id} not found"}), 404
+        return jsonify(job)
@@ -0,0 +1,194 @@
+"""
+Voice Activity Detection Module
+Vectorized energy + zero-crossing VAD that keeps silence away from Whisper
+Uploads are compacted to their speech regions; silent live chunks are dropped before inference
+"""
+
+import logging
+import threading
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_ingest import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int]
+
+
+class SpeechTimeline:
+    """Maps times in compacted (speech-only) audio back to the original recording"""
+
+    def __init__(self, regions: List[Region], sample_rate: int = SAMPLE_RATE):
+        self.regions = regions
+        self.sample_rate = sample_rate
+        # Start of each region inside the compacted audio
+        self._compact_starts = []
+        position = 0
+        for start, end in regions:
+            self._compact_starts.append(position)
+            position += end - start
+        self.speech_samples = position
+
+    def to_original(self, seconds: float) -> float:
+        """Convert a compacted-audio timestamp to the original timeline"""
+        if not self.regions:
+            return seconds
+        sample = seconds * self.sample_rate
+        index = max(0, bisect_right(self._compact_starts, sample) - 1)
+        start, end = self.regions[index]
+        original = start + (sample - self._compact_starts[index])
+        return min(original, end) / self.sample_rate
+
+
+class VoiceActivityDetector:
+    """Frame-level speech detection with energy and zero-crossing features
+
+    A custom backend can replace the built-in classifier: it receives a 2-D array of
+    frames (n_frames x frame_length) and returns a boolean speech mask per frame.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = 30,
+        energy_threshold_db: float = -45.0,
+        noise_margin_db: float = 10.0,
+        zcr_threshold: float = 0.25,
+        min_speech_ms: int = 150,
+        min_silence_ms: int = 300,
+        padding_ms: int = 200,
+        backend: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.energy_threshold_db = energy_threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+        self.padding_frames = int(padding_ms / frame_ms)
+        self.backend = backend
+
+        self._lock = threading.Lock()
+        self._stats = {"processed_seconds": 0.0, "skipped_seconds": 0.0, "silent_chunks": 0}
+
+    def frame_mask(self, audio: np.ndarray) -> np.ndarray:
+        """Boolean speech decision for each complete frame"""
+        n_frames = len(audio) // self.frame_length
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        frames = np.asarray(audio[: n_frames * self.frame_length], dtype=np.float32).reshape(n_frames, -1)
+
+        if self.backend is not None:
+            return np.asarray(self.backend(frames), dtype=bool)
+
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+
+        # Adaptive threshold: the quietest frames approximate the noise floor, unless the
+        # recording has no quiet frames at all (continuous speech) - then only the absolute floor applies
+        threshold = self.energy_threshold_db
+        noise_floor = np.percentile(energy_db, 10)
+        if noise_floor + self.noise_margin_db < energy_db.max():
+            threshold = max(threshold, noise_floor + self.noise_margin_db)
+
+        # Voiced speech is loud; unvoiced fricatives are quieter but cross zero often
+        voiced = energy_db > threshold
+        unvoiced = (energy_db > threshold - self.noise_margin_db / 2) & (zcr > self.zcr_threshold)
+        return voiced | unvoiced
+
+    def speech_regions(self, audio: np.ndarray) -> List[Region]:
+        """Sample ranges containing speech, smoothed and padded"""
+        mask = self._smooth(self.frame_mask(audio))
+        if not mask.any():
+            return []
+
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+        starts, ends = edges[::2], edges[1::2]
+
+        regions = []
+        for start, end in zip(starts, ends):
+            start = max(0, (start - self.padding_frames) * self.frame_length)
+            end = min(len(audio), (end + self.padding_frames) * self.frame_length)
+            # A trailing partial frame belongs to speech that runs to the end
+            if end >= (len(audio) // self.frame_length) * self.frame_length:
+                end = len(audio)
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((int(start), int(end)))
+        return regions
+
+    def compact(self, audio: np.ndarray) -> Tuple[np.ndarray, SpeechTimeline]:
+        """Concatenate the speech regions of a recording and record the skipped silence"""
+        if len(audio) < self.frame_length:
+            # Too short to judge - pass through untouched
+            return audio, SpeechTimeline([(0, len(audio))], self.sample_rate)
+
+        regions = self.speech_regions(audio)
+        timeline = SpeechTimeline(regions, self.sample_rate)
+        if len(regions) == 1 and regions[0] == (0, len(audio)):
+            speech = audio
+        elif regions:
+            speech = np.concatenate([audio[start:end] for start, end in regions])
+        else:
+            speech = audio[:0]
+
+        with self._lock:
+            self._stats["processed_seconds"] += len(audio) / self.sample_rate
+            self._stats["skipped_seconds"] += (len(audio) - len(speech)) / self.sample_rate
+            if not regions:
+                self._stats["silent_chunks"] += 1
+        return speech, timeline
+
+    def is_silent(self, audio: np.ndarray) -> bool:
+        """Whether a chunk holds no speech at all (live streams drop such chunks but never trim the others)"""
+        if len(audio) < self.frame_length:
+            return False
+        silent = not self.speech_regions(audio)
+        with self._lock:
+            self._stats["processed_seconds"] += len(audio) / self.sample_rate
+            if silent:
+                self._stats["skipped_seconds"] += len(audio) / self.sample_rate
+                self._stats["silent_chunks"] += 1
+        return silent
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["skipped_seconds"] = round(stats["skipped_seconds"], 2)
+        stats["processed_seconds"] = round(stats["processed_seconds"], 2)
+        stats["enabled"] = True
+        stats["backend"] = "custom" if self.backend is not None else "energy_zcr"
+        return stats
+
+    def _smooth(self, mask: np.ndarray) -> np.ndarray:
+        """Fill short silence gaps, then drop speech bursts too short to be words"""
+        mask = mask.copy()
+        for value, min_run in ((False, self.min_silence_frames), (True, self.min_speech_frames)):
+            edges = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+            bounds = np.concatenate(([0], edges, [len(mask)]))
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                if mask[start] == value and end - start < min_run:
+                    # Leading/trailing silence is real silence, not a gap between words
+                    if value is False and (start == 0 or end == len(mask)):
+                        continue
+                    mask[start:end] = not value
+        return mask
+
+
+def remap_result(result: Dict, timeline: SpeechTimeline) -> Dict:
+    """Shift segment and word timestamps from compacted audio back to the original recording"""
+    for segment in result.get("segments") or []:
+        for key in ("start", "end"):
+            if key in segment:
+                segment[key] = timeline.to_original(segment[key])
+        for word in segment.get("words") or []:
+            for key in ("start", "end"):
+                if key in word:
+                    word[key] = timeline.to_original(word[key])
+    return result
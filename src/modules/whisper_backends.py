@@ -0,0 +1,346 @@
+"""
+Whisper Backends Module
+Inference engines ModelManager can run: openai-whisper (PyTorch) or faster-whisper (CTranslate2)
+Each backend loads models, finds and fetches their files; models answer transcribe() in openai-whisper's format
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+from typing import Dict, Iterable, Optional, Set
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+OPENAI_WHISPER = "openai-whisper"
+FASTER_WHISPER = "faster-whisper"
+
+
+class BackendUnavailable(RuntimeError):
+    """The backend's library is not installed"""
+
+
+class DownloadCancelled(Exception):
+    """Raised by fetch() when the download was cancelled through its progress entry"""
+
+
+class WhisperBackend:
+    """Interface: model loading and model file management for one inference engine"""
+
+    name = "base"
+    # Whether ModelManager.transcribe_batch can decode several segments in one pass
+    supports_batching = False
+
+    def load_model(self, model_name: str):
+        raise NotImplementedError
+
+    def find_downloaded(self, model_names: Iterable[str]) -> Set[str]:
+        """Models whose files are already on disk"""
+        raise NotImplementedError
+
+    def fetch(self, model_name: str, model_info: Dict, progress: Dict):
+        """Download a model, updating progress (downloaded_size, total_size, progress) as it goes
+
+        Raises DownloadCancelled once progress["cancel_requested"] is set
+        """
+        raise NotImplementedError
+
+    def model_size(self, model_name: str) -> int:
+        """Bytes the model's files take on disk (0 if not downloaded)"""
+        return 0
+
+    def delete(self, model_name: str):
+        """Remove the model's files (raises OSError on failure)"""
+        raise NotImplementedError
+
+    def use_features(self, extractor) -> bool:
+        """Take log-mel features from the appliance's FeatureExtractor instead of computing them per call"""
+        return False
+
+    def get_status(self) -> Dict:
+        return {"name": self.name}
+
+    def spec(self) -> Dict:
+        """Arguments that recreate this backend in another process (see backend_from_spec)"""
+        return {"name": self.name}
+
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """openai-whisper: PyTorch checkpoints in ~/.cache/whisper, decoded in fp32 on CPU"""
+
+    name = OPENAI_WHISPER
+    supports_batching = True
+
+    def __init__(self):
+        try:
+            import whisper
+        except ImportError:
+            raise BackendUnavailable("openai-whisper is not installed - install with: pip install openai-whisper")
+        self.module = whisper
+        self.cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "whisper")
+
+    def load_model(self, model_name: str):
+        return self.module.load_model(model_name)
+
+    def find_downloaded(self, model_names: Iterable[str]) -> Set[str]:
+        if not os.path.exists(self.cache_dir):
+            return set()
+        files = os.listdir(self.cache_dir)
+        # Check for .pt files that match model names
+        return {name for name in model_names if any(f.startswith(name) and f.endswith(".pt") for f in files)}
+
+    def _model_path(self, model_name: str) -> str:
+        return os.path.join(self.cache_dir, f"{model_name}.pt")
+
+    def fetch(self, model_name: str, model_info: Dict, progress: Dict):
+        url = model_info["url"]
+        expected_sha256 = model_info["sha256"]
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Use a temporary filename during download
+        download_target_path = self._model_path(model_name)
+        temp_download_path = download_target_path + ".tmp"
+
+        try:
+            logger.info(f"Starting download for model {model_name} from {url}")
+            response = requests.get(url, stream=True, timeout=30)
+            response.raise_for_status()
+
+            total_size = int(response.headers.get("content-length", 0))
+            progress["total_size"] = total_size
+            downloaded_size = 0
+            hasher = hashlib.sha256()
+
+            with open(temp_download_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if progress.get("cancel_requested", False):
+                        raise DownloadCancelled()
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    downloaded_size += len(chunk)
+                    progress["downloaded_size"] = downloaded_size
+                    if total_size > 0:
+                        progress["progress"] = int((downloaded_size / total_size) * 100)
+
+            calculated_sha256 = hasher.hexdigest()
+            if calculated_sha256 != expected_sha256:
+                raise ValueError(f"SHA256 checksum mismatch. Expected {expected_sha256}, got {calculated_sha256}")
+
+            # Download successful and checksum matches, move temp file to final destination
+            os.rename(temp_download_path, download_target_path)
+        finally:
+            if os.path.exists(temp_download_path):
+                os.remove(temp_download_path)
+
+    def use_features(self, extractor) -> bool:
+        return extractor.install(self.module)
+
+    def model_size(self, model_name: str) -> int:
+        path = self._model_path(model_name)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def delete(self, model_name: str):
+        path = self._model_path(model_name)
+        if os.path.exists(path):
+            os.remove(path)
+            logger.info(f"Successfully deleted model file: {path}")
+        else:
+            logger.warning(f"Model file not found at {path}, though it was marked as downloaded.")
+
+    def get_status(self) -> Dict:
+        return {"name": self.name, "device": "cpu", "compute_type": "float32", "cache_dir": self.cache_dir}
+
+
+class FasterWhisperBackend(WhisperBackend):
+    """faster-whisper: CTranslate2 conversions from the Hugging Face hub, int8 on CPU by default"""
+
+    name = FASTER_WHISPER
+    # CTranslate2 names the current large model explicitly
+    MODEL_ALIASES = {"large": "large-v3"}
+
+    def __init__(self, device: str = "cpu", compute_type: str = "int8", cpu_threads: int = 0):
+        try:
+            import faster_whisper
+        except ImportError:
+            raise BackendUnavailable("faster-whisper is not installed - install with: pip install faster-whisper")
+        self.module = faster_whisper
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+
+    def _repo_name(self, model_name: str) -> str:
+        return self.MODEL_ALIASES.get(model_name, model_name)
+
+    def _local_path(self, model_name: str) -> Optional[str]:
+        """Snapshot directory of a downloaded model, None if it is not in the hub cache"""
+        try:
+            return self.module.download_model(self._repo_name(model_name), local_files_only=True)
+        except Exception:
+            return None
+
+    def load_model(self, model_name: str):
+        model = self.module.WhisperModel(
+            self._repo_name(model_name),
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+        )
+        return FasterWhisperModel(model)
+
+    def find_downloaded(self, model_names: Iterable[str]) -> Set[str]:
+        return {name for name in model_names if self._local_path(name)}
+
+    def fetch(self, model_name: str, model_info: Dict, progress: Dict):
+        # The hub client reports no byte progress; the entry jumps to 100 when the snapshot is complete
+        logger.info(f"Starting download for model {model_name} from the Hugging Face hub")
+        self.module.download_model(self._repo_name(model_name))
+        if progress.get("cancel_requested", False):
+            # A snapshot download cannot be interrupted; honour the cancel by removing the result
+            self.delete(model_name)
+            raise DownloadCancelled()
+        size = self.model_size(model_name)
+        progress["downloaded_size"] = progress["total_size"] = size
+
+    def model_size(self, model_name: str) -> int:
+        path = self._local_path(model_name)
+        if not path:
+            return 0
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+    def delete(self, model_name: str):
+        path = self._local_path(model_name)
+        if not path:
+            logger.warning(f"Model {model_name} not found in the Hugging Face cache, though it was marked as downloaded.")
+            return
+        # The hub cache keeps blobs next to the snapshots: models--<org>--<repo>/snapshots/<revision>
+        repo_dir = os.path.dirname(os.path.dirname(path))
+        shutil.rmtree(repo_dir if os.path.basename(repo_dir).startswith("models--") else path)
+        logger.info(f"Successfully deleted model files: {path}")
+
+    def get_status(self) -> Dict:
+        return self.spec()
+
+    def spec(self) -> Dict:
+        return {
+            "name": self.name,
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "cpu_threads": self.cpu_threads,
+        }
+
+
+class FasterWhisperModel:
+    """Adapts a faster_whisper.WhisperModel to openai-whisper's model.transcribe() call and result"""
+
+    # openai-whisper keyword arguments that faster-whisper spells differently
+    RENAMED_OPTIONS = {"logprob_threshold": "log_prob_threshold"}
+    # openai-whisper keyword arguments with no faster-whisper counterpart
+    IGNORED_OPTIONS = {"fp16", "verbose"}
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **options) -> Dict:
+        kwargs = {
+            self.RENAMED_OPTIONS.get(key, key): value for key, value in options.items() if key not in self.IGNORED_OPTIONS
+        }
+        # openai-whisper decodes greedily unless a beam size is given; faster-whisper defaults to 5 beams
+        kwargs.setdefault("beam_size", 1)
+        if not isinstance(audio, str):
+            audio = np.asarray(audio, dtype=np.float32)
+
+        segments, info = self.model.transcribe(audio, **kwargs)
+        segments = [self._segment_dict(segment) for segment in segments]  # decoding happens while iterating
+        return {
+            "text": "".join(segment["text"] for segment in segments).strip(),
+            "language": info.language,
+            "segments": segments,
+        }
+
+    @staticmethod
+    def _segment_dict(segment) -> Dict:
+        result = {
+            "id": segment.id,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob,
+        }
+        if segment.words:
+            result["words"] = [
+                {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                for word in segment.words
+            ]
+        return result
+
+
+class StubBackend(WhisperBackend):
+    """Placeholder models for load testing: every model is 'downloaded' and loads instantly"""
+
+    name = "stub"
+
+    def __init__(self, realtime_factor: float = 0.05):
+        self.realtime_factor = realtime_factor
+
+    def load_model(self, model_name: str):
+        from .stub_model import StubWhisperModel
+
+        return StubWhisperModel(model_name, self.realtime_factor)
+
+    def find_downloaded(self, model_names: Iterable[str]) -> Set[str]:
+        return set(model_names)
+
+    def fetch(self, model_name: str, model_info: Dict, progress: Dict):
+        pass
+
+    def delete(self, model_name: str):
+        pass
+
+    def get_status(self) -> Dict:
+        return self.spec()
+
+    def spec(self) -> Dict:
+        return {"name": self.name, "realtime_factor": self.realtime_factor}
+
+
+BACKENDS = {OPENAI_WHISPER: OpenAIWhisperBackend, FASTER_WHISPER: FasterWhisperBackend}
+
+
+def create_backend(name: str = OPENAI_WHISPER, fallback: bool = True, **options) -> Optional[WhisperBackend]:
+    """Instantiate the named backend; if its library is missing, try the other one (when fallback is set)
+
+    options (device, compute_type, cpu_threads) only apply to faster-whisper. Returns None if no backend is installed.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Whisper backend {name!r} (expected one of {', '.join(BACKENDS)})")
+
+    candidates = [name] + ([other for other in BACKENDS if other != name] if fallback else [])
+    for candidate in candidates:
+        try:
+            backend = BACKENDS[candidate](**options) if candidate == FASTER_WHISPER else BACKENDS[candidate]()
+        except BackendUnavailable as e:
+            logger.warning(f"⚠️ {e}")
+            continue
+        if candidate != name:
+            logger.warning(f"⚠️ Whisper backend {name} unavailable, falling back to {candidate}")
+        return backend
+    return None
+
+
+def backend_from_spec(spec: Dict) -> WhisperBackend:
+    """Recreate a backend from WhisperBackend.spec() (in a worker process); raises BackendUnavailable"""
+    options = dict(spec)
+    name = options.pop("name")
+    if name == StubBackend.name:
+        return StubBackend(**options)
+    backend = create_backend(name, fallback=False, **options)
+    if backend is None:
+        raise BackendUnavailable(f"Whisper backend {name} is not installed")
+    return backend
@@ -0,0 +1,7 @@
+"""
+Performance Benchmarks
+Offline realtime-factor, latency, memory and concurrency benchmarks for the transcription backends
+
+Run from src/:  python -m tests.performance.benchmark --help   (backend realtime factor)
+                python -m tests.performance.live_load --help   (concurrent live-speech sessions)
+"""
@@ -0,0 +1,153 @@
+"""
+Benchmark backends
+Uniform load / transcribe / first-segment interface over each transcription entry point
+"""
+
+import asyncio
+import base64
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from modules.audio_ingest import SAMPLE_RATE
+
+from .audio_fixtures import to_wav_bytes
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Whisper decodes 30-second windows - nothing can come back before the first one is done
+FIRST_WINDOW = 30 * SAMPLE_RATE
+
+
+class BackendUnavailable(Exception):
+    """The backend's libraries are not installed here"""
+
+
+class Backend:
+    """A transcription entry point under test"""
+
+    name = "backend"
+
+    def load(self, model: str):
+        raise NotImplementedError
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Dict:
+        raise NotImplementedError
+
+    def first_segment_seconds(self, audio: np.ndarray, language: Optional[str] = None) -> float:
+        """Latency until the first text is available (default: the first 30 s window)"""
+        started = time.perf_counter()
+        self.transcribe(audio[:FIRST_WINDOW], language)
+        return time.perf_counter() - started
+
+    def close(self):
+        pass
+
+
+class OpenAIWhisperBackend(Backend):
+    """modules.model_manager.ModelManager (openai-whisper, fp32 on CPU)"""
+
+    name = "openai-whisper"
+
+    def __init__(self):
+        from modules.model_manager import ModelManager
+
+        self.manager = ModelManager(backend="openai-whisper")
+        if not self.manager.whisper_available or self.manager.backend.name != "openai-whisper":
+            raise BackendUnavailable("openai-whisper is not installed")
+
+    def load(self, model: str):
+        if not self.manager.load_model(model):
+            raise RuntimeError(f"ModelManager could not load {model}")
+
+    def transcribe(self, audio, language=None):
+        options = {"fp16": False}
+        if language:
+            options["language"] = language
+        result = self.manager.transcribe(audio, **options)
+        if result is None:
+            raise RuntimeError("ModelManager transcription failed")
+        return result
+
+
+class FasterWhisperBackend(Backend):
+    """whisper-service WhisperManager (faster-whisper / CTranslate2 int8)"""
+
+    name = "faster-whisper"
+
+    def __init__(self):
+        sys.path.insert(0, os.path.join(SRC_DIR, "whisper-service"))
+        try:
+            from whisper_manager import WhisperManager
+        except ImportError as e:
+            raise BackendUnavailable(f"faster-whisper is not installed: {e}")
+        self.manager = WhisperManager()
+
+    def load(self, model: str):
+        asyncio.run(self.manager.load_model(model))
+
+    def transcribe(self, audio, language=None):
+        # Bypass the micro-batcher: this measures one request end to end
+        result = self.manager._transcribe_sync(audio, language)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        return result
+
+    def first_segment_seconds(self, audio, language=None):
+        # faster-whisper yields segments lazily - time the first one
+        started = time.perf_counter()
+        segments, _ = self.manager.model.transcribe(audio, language=language, beam_size=1)
+        next(iter(segments), None)
+        return time.perf_counter() - started
+
+    def close(self):
+        if self.manager.batcher is not None:
+            self.manager.batcher.shutdown()
+
+
+class ApplianceServerBackend(Backend):
+    """webgui/backend/appliance_server.py process_real_audio_managed (base64 WAV in, text out)"""
+
+    name = "appliance"
+
+    def __init__(self):
+        sys.path.insert(0, os.path.join(SRC_DIR, "webgui", "backend"))
+        try:
+            import appliance_server
+        except ImportError as e:
+            raise BackendUnavailable(f"appliance server dependencies missing: {e}")
+        self.server = appliance_server
+
+    def load(self, model: str):
+        asyncio.run(self.server.model_manager.load_model_with_limits(model))
+
+    def transcribe(self, audio, language=None):
+        payload = base64.b64encode(to_wav_bytes(audio)).decode("ascii")
+        text = asyncio.run(self.server.process_real_audio_managed(payload, language or "auto", audio_format="wav"))
+        if text.startswith(("Error", "No Whisper model", "Audio queued")):
+            raise RuntimeError(text)
+        return {"text": text}
+
+
+class StubBackend(Backend):
+    """No model: sleeps for duration x realtime factor (checks the harness itself, offline and instantly)"""
+
+    name = "stub"
+
+    def __init__(self, realtime_factor: float = 0.01, load_seconds: float = 0.0):
+        self.realtime_factor = realtime_factor
+        self.load_seconds = load_seconds
+
+    def load(self, model: str):
+        time.sleep(self.load_seconds)
+
+    def transcribe(self, audio, language=None):
+        time.sleep(len(audio) / SAMPLE_RATE * self.realtime_factor)
+        return {"text": "", "language": language or "en", "segments": []}
+
+
+BACKENDS = {
+    backend.name: backend for backend in (OpenAIWhisperBackend, FasterWhisperBackend, ApplianceServerBackend, StubBackend)
+}
@@ -0,0 +1,269 @@
+"""
+Transcription benchmark harness
+Measures model load time, first-segment latency, realtime factor, peak RSS and throughput under
+N concurrent clients for each backend, and writes a JSON report that can be diffed between releases
+
+    cd src && python -m tests.performance.benchmark --backend openai-whisper faster-whisper appliance \\
+        --model tiny --concurrency 1 4 --output ../benchmark-results.json
+    python -m tests.performance.benchmark --compare old.json new.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import psutil
+
+from modules.audio_ingest import SAMPLE_RATE
+
+from .audio_fixtures import DEFAULT_DURATIONS, load_clips
+from .backends import BACKENDS, BackendUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Bump when the report layout changes
+REPORT_SCHEMA = 1
+
+
+class PeakRSS:
+    """Samples this process's resident set size in the background and keeps the maximum"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self._process = psutil.Process(os.getpid())
+        self._stop = threading.Event()
+        self.start_mb = self.peak_mb = self._rss_mb()
+
+    def _rss_mb(self) -> float:
+        return self._process.memory_info().rss / (1024 * 1024)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._rss_mb())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self._rss_mb())
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    return float(np.percentile(values, percent)) if values else 0.0
+
+
+def _round(value: float) -> float:
+    return round(value, 4)
+
+
+def benchmark_clip(backend, audio: np.ndarray, repeats: int, language: Optional[str]) -> Dict:
+    """Realtime factor of one clip: one warm-up run, then `repeats` timed runs"""
+    duration = len(audio) / SAMPLE_RATE
+    backend.transcribe(audio, language)
+
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        backend.transcribe(audio, language)
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "audio_seconds": _round(duration),
+        "latency_median": _round(statistics.median(latencies)),
+        "latency_min": _round(min(latencies)),
+        "rtf_median": _round(statistics.median(latencies) / duration),
+        "rtf_min": _round(min(latencies) / duration),
+    }
+
+
+def benchmark_concurrency(backend, audio: np.ndarray, clients: int, requests_per_client: int, language) -> Dict:
+    """N clients each sending the same clip back to back"""
+    duration = len(audio) / SAMPLE_RATE
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            try:
+                backend.transcribe(audio, language)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for future in [pool.submit(client) for _ in range(clients)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "wall_seconds": _round(elapsed),
+        # Seconds of audio transcribed per wall-clock second across all clients
+        "throughput_audio_per_second": _round(len(latencies) * duration / elapsed) if elapsed else 0.0,
+        "latency_p50": _round(_percentile(latencies, 50)),
+        "latency_p95": _round(_percentile(latencies, 95)),
+        "latency_max": _round(max(latencies, default=0.0)),
+    }
+
+
+def run_backend(name: str, model: str, clips: Dict[str, np.ndarray], args, backend=None) -> Dict:
+    """Full benchmark of one backend; failures are reported in the result instead of raised"""
+    result = {"backend": name, "model": model, "available": True}
+    try:
+        backend = backend or BACKENDS[name]()
+    except BackendUnavailable as e:
+        logger.warning(f"Skipping {name}: {e}")
+        return {**result, "available": False, "error": str(e)}
+
+    try:
+        with PeakRSS() as rss:
+            started = time.perf_counter()
+            backend.load(model)
+            result["load_seconds"] = _round(time.perf_counter() - started)
+            result["load_rss_delta_mb"] = round(rss._rss_mb() - rss.start_mb, 1)
+
+            first_clip = next(iter(clips.values()))
+            backend.transcribe(first_clip[:SAMPLE_RATE], args.language)  # warm-up
+            result["first_segment_seconds"] = _round(backend.first_segment_seconds(first_clip, args.language))
+
+            result["clips"] = {
+                clip_name: benchmark_clip(backend, audio, args.repeats, args.language) for clip_name, audio in clips.items()
+            }
+
+            concurrency_clip = clips[min(clips, key=lambda clip_name: len(clips[clip_name]))]
+            result["concurrency"] = [
+                benchmark_concurrency(backend, concurrency_clip, clients, args.requests_per_client, args.language)
+                for clients in args.concurrency
+            ]
+        result["peak_rss_mb"] = round(rss.peak_mb, 1)
+    except Exception as e:
+        logger.error(f"{name} benchmark failed: {e}")
+        result["error"] = str(e)
+    finally:
+        backend.close()
+    return result
+
+
+def environment() -> Dict:
+    """Host and build details needed to compare two reports"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "memory_total_mb": round(psutil.virtual_memory().total / (1024 * 1024)),
+    }
+
+
+def compare(old: Dict, new: Dict) -> List[str]:
+    """Relative change of every numeric metric present in both reports"""
+
+    def flatten(report):
+        values = {}
+        for entry in report.get("results", []):
+            prefix = f"{entry['backend']}/{entry['model']}"
+
+            def walk(path, value):
+                if isinstance(value, dict):
+                    for key, item in value.items():
+                        walk(f"{path}.{key}", item)
+                elif isinstance(value, list):
+                    for item in value:
+                        walk(f"{path}[{item.get('clients', '?')}]", item)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[path] = value
+
+            for key, value in entry.items():
+                walk(f"{prefix}.{key}", value)
+        return values
+
+    before, after = flatten(old), flatten(new)
+    lines = []
+    for key in sorted(before.keys() & after.keys()):
+        if before[key] == after[key]:
+            continue
+        change = f"{(after[key] - before[key]) / before[key] * 100:+.1f}%" if before[key] else "new"
+        lines.append(f"{key}: {before[key]} -> {after[key]} ({change})")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the transcription backends")
+    parser.add_argument("--backend", nargs="+", default=["openai-whisper", "faster-whisper", "appliance"], choices=BACKENDS)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--audio", nargs="*", help="WAV/audio files to use instead of synthetic clips")
+    parser.add_argument("--durations", nargs="+", type=float, default=list(DEFAULT_DURATIONS))
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--requests-per-client", type=int, default=2)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two reports and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            print("\n".join(compare(json.load(old_file), json.load(new_file))) or "No differences")
+        return 0
+
+    clips = load_clips(args.audio, args.durations)
+    report = {
+        "schema": REPORT_SCHEMA,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {
+            "model": args.model,
+            "language": args.language,
+            "repeats": args.repeats,
+            "concurrency": args.concurrency,
+            "requests_per_client": args.requests_per_client,
+            "clips": {name: round(len(audio) / SAMPLE_RATE, 2) for name, audio in clips.items()},
+        },
+        "results": [run_backend(name, args.model, clips, args) for name in args.backend],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+        logger.info(f"Benchmark report written to {args.output}")
+    else:
+        print(output)
+    return 0 if all(result.get("available") is False or "error" not in result for result in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
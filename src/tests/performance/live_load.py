@@ -0,0 +1,380 @@
+"""
+Live speech load generator
+Simulates many browser clients speaking the SocketIO live-speech protocol (start_recording ->
+audio_chunk ... -> stop_recording) and replays audio at real-time pace, then reports end-to-end
+latency percentiles, dropped events and server CPU as JSON; --protocol binary sends PCM16 audio_frame
+messages after negotiate_audio instead of base64 WAV chunks
+
+    cd src && python -m tests.performance.live_load --spawn --clients 200 --duration 30
+    python -m tests.performance.live_load --url http://appliance:5001 --audio speech.wav --clients 20
+
+--spawn starts a local main.py with the stub model (WHISPER_STUB_MODEL), so no GPU or network is needed
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import psutil
+import requests
+import socketio
+
+from modules.audio_frames import CODEC_PCM16, encode_frame
+from modules.audio_ingest import SAMPLE_RATE
+
+from .audio_fixtures import load_clips, to_wav_bytes
+from .backends import SRC_DIR
+from .benchmark import _percentile, _round, environment
+
+logger = logging.getLogger(__name__)
+
+REPORT_SCHEMA = 1
+# main.py always listens here
+DEFAULT_URL = "http://localhost:5001"
+
+
+class ClientStats:
+    """What one simulated client sent and received"""
+
+    def __init__(self):
+        self.connected = False
+        self.chunks_sent = 0
+        self.partials = 0
+        self.partial_latencies: List[float] = []
+        self.final_latency: Optional[float] = None
+        self.busy = 0
+        self.errors: List[str] = []
+        self.missing: List[str] = []
+        self.disconnects = 0
+        self.max_send_lag = 0.0
+
+
+class LiveClient:
+    """One simulated browser tab: a SocketIO connection running a single recording session"""
+
+    def __init__(self, url: str, chunks: List, chunk_seconds: float, language: str, timeout: float, transports, binary=False):
+        self.url = url
+        self.chunks = chunks
+        self.chunk_seconds = chunk_seconds
+        self.language = language
+        self.timeout = timeout
+        self.transports = transports
+        self.binary = binary
+        self.stats = ClientStats()
+
+        self._sent_at: Dict[int, float] = {}
+        self._stop_sent_at = None
+        self._negotiated = threading.Event()
+        self._started = threading.Event()
+        self._stopped = threading.Event()
+        self._final = threading.Event()
+        self._lock = threading.Lock()
+        self._finishing = False
+
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on("audio_negotiated", lambda data: data.get("version") and self._negotiated.set())
+        self.sio.on("recording_started", lambda data: self._started.set())
+        self.sio.on("recording_stopped", lambda data: self._stopped.set())
+        self.sio.on("transcription_partial", self._on_partial)
+        self.sio.on("transcription_result", self._on_result)
+        self.sio.on("transcription_error", self._on_error)
+        self.sio.on("disconnect", self._on_disconnect)
+
+    def _on_partial(self, data):
+        received = time.perf_counter()
+        with self._lock:
+            self.stats.partials += 1
+            sent = self._sent_at.get(data.get("seq"))
+            if sent is not None:
+                self.stats.partial_latencies.append(received - sent)
+
+    def _on_result(self, data):
+        if data.get("final") and self._stop_sent_at is not None:
+            self.stats.final_latency = time.perf_counter() - self._stop_sent_at
+            self._final.set()
+
+    def _on_error(self, data):
+        with self._lock:
+            if data.get("error") == "Server busy":
+                self.stats.busy += 1
+            else:
+                self.stats.errors.append(data.get("error", "unknown"))
+
+    def _on_disconnect(self, *args):
+        if not self._finishing:
+            self.stats.disconnects += 1
+
+    def run(self):
+        try:
+            self.sio.connect(self.url, transports=self.transports, wait_timeout=self.timeout)
+        except Exception as e:
+            self.stats.errors.append(f"connect: {e}")
+            self.stats.missing.append("connect")
+            return
+        self.stats.connected = True
+
+        try:
+            if self.binary:
+                self.sio.emit("negotiate_audio", {"versions": [1], "codecs": ["pcm16"], "language": self.language})
+                if not self._negotiated.wait(self.timeout):
+                    self.stats.missing.append("audio_negotiated")
+                    return
+            self.sio.emit("start_recording", {"language": self.language})
+            if not self._started.wait(self.timeout):
+                self.stats.missing.append("recording_started")
+
+            # Absolute schedule, so a slow emit does not stretch the session
+            began = time.perf_counter()
+            for seq, chunk in enumerate(self.chunks):
+                due = began + seq * self.chunk_seconds
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self.stats.max_send_lag = max(self.stats.max_send_lag, -delay)
+                with self._lock:
+                    self._sent_at[seq] = time.perf_counter()
+                if self.binary:
+                    self.sio.emit("audio_frame", chunk)
+                else:
+                    self.sio.emit("audio_chunk", {"audio_data": chunk, "language": self.language, "seq": seq})
+                self.stats.chunks_sent += 1
+            time.sleep(max(0.0, began + len(self.chunks) * self.chunk_seconds - time.perf_counter()))
+
+            self._stop_sent_at = time.perf_counter()
+            self.sio.emit("stop_recording", {})
+            if not self._stopped.wait(self.timeout):
+                self.stats.missing.append("recording_stopped")
+            if not self._final.wait(self.timeout):
+                self.stats.missing.append("final_result")
+        except Exception as e:
+            self.stats.errors.append(str(e))
+        finally:
+            self._finishing = True
+            self.sio.disconnect()
+
+
+class ServerCPU:
+    """Samples the server's CPU: its process when the PID is known, otherwise the admin metrics API"""
+
+    def __init__(self, url: str, pid: Optional[int] = None, interval: float = 1.0):
+        self.url = url.rstrip("/")
+        self.process = psutil.Process(pid) if pid else None
+        self.interval = interval
+        self.samples: List[float] = []
+        self.rss_mb: List[float] = []
+        self.source = "process" if pid else "system_metrics_api"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="server-cpu", daemon=True)
+
+    def start(self):
+        if self.process is not None:
+            self.process.cpu_percent()  # first call only primes the counter
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if self.process is not None:
+                    with self.process.oneshot():
+                        self.samples.append(self.process.cpu_percent())
+                        self.rss_mb.append(self.process.memory_info().rss / (1024 * 1024))
+                else:
+                    latest = requests.get(f"{self.url}/api/v1/system/metrics", timeout=5).json().get("latest") or {}
+                    if "process_cpu_percent" in latest:
+                        self.samples.append(latest["process_cpu_percent"])
+            except Exception as e:
+                logger.debug(f"Server CPU sample failed: {e}")
+
+    def summary(self) -> Dict:
+        return {
+            "source": self.source,
+            "samples": len(self.samples),
+            "cpu_percent_avg": _round(float(np.mean(self.samples))) if self.samples else None,
+            "cpu_percent_p95": _round(_percentile(self.samples, 95)) if self.samples else None,
+            "cpu_percent_max": _round(max(self.samples)) if self.samples else None,
+            "rss_mb_max": round(max(self.rss_mb), 1) if self.rss_mb else None,
+        }
+
+
+def split_chunks(audio: np.ndarray, chunk_seconds: float) -> List[str]:
+    """Base64 WAV chunks, as the browser's MediaRecorder would send them"""
+    step = int(chunk_seconds * SAMPLE_RATE)
+    return [base64.b64encode(to_wav_bytes(audio[i : i + step])).decode("ascii") for i in range(0, len(audio), step)]
+
+
+def split_frames(audio: np.ndarray, chunk_seconds: float) -> List[bytes]:
+    """Binary PCM16 audio frames, numbered in order"""
+    step = int(chunk_seconds * SAMPLE_RATE)
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    return [encode_frame(pcm[i : i + step].tobytes(), seq, CODEC_PCM16) for seq, i in enumerate(range(0, len(pcm), step))]
+
+
+def spawn_server(url: str, stub_realtime_factor: float, startup_timeout: float = 60.0) -> subprocess.Popen:
+    """Start main.py with the stub model and wait until /health answers"""
+    env = {**os.environ, "WHISPER_STUB_MODEL": str(stub_realtime_factor)}
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (code {server.returncode})")
+        try:
+            if requests.get(f"{url}/health", timeout=2).ok:
+                return server
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"Server did not become healthy within {startup_timeout:.0f}s")
+
+
+def run_load(args, server_pid: Optional[int] = None) -> Dict:
+    """Ramp up the simulated clients, wait for every session to finish and aggregate the results"""
+    clips = list(load_clips(args.audio, [args.duration]).values())
+    split = split_frames if args.protocol == "binary" else split_chunks
+    chunked = [split(audio, args.chunk_seconds) for audio in clips]
+    # "auto" starts on long-polling and upgrades to WebSocket when websocket-client is installed
+    transports = None if args.transport == "auto" else [args.transport]
+
+    clients = [
+        LiveClient(
+            args.url,
+            chunked[i % len(chunked)],
+            args.chunk_seconds,
+            args.language,
+            args.timeout,
+            transports,
+            binary=args.protocol == "binary",
+        )
+        for i in range(args.clients)
+    ]
+
+    cpu = ServerCPU(args.url, server_pid)
+    cpu.start()
+    started = time.perf_counter()
+    threads = []
+    for i, client in enumerate(clients):
+        thread = threading.Thread(target=client.run, name=f"live-client-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+        if args.ramp_seconds and args.clients > 1:
+            time.sleep(args.ramp_seconds / (args.clients - 1))
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    cpu.stop()
+
+    stats = [client.stats for client in clients]
+    partial = [latency for s in stats for latency in s.partial_latencies]
+    final = [s.final_latency for s in stats if s.final_latency is not None]
+    missing = {}
+    for s in stats:
+        for event in s.missing:
+            missing[event] = missing.get(event, 0) + 1
+    errors = [error for s in stats for error in s.errors]
+
+    return {
+        "wall_seconds": _round(elapsed),
+        "clients_connected": sum(s.connected for s in stats),
+        "sessions_completed": sum(s.connected and not s.missing for s in stats),
+        "chunks_sent": sum(s.chunks_sent for s in stats),
+        "partials_received": sum(s.partials for s in stats),
+        "partial_latency": _latency_summary(partial),
+        "final_latency": _latency_summary(final),
+        "dropped": {
+            "missing_events": missing,
+            "server_busy": sum(s.busy for s in stats),
+            "errors": len(errors),
+            "unexpected_disconnects": sum(s.disconnects for s in stats),
+        },
+        "error_samples": sorted(set(errors))[:10],
+        # A lagging sender means this machine, not the server, was the bottleneck
+        "client_max_send_lag_seconds": _round(max((s.max_send_lag for s in stats), default=0.0)),
+        "server": cpu.summary(),
+    }
+
+
+def _latency_summary(values: List[float]) -> Dict:
+    return {
+        "count": len(values),
+        "p50": _round(_percentile(values, 50)),
+        "p90": _round(_percentile(values, 90)),
+        "p95": _round(_percentile(values, 95)),
+        "p99": _round(_percentile(values, 99)),
+        "max": _round(max(values, default=0.0)),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the SocketIO live speech protocol")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--ramp-seconds", type=float, default=10.0, help="Spread client start-up over this long")
+    parser.add_argument("--audio", nargs="*", help="WAV/audio files to replay (default: synthetic speech)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Synthetic clip length in seconds")
+    parser.add_argument("--chunk-seconds", type=float, default=1.0)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for each expected event")
+    parser.add_argument("--transport", choices=["auto", "websocket", "polling"], default="auto")
+    parser.add_argument("--protocol", choices=["json", "binary"], default="json", help="base64 JSON chunks or binary frames")
+    parser.add_argument("--spawn", action="store_true", help="Start a local server with the stub model")
+    parser.add_argument("--stub-rtf", type=float, default=0.05, help="Realtime factor of the spawned stub model")
+    parser.add_argument("--server-pid", type=int, help="PID of an already running local server, for process CPU")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    # Each simulated client would otherwise log its own connection chatter
+    logging.getLogger("socketio").setLevel(logging.WARNING)
+    logging.getLogger("engineio").setLevel(logging.WARNING)
+
+    server = spawn_server(args.url, args.stub_rtf) if args.spawn else None
+    try:
+        logger.info(f"Running {args.clients} live sessions against {args.url}")
+        result = run_load(args, server.pid if server else args.server_pid)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "schema": REPORT_SCHEMA,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {
+            "url": args.url,
+            "clients": args.clients,
+            "ramp_seconds": args.ramp_seconds,
+            "chunk_seconds": args.chunk_seconds,
+            "transport": args.transport,
+            "protocol": args.protocol,
+            "stub_realtime_factor": args.stub_rtf if args.spawn else None,
+        },
+        "result": result,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+        logger.info(f"Load test report written to {args.output}")
+    else:
+        print(output)
+    return 0 if result["sessions_completed"] == args.clients else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
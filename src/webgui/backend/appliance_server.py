@@ -16,7 +16,6 @@ Complete Speech-to-Text Appliance with:
 
 import asyncio
 import base64
-import gc
 import json
 import logging
 import os
@@ -26,14 +25,15 @@ import shutil
 import signal
 import socket
 import subprocess
-import tempfile
+import sys
 import threading
 import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Union
 
+import numpy as np
 import psutil
 import uvicorn
 
@@ -43,6 +43,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+# Shared audio ingest from the main application modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from modules.audio_frames import CODEC_ENCODED, FrameDecoder, capabilities, negotiate, parse_frame  # noqa: E402
+from modules.audio_ingest import (  # noqa: E402
+    SAMPLE_RATE,
+    AudioDecodeError,
+    StreamDecoder,
+    container_format,
+    decode_audio,
+)
+from modules.model_cache import ModelCache  # noqa: E402
+
 # Logging setup
 logging.basicConfig(
     level=logging.INFO,
@@ -63,7 +75,7 @@ class ApplianceState:
         self.system_ready = False
         self.max_ram_usage = 3.0  # GB
         self.max_cpu_usage = 80  # Percentage
-        self.model_cache = {}
+        self.model_cache = None  # ModelCache, created by the model manager
         self.processing_queue = asyncio.Queue()
         self.stats = {
             "total_transcriptions": 0,
@@ -186,12 +198,10 @@ class SystemResourceManager:
         return f"{days}d {hours}h {minutes}m"
 
     def _get_model_ram_usage(self):
-        """Estimate RAM usage of current Whisper model"""
-        if not state.current_model:
+        """RAM used by all resident Whisper models (measured where possible)"""
+        if not state.model_cache:
             return 0
-
-        model_sizes = {"tiny": 150, "base": 300, "small": 800, "medium": 2000, "large": 4000}  # MB
-        return model_sizes.get(state.current_model_name, 0)
+        return round(state.model_cache.resident_mb())
 
 
 # Initialize resource manager
@@ -210,21 +220,61 @@ class EnhancedWhisperModelManager:
             "medium": {"size_mb": 769, "ram_mb": 2000, "description": "High accuracy"},
             "large": {"size_mb": 1550, "ram_mb": 4000, "description": "Best accuracy"},
         }
+        # Previously used models stay resident within the RAM limit, evicted least recently used first
+        state.model_cache = ModelCache(
+            self._load_instance,
+            budget_mb=state.max_ram_usage * 1024,
+            estimates_mb={name: info["ram_mb"] for name, info in self.model_info.items()},
+        )
+
+    def _load_instance(self, model_name: str):
+        """Model cache loader: Faster-Whisper (int8), falling back to OpenAI-Whisper"""
+        try:
+            from faster_whisper import WhisperModel
+
+            model = WhisperModel(model_name, device="cpu", compute_type="int8")
+            model.model_type = "faster-whisper"
+            logger.info(f"Faster-Whisper {model_name} loaded successfully")
+            return model
+        except Exception as e:
+            logger.warning(f"Faster-Whisper failed: {e}, trying OpenAI-Whisper")
+
+        try:
+            import whisper
+
+            model = whisper.load_model(model_name)
+            model.model_type = "openai-whisper"
+            logger.info(f"OpenAI-Whisper {model_name} loaded successfully")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to load model {model_name}: {e}")
+            return None
+
+    async def get_model(self, model_name: Optional[str] = None):
+        """A model for one request - the current model, or any other from the cache without switching"""
+        if not model_name or model_name == state.current_model_name:
+            return state.current_model
+        if model_name not in self.model_info:
+            raise HTTPException(status_code=400, detail=f"Unknown model: {model_name}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, state.model_cache.get, model_name)
 
     async def load_model_with_limits(self, model_name: str):
         """Load model with resource limit checking"""
         if state.model_loading:
             raise HTTPException(status_code=409, detail="Another model is currently loading")
 
-        # Check RAM availability
-        memory = psutil.virtual_memory()
-        available_gb = memory.available / (1024**3)
         required_gb = self.model_info[model_name]["ram_mb"] / 1024
-
-        if required_gb > available_gb:
-            raise HTTPException(
-                status_code=507, detail=f"Insufficient RAM: {required_gb:.1f}GB required, {available_gb:.1f}GB available"
-            )
+        resident = state.model_cache.peek(model_name) is not None
+
+        # Check RAM availability - evicting idle cached models frees memory for the new one
+        if not resident:
+            memory = psutil.virtual_memory()
+            available_gb = (memory.available / (1024**2) + state.model_cache.resident_mb()) / 1024
+            if required_gb > available_gb:
+                raise HTTPException(
+                    status_code=507, detail=f"Insufficient RAM: {required_gb:.1f}GB required, {available_gb:.1f}GB available"
+                )
 
         # Check if loading would exceed limits
         if required_gb > state.max_ram_usage:
@@ -232,42 +282,21 @@ class EnhancedWhisperModelManager:
                 status_code=507, detail=f"Model exceeds RAM limit: {required_gb:.1f}GB > {state.max_ram_usage:.1f}GB"
             )
 
-        # Unload current model to free memory
-        if state.current_model:
-            logger.info(f"Unloading current model: {state.current_model_name}")
-            del state.current_model
-            state.current_model = None
-            gc.collect()
-
         state.model_loading = True
 
         try:
-            logger.info(f"Loading Whisper model: {model_name}")
-
-            # Try Faster-Whisper first
-            try:
-                from faster_whisper import WhisperModel
-
-                state.current_model = WhisperModel(model_name, device="cpu", compute_type="int8")
-                state.current_model.model_type = "faster-whisper"
-                logger.info(f"Faster-Whisper {model_name} loaded successfully")
-
-            except Exception as e:
-                logger.warning(f"Faster-Whisper failed: {e}, trying OpenAI-Whisper")
-                import whisper
-
-                state.current_model = whisper.load_model(model_name)
-                state.current_model.model_type = "openai-whisper"
-                logger.info(f"OpenAI-Whisper {model_name} loaded successfully")
-
+            logger.info(f"{'Switching to resident' if resident else 'Loading'} Whisper model: {model_name}")
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(None, state.model_cache.get, model_name)
+            if model is None:
+                raise HTTPException(status_code=500, detail=f"Model loading failed: {model_name}")
+
+            state.model_cache.pin(model_name)
+            state.current_model = model
             state.current_model_name = model_name
             state.stats["last_model_load"] = datetime.now()
 
             return True
-
-        except Exception as e:
-            logger.error(f"Failed to load model {model_name}: {e}")
-            raise HTTPException(status_code=500, detail=f"Model loading failed: {str(e)}")
         finally:
             state.model_loading = False
 
@@ -298,9 +327,36 @@ class EnhancedWhisperModelManager:
 model_manager = EnhancedWhisperModelManager()
 
 
+def transcribe_sync(model, audio: np.ndarray, language_code: Optional[str]):
+    """Blocking model call, run in the executor so one client's inference never stalls the event loop
+
+    Returns (transcript, detected_language)
+    """
+    # Check model type and process accordingly
+    model_type = getattr(model, "model_type", "unknown")
+
+    if model_type == "faster-whisper" or hasattr(model, "model"):
+        # faster-whisper decodes while the segments are iterated
+        segments, info = model.transcribe(audio, language=language_code, beam_size=5, word_timestamps=False)
+        transcript = "".join(segment.text for segment in segments).strip()
+        return transcript, info.language if hasattr(info, "language") else "unknown"
+
+    # OpenAI Whisper
+    result = model.transcribe(audio, language=language_code, fp16=False, verbose=False)
+    return result.get("text", "").strip(), result.get("language", "unknown")
+
+
 # Audio processing with resource management
-async def process_real_audio_managed(audio_data_base64: str, language: str = "auto", audio_format: str = "webm"):
-    """Process audio with resource monitoring"""
+async def process_real_audio_managed(
+    audio_data: Union[str, bytes, np.ndarray],
+    language: str = "auto",
+    audio_format: str = "webm",
+    model_name: Optional[str] = None,
+):
+    """Process audio with resource monitoring; model_name picks a cached model for this request only
+
+    audio_data is base64 text from JSON clients, encoded bytes, or samples already decoded from a binary frame
+    """
     start_time = time.time()
 
     try:
@@ -308,61 +364,73 @@ async def process_real_audio_managed(audio_data_base64: str, language: str = "au
         cpu_usage = psutil.cpu_percent()
         if cpu_usage > state.max_cpu_usage:
             logger.warning(f"High CPU usage ({cpu_usage}%), queuing request")
-            await state.processing_queue.put((audio_data_base64, language, audio_format))
+            await state.processing_queue.put((audio_data, language, audio_format))
             return "Audio queued due to high system load"
 
-        # Process audio
-        audio_bytes = base64.b64decode(audio_data_base64)
+        # Process audio - decoded in memory, nothing is written to disk
+        loop = asyncio.get_running_loop()
+        if isinstance(audio_data, np.ndarray):
+            audio = audio_data
+        else:
+            audio_bytes = base64.b64decode(audio_data) if isinstance(audio_data, str) else audio_data
+            audio = await loop.run_in_executor(None, decode_audio, audio_bytes)
 
-        with tempfile.NamedTemporaryFile(suffix=f".{audio_format}", delete=False) as temp_file:
-            temp_file.write(audio_bytes)
-            temp_audio_path = temp_file.name
+        model = await model_manager.get_model(model_name)
+        if not model:
+            return "No Whisper model loaded"
 
-        try:
-            if not state.current_model:
-                return "No Whisper model loaded"
-
-            language_code = None if language == "auto" else language
+        language_code = None if language == "auto" else language
+        transcript, detected_language = await loop.run_in_executor(None, transcribe_sync, model, audio, language_code)
 
-            # Check model type and process accordingly
-            model_type = getattr(state.current_model, "model_type", "unknown")
-
-            if model_type == "faster-whisper" or hasattr(state.current_model, "model"):
-                segments, info = state.current_model.transcribe(
-                    temp_audio_path, language=language_code, beam_size=5, word_timestamps=False
-                )
+        # Update statistics
+        processing_time = time.time() - start_time
+        state.stats["total_transcriptions"] += 1
+        state.stats["total_audio_minutes"] += len(audio) / (SAMPLE_RATE * 60)
 
-                transcript_parts = []
-                for segment in segments:
-                    transcript_parts.append(segment.text)
+        logger.info(f"Audio processed in {processing_time:.2f}s: {transcript[:50]}...")
 
-                transcript = "".join(transcript_parts).strip()
-                detected_language = info.language if hasattr(info, "language") else "unknown"
+        return transcript if transcript else "No speech detected"
 
-            else:
-                # OpenAI Whisper
-                result = state.current_model.transcribe(temp_audio_path, language=language_code, fp16=False, verbose=False)
-                transcript = result.get("text", "").strip()
-                detected_language = result.get("language", "unknown")
+    except AudioDecodeError as e:
+        logger.warning(f"Audio decoding failed ({audio_format}): {e}")
+        return f"Error decoding audio: {str(e)}"
+    except Exception as e:
+        logger.error(f"Audio processing error: {e}")
+        return f"Error processing audio: {str(e)}"
 
-            # Update statistics
-            processing_time = time.time() - start_time
-            state.stats["total_transcriptions"] += 1
-            state.stats["total_audio_minutes"] += len(audio_bytes) / (16000 * 2 * 60)  # Rough estimate
 
-            logger.info(f"Audio processed in {processing_time:.2f}s: {transcript[:50]}...")
+class ConnectionAudio:
+    """Decoding state of one WebSocket: the negotiated frame decoder and a persistent WebM/Ogg stream decoder"""
 
-            return transcript if transcript else "No speech detected"
+    def __init__(self):
+        self.frames: Optional[FrameDecoder] = None
+        self.stream: Optional[StreamDecoder] = None
+
+    async def decode_encoded(self, data: bytes) -> Union[bytes, np.ndarray]:
+        """MediaRecorder chunks (only the first has a header) feed one ffmpeg process; complete files pass through"""
+        input_format = container_format(data[:4])
+        if input_format is None and self.stream is None:
+            return data
+        if input_format is not None:
+            self.close()
+            self.stream = StreamDecoder(input_format)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.stream.feed, data)
+        except AudioDecodeError:
+            self.close()
+            raise
 
-        finally:
-            try:
-                os.unlink(temp_audio_path)
-            except:
-                pass
+    async def decode_frame(self, data: bytes):
+        """Parse a binary frame; PCM is read in place, encoded payloads are decoded off the event loop"""
+        frame = parse_frame(data)
+        if frame.codec == CODEC_ENCODED:
+            return frame, await self.decode_encoded(bytes(frame.payload))
+        return frame, self.frames.decode(frame)
 
-    except Exception as e:
-        logger.error(f"Audio processing error: {e}")
-        return f"Error processing audio: {str(e)}"
+    def close(self):
+        if self.stream is not None:
+            self.stream.kill()
+            self.stream = None
 
 
 # Lifespan events
@@ -408,6 +476,66 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.websocket("/ws/audio")
+async def websocket_audio(websocket: WebSocket):
+    """Live transcription: base64 JSON chunks, or binary audio frames once the client negotiated them"""
+    await websocket.accept()
+    state.connected_clients.add(websocket)
+    audio_state = ConnectionAudio()
+    options = {"language": "auto", "model": None}
+    await websocket.send_json({"type": "connected", "audio_frames": capabilities()})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                if audio_state.frames is None:
+                    await websocket.send_json({"type": "error", "error": "Send a negotiate action before binary frames"})
+                    continue
+                try:
+                    frame, audio = await audio_state.decode_frame(message["bytes"])
+                except AudioDecodeError as e:
+                    await websocket.send_json({"type": "error", "error": f"Could not decode audio frame: {e}"})
+                    continue
+                if isinstance(audio, np.ndarray) and len(audio) == 0:
+                    continue  # a stream chunk ffmpeg has not produced samples for yet
+                text = await process_real_audio_managed(audio, options["language"], "frame", options["model"])
+                await websocket.send_json({"type": "transcription", "text": text, "seq": frame.seq, "session": frame.session})
+                continue
+
+            data = json.loads(message.get("text") or "{}")
+            if data.get("action") == "negotiate":
+                reply = negotiate(data)
+                audio_state.frames = FrameDecoder() if reply["version"] is not None else None
+                options = {"language": data.get("language", "auto"), "model": data.get("model")}
+                await websocket.send_json({"type": "audio_negotiated", **reply})
+            elif data.get("audio_data"):
+                # Clients that never negotiated keep sending base64 JSON
+                try:
+                    audio = await audio_state.decode_encoded(base64.b64decode(data["audio_data"]))
+                except (AudioDecodeError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "error": f"Could not decode audio: {e}"})
+                    continue
+                if isinstance(audio, np.ndarray) and len(audio) == 0:
+                    continue
+                text = await process_real_audio_managed(
+                    audio, data.get("language", "auto"), data.get("format", "webm"), data.get("model")
+                )
+                reply = {"type": "transcription", "text": text}
+                if "seq" in data:
+                    reply["seq"] = data["seq"]
+                await websocket.send_json(reply)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        audio_state.close()
+        state.connected_clients.discard(websocket)
+
+
 # Mount static files (will be created)
 # app.mount("/static", StaticFiles(directory="static"), name="static")
 
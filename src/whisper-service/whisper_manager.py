@@ -6,6 +6,8 @@ Real Speech-to-Text functionality for the appliance
 
 import asyncio
 import logging
+import os
+import sys
 import threading
 import time
 from collections import deque
@@ -14,6 +16,24 @@ from typing import Any, Dict, List, Optional
 import numpy as np
 from faster_whisper import WhisperModel
 
+# Shared VAD and micro-batching from the main application modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from modules.vad import VoiceActivityDetector
+
+    VAD_AVAILABLE = True
+except ImportError:
+    VoiceActivityDetector = None
+    VAD_AVAILABLE = False
+
+try:
+    from modules.batching import MicroBatcher, pad_batch, segments_from_tokens
+
+    BATCHING_AVAILABLE = True
+except ImportError:
+    MicroBatcher = None
+    BATCHING_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +53,12 @@ class WhisperManager:
         self.audio_buffer = deque(maxlen=50)  # 50 chunks buffer
         self.transcription_thread = None
 
+        # Concurrent short requests share one batched encoder/decoder pass
+        self.batcher = None
+        if BATCHING_AVAILABLE:
+            self.batcher = MicroBatcher(self._run_batch_sync, max_batch_size=8, max_wait_ms=50)
+            self.batcher.start()
+
     async def load_model(self, model_name: str) -> Dict[str, Any]:
         """Load a Whisper model asynchronously"""
         if model_name not in self.available_models:
@@ -95,7 +121,10 @@ class WhisperManager:
             loop = asyncio.get_event_loop()
             start_time = time.time()
 
-            result = await loop.run_in_executor(None, self._transcribe_sync, audio_data, language)
+            if self.batcher is not None and MicroBatcher.fits(audio_data):
+                result = await asyncio.wrap_future(self.batcher.submit(audio_data, key=language))
+            else:
+                result = await loop.run_in_executor(None, self._transcribe_sync, audio_data, language)
 
             transcription_time = time.time() - start_time
 
@@ -147,6 +176,53 @@ class WhisperManager:
             logger.error(f"Sync transcription error: {e}")
             return {"text": "", "language": "unknown", "confidence": 0.0, "error": str(e)}
 
+    def _run_batch_sync(
+        self, language: Optional[str], audios: List[np.ndarray], prompts: List[Optional[str]]
+    ) -> List[Dict[str, Any]]:
+        """Micro-batcher callback - one batch per language (this service submits no prompts)"""
+        return self._transcribe_batch_sync(audios, language)
+
+    def _transcribe_batch_sync(self, audios: List[np.ndarray], language: str = None) -> List[Dict[str, Any]]:
+        """Batched transcription of segments up to 30 s via the CTranslate2 encoder/decoder"""
+        import ctranslate2
+        from faster_whisper.tokenizer import Tokenizer
+
+        whisper = self.model.model
+        features = np.stack([self.model.feature_extractor(row)[:, :3000] for row in pad_batch(audios)])
+        encoder_output = whisper.encode(ctranslate2.StorageView.from_array(np.ascontiguousarray(features, dtype=np.float32)))
+
+        # Each segment keeps its own language; prompts may differ within one generate call
+        if language is None and whisper.is_multilingual:
+            languages = [candidates[0][0][2:-2] for candidates in whisper.detect_language(encoder_output)]
+        else:
+            languages = [language or "en"] * len(audios)
+
+        tokenizers = [
+            Tokenizer(self.model.hf_tokenizer, whisper.is_multilingual, task="transcribe", language=lang) for lang in languages
+        ]
+        prompts = [self.model.get_prompt(tokenizer, [], without_timestamps=False) for tokenizer in tokenizers]
+        outputs = whisper.generate(
+            encoder_output, prompts, beam_size=1, max_length=self.model.max_length, return_no_speech_prob=True
+        )
+
+        results = []
+        for audio, lang, tokenizer, output in zip(audios, languages, tokenizers, outputs):
+            if output.no_speech_prob > 0.6:
+                results.append({"text": "", "language": lang, "confidence": 0.0, "segments": []})
+                continue
+            segments = segments_from_tokens(
+                output.sequences_ids[0], tokenizer.timestamp_begin, tokenizer.decode, len(audio) / 16000
+            )
+            results.append(
+                {
+                    "text": " ".join(segment["text"].strip() for segment in segments),
+                    "language": lang,
+                    "confidence": 1.0 - output.no_speech_prob,
+                    "segments": segments,
+                }
+            )
+        return results
+
     def get_model_info(self) -> Dict[str, Any]:
         """Get current model information"""
         return {
@@ -165,6 +241,7 @@ class AudioProcessor:
         self.sample_rate = sample_rate
         self.chunk_duration = 1.0  # 1 second chunks
         self.chunk_size = int(sample_rate * self.chunk_duration)
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate) if VAD_AVAILABLE else None
 
     def generate_test_audio(self, duration: float = 2.0, frequency: float = 440.0) -> np.ndarray:
         """Generate test audio for testing"""
@@ -190,6 +267,14 @@ class AudioProcessor:
         if np.max(np.abs(audio_data)) > 0:
             audio_data = audio_data / np.max(np.abs(audio_data))
 
+        if self.vad is not None:
+            # Silence outside the detected speech regions is zeroed as a whole,
+            # instead of gating individual samples inside words
+            gated = np.zeros_like(audio_data)
+            for start, end in self.vad.speech_regions(audio_data):
+                gated[start:end] = audio_data[start:end]
+            return gated
+
         # Simple noise gate (remove very quiet parts)
         threshold = 0.01
         audio_data[np.abs(audio_data) < threshold] = 0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from modules.audio_frames import (
+    CODEC_FLOAT32,
+    CODEC_PCM16,
+    FrameDecoder,
+    FrameError,
+    encode_frame,
+    negotiate,
+    parse_frame,
+)
+
+
+def test_pcm16_frame_round_trip():
+    pcm = (np.linspace(-0.5, 0.5, 1600) * 32767).astype("<i2")
+    frame = parse_frame(encode_frame(pcm.tobytes(), seq=7, session="tab-1"))
+    assert (frame.seq, frame.session, frame.codec, frame.sample_rate) == (7, "tab-1", CODEC_PCM16, 16000)
+
+    audio = FrameDecoder().decode(frame)
+    assert audio.dtype == np.float32 and len(audio) == 1600
+    np.testing.assert_allclose(audio, pcm / 32768.0, atol=1e-6)
+
+
+def test_float32_frames_are_downmixed_and_resampled():
+    stereo = np.tile(np.float32([0.25, 0.75]), 4800)  # 0.1 s at 48 kHz, two channels
+    frame = encode_frame(stereo.tobytes(), codec=CODEC_FLOAT32, sample_rate=48000, channels=2)
+    audio = FrameDecoder().decode(parse_frame(frame))
+    assert len(audio) == 1600
+    np.testing.assert_allclose(audio, 0.5)
+
+
+def test_malformed_frames_are_rejected():
+    with pytest.raises(FrameError):
+        parse_frame(b"{}")
+    with pytest.raises(FrameError):
+        FrameDecoder().decode(parse_frame(encode_frame(b"\x00\x00\x00")))
+
+
+def test_negotiation_falls_back_for_unknown_offers():
+    assert negotiate({"versions": [1], "codecs": ["vorbis", "pcm16"]})["codecs"] == ["pcm16"]
+    assert negotiate({"versions": [2], "codecs": ["pcm16"]})["version"] is None
@@ -0,0 +1,114 @@
+import io
+import struct
+import subprocess
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+from modules.audio_ingest import (
+    AudioDecodeError,
+    StreamDecoder,
+    audio_duration,
+    container_format,
+    decode_audio,
+    decode_stream,
+    ffmpeg_available,
+)
+
+
+def make_wav(samples, channels=1, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.asarray(samples, dtype="<i2").tobytes())
+    return buffer.getvalue()
+
+
+def make_float_wav(samples, rate=16000):
+    data = np.asarray(samples, dtype="<f4").tobytes()
+    fmt = struct.pack("<HHIIHH", 3, 1, rate, rate * 4, 4, 32)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_pcm16_wav_decodes_without_ffmpeg():
+    audio = decode_audio(make_wav([0, 16384, -32768, 32767]))
+    assert audio.dtype == np.float32
+    np.testing.assert_allclose(audio, [0.0, 0.5, -1.0, 32767 / 32768], rtol=1e-6)
+
+
+def test_stereo_wav_is_downmixed():
+    audio = decode_audio(make_wav([16384, 0, -16384, -16384], channels=2))
+    np.testing.assert_allclose(audio, [0.25, -0.5])
+
+
+def test_float_wav_and_stream():
+    payload = make_float_wav([0.1, -0.2, 0.3])
+    np.testing.assert_allclose(decode_audio(payload), [0.1, -0.2, 0.3], rtol=1e-6)
+    np.testing.assert_allclose(decode_stream(io.BytesIO(payload)), [0.1, -0.2, 0.3], rtol=1e-6)
+
+
+def test_audio_duration():
+    assert audio_duration(np.zeros(8000, dtype=np.float32)) == 0.5
+
+
+def test_empty_payload_rejected():
+    with pytest.raises(AudioDecodeError):
+        decode_audio(b"")
+    with pytest.raises(AudioDecodeError):
+        decode_stream(io.BytesIO(b""))
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+def test_resampled_wav_goes_through_ffmpeg():
+    audio = decode_audio(make_wav(np.zeros(44100, dtype=np.int16), rate=44100))
+    assert abs(len(audio) - 16000) < 200
+
+
+@pytest.mark.skipif(ffmpeg_available(), reason="ffmpeg installed")
+def test_non_wav_without_ffmpeg_raises():
+    with pytest.raises(AudioDecodeError):
+        decode_stream(io.BytesIO(b"OggS" + b"\0" * 64))
+
+
+def test_truncated_wav_header_is_a_decode_error():
+    # fmt chunk declares 16 bytes but the upload stops after 2
+    payload = b"RIFF" + struct.pack("<I", 14) + b"WAVE" + b"fmt " + struct.pack("<I", 16) + b"\x01\x00"
+    with pytest.raises(AudioDecodeError):
+        decode_audio(payload)
+
+
+def test_stream_decode_survives_a_chatty_ffmpeg(monkeypatch):
+    from modules import audio_ingest
+
+    # Fills the stderr pipe before writing any PCM, as ffmpeg does on a long stream of warnings
+    script = "import sys; sys.stderr.write('w' * 10**6); sys.stderr.flush(); sys.stdout.buffer.write(sys.stdin.buffer.read())"
+    monkeypatch.setattr(audio_ingest, "_ffmpeg_command", lambda sample_rate: [sys.executable, "-c", script])
+
+    audio = decode_stream(io.BytesIO(b"OggS" + np.array([16384, -16384], dtype="<i2").tobytes()))
+    assert len(audio) == 4
+
+
+def test_container_format_detects_mediarecorder_streams():
+    assert container_format(b"\x1a\x45\xdf\xa3\x01") == "matroska"
+    assert container_format(b"OggS\x00") == "ogg"
+    assert container_format(make_wav([0])) is None
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg not installed")
+def test_stream_decoder_joins_chunks_without_headers():
+    recording = subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-c:a", "pcm_s16le", "-f", "matroska", "pipe:1"],
+        input=make_wav(np.zeros(32000, dtype=np.int16)),
+        capture_output=True,
+        check=True,
+    ).stdout
+    # Only the first chunk starts with the container header, as with MediaRecorder timeslices
+    chunks = [recording[i : i + len(recording) // 5 + 1] for i in range(0, len(recording), len(recording) // 5 + 1)]
+    decoder = StreamDecoder(container_format(chunks[0]))
+    samples = sum(len(decoder.feed(chunk)) for chunk in chunks) + len(decoder.close())
+    assert abs(samples - 32000) < 400
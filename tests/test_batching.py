@@ -0,0 +1,189 @@
+import importlib.util
+import os
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from modules.batching import BATCH_SAMPLES, MicroBatcher, pad_batch, segments_from_tokens
+from modules.inference_pool import InferenceQueueFull
+
+
+@pytest.fixture
+def batcher():
+    batchers = []
+
+    def make(run_batch, **kwargs):
+        b = MicroBatcher(run_batch, **kwargs)
+        b.start()
+        batchers.append(b)
+        return b
+
+    yield make
+    for b in batchers:
+        b.shutdown()
+
+
+def test_concurrent_requests_share_a_batch(batcher):
+    calls = []
+
+    def run_batch(key, audios, prompts):
+        calls.append((key, len(audios)))
+        return [{"text": f"{key}:{int(audio[0])}"} for audio in audios]
+
+    b = batcher(run_batch, max_batch_size=4, max_wait_ms=200)
+    futures = [b.submit(np.full(160, i, dtype=np.float32), key="en") for i in range(4)]
+
+    assert [f.result(timeout=5)["text"] for f in futures] == ["en:0", "en:1", "en:2", "en:3"]
+    assert calls == [("en", 4)]
+    assert b.get_status()["average_batch_size"] == 4
+
+
+def test_batches_are_grouped_by_key(batcher):
+    calls = []
+
+    def run_batch(key, audios, prompts):
+        calls.append(key)
+        return [{"text": key}] * len(audios)
+
+    b = batcher(run_batch, max_batch_size=8, max_wait_ms=200)
+    futures = [b.submit(np.zeros(160, dtype=np.float32), key=key) for key in ("de", "en", "de")]
+    assert [f.result(timeout=5)["text"] for f in futures] == ["de", "en", "de"]
+    assert sorted(calls) == ["de", "en"]
+
+
+def test_future_results_fan_out_and_errors_propagate(batcher):
+    pending = Future()
+    b = batcher(lambda key, audios, prompts: pending, max_batch_size=2, max_wait_ms=200)
+    first = b.submit(np.zeros(160, dtype=np.float32))
+    second = b.submit(np.zeros(160, dtype=np.float32))
+
+    threading.Timer(0.05, pending.set_exception, args=(RuntimeError("model crashed"),)).start()
+    for future in (first, second):
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_long_audio_is_not_batched(batcher):
+    b = batcher(lambda key, audios, prompts: [None] * len(audios))
+    with pytest.raises(ValueError):
+        b.submit(np.zeros(31 * 16000, dtype=np.float32))
+
+
+def test_full_queue_raises_queue_full(batcher):
+    started, gate = threading.Event(), threading.Event()
+
+    def run_batch(key, audios, prompts):
+        started.set()
+        gate.wait(timeout=5)
+        return [{"text": ""}] * len(audios)
+
+    b = batcher(run_batch, max_batch_size=1, max_wait_ms=0, queue_size=1, retry_after_seconds=3)
+    first = b.submit(np.zeros(160, dtype=np.float32))
+    assert started.wait(timeout=5)
+    second = b.submit(np.zeros(160, dtype=np.float32))
+    with pytest.raises(InferenceQueueFull) as error:
+        b.submit(np.zeros(160, dtype=np.float32))
+    assert error.value.retry_after == 3 and b.get_status()["rejected"] == 1
+    gate.set()
+    assert first.result(timeout=5) and second.result(timeout=5)
+
+
+class BatchingManager:
+    """Fake model manager with a natively batching backend that records each batched call"""
+
+    features = None
+
+    class backend:
+        supports_batching = True
+
+    def __init__(self):
+        self.batches = []
+
+    def get_current_model_name(self):
+        return "base"
+
+    def get_model_for(self, model_name):
+        class Model:
+            def transcribe(self, audio, **options):
+                return {"text": "direct", "language": "en", "options": options}
+
+        return Model()
+
+    def transcribe_batch(self, audios, model=None, language=None, prompts=None, word_timestamps=False):
+        self.batches.append((len(audios), language, list(prompts), word_timestamps))
+        words = [{"word": " hi", "start": 0.0, "end": 0.5}]
+        return [{"text": "hi", "language": language or "en", "segments": [{"words": words}]}] * len(audios)
+
+
+def test_concurrent_streaming_sessions_share_one_batched_pass():
+    from modules.live_speech import LiveSpeechHandler
+
+    manager = BatchingManager()
+    config = {"enabled": True, "max_batch_size": 2, "max_wait_ms": 2000}
+    handler = LiveSpeechHandler(manager, True, {}, [], None, batching_config=config)
+    try:
+        for sid in ("a", "b"):
+            handler.streaming.start_session(sid, language="de")
+        results = {}
+
+        def feed(sid):
+            results[sid] = handler.streaming.feed(sid, np.zeros(16000, dtype=np.float32))
+
+        threads = [threading.Thread(target=feed, args=(sid,)) for sid in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # Word timestamps, no conditioning and a per-session prompt all stay on the batched path
+        assert manager.batches == [(2, "de", [None, None], True)]
+        assert results["a"]["pending"] == results["b"]["pending"] == "hi"
+    finally:
+        handler.batcher.shutdown()
+
+
+def test_live_requests_with_unbatchable_options_bypass_the_batcher():
+    from modules.live_speech import LiveSpeechHandler
+
+    manager = BatchingManager()
+    handler = LiveSpeechHandler(manager, True, {}, [], None, batching_config={"enabled": True, "max_wait_ms": 0})
+    try:
+        audio = np.zeros(16000, dtype=np.float32)
+        assert handler._transcribe(audio, language="de", fp16=False, initial_prompt="context")["text"] == "hi"
+        assert manager.batches == [(1, "de", ["context"], False)]
+        result = handler._transcribe(audio, temperature=0.4)
+        assert result["text"] == "direct" and result["options"] == {"temperature": 0.4}
+    finally:
+        handler.batcher.shutdown()
+
+
+def test_segments_from_tokens():
+    words = {1: " hello", 2: " world", 3: " again"}
+
+    def decode(tokens):
+        return "".join(words[t] for t in tokens)
+
+    begin = 100
+    segments = segments_from_tokens([100, 1, 2, 150, 150, 3], begin, decode, duration=2.5)
+    assert segments == [
+        {"start": 0.0, "end": 1.0, "text": " hello world", "tokens": [1, 2]},
+        {"start": 1.0, "end": 2.5, "text": " again", "tokens": [3]},
+    ]
+
+
+def test_pad_batch_stacks_thirty_second_rows():
+    batch = pad_batch([np.ones(10, dtype=np.float32), np.ones(BATCH_SAMPLES + 5, dtype=np.float32)])
+    assert batch.shape == (2, BATCH_SAMPLES)
+    assert batch[0, :10].sum() == 10 and batch[0, 10:].sum() == 0
+    assert batch[1].sum() == BATCH_SAMPLES
+
+
+def test_whisper_service_keeps_batching():
+    pytest.importorskip("faster_whisper")
+    path = os.path.join(os.path.dirname(__file__), "..", "src", "whisper-service", "whisper_manager.py")
+    spec = importlib.util.spec_from_file_location("whisper_manager", path)
+    whisper_manager = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(whisper_manager)
+    assert whisper_manager.BATCHING_AVAILABLE
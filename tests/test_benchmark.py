@@ -0,0 +1,35 @@
+import argparse
+
+from tests.performance.audio_fixtures import load_clips
+from tests.performance.backends import StubBackend
+from tests.performance.benchmark import compare, run_backend
+
+
+def _args(**overrides):
+    defaults = {"language": "en", "repeats": 2, "concurrency": [1, 3], "requests_per_client": 2}
+    return argparse.Namespace(**{**defaults, **overrides})
+
+
+def test_stub_backend_report():
+    clips = load_clips(durations=(1.0, 2.0))
+    result = run_backend("stub", "tiny", clips, _args(), backend=StubBackend(realtime_factor=0.05))
+
+    assert result["available"] and "error" not in result
+    assert set(result["clips"]) == {"synthetic-1s", "synthetic-2s"}
+    for clip in result["clips"].values():
+        assert 0.04 <= clip["rtf_median"] < 0.5
+    assert [run["clients"] for run in result["concurrency"]] == [1, 3]
+    assert result["concurrency"][1]["requests"] == 6
+    assert result["peak_rss_mb"] > 0
+
+
+def test_unavailable_backend_is_reported_not_raised():
+    # openai-whisper is optional; without it the report says so instead of failing
+    result = run_backend("openai-whisper", "tiny", load_clips(durations=(1.0,)), _args())
+    assert result["available"] or "error" in result
+
+
+def test_compare_reports_relative_change():
+    old = {"results": [{"backend": "stub", "model": "tiny", "load_seconds": 2.0, "clips": {"a": {"rtf_median": 0.5}}}]}
+    new = {"results": [{"backend": "stub", "model": "tiny", "load_seconds": 1.0, "clips": {"a": {"rtf_median": 0.5}}}]}
+    assert compare(old, new) == ["stub/tiny.load_seconds: 2.0 -> 1.0 (-50.0%)"]
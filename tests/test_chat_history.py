@@ -0,0 +1,288 @@
+import threading
+
+import pytest
+
+from modules.chat_history import ChatHistoryManager
+
+
+@pytest.fixture
+def history(tmp_path):
+    manager = ChatHistoryManager(db_path=str(tmp_path / "history.db"))
+    yield manager
+    manager.close()
+
+
+def test_database_uses_wal(history):
+    with history.db.read() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_add_and_query(history):
+    first = history.add_transcription("hello world", language="en", model_used="base", source_type="upload")
+    history.add_transcription("guten tag", language="de", model_used="tiny", source_type="live")
+
+    assert first > 0
+    assert [row["text"] for row in history.search_transcriptions("world")] == ["hello world"]
+    assert history.get_statistics()["source_breakdown"] == {"upload": 1, "live": 1}
+    assert history.update_transcription(first, "hello there")
+    assert history.delete_transcription(first)
+    assert [row["text"] for row in history.get_recent_transcriptions()] == ["guten tag"]
+
+
+def test_readers_do_not_wait_for_writer(history):
+    history.add_transcription("committed", source_type="upload")
+    writing = threading.Event()
+    release = threading.Event()
+
+    def slow_writer():
+        with history.db.write() as conn:
+            conn.execute("INSERT INTO transcriptions (text) VALUES ('uncommitted')")
+            writing.set()
+            release.wait(timeout=5)
+
+    writer = threading.Thread(target=slow_writer)
+    writer.start()
+    assert writing.wait(timeout=5)
+
+    rows = []
+    reader = threading.Thread(target=lambda: rows.extend(history.get_recent_transcriptions()))
+    reader.start()
+    reader.join(timeout=2)
+    assert not reader.is_alive()
+    assert [row["text"] for row in rows] == ["committed"]
+
+    release.set()
+    writer.join(timeout=5)
+    assert len(history.get_recent_transcriptions()) == 2
+
+
+def test_failed_write_rolls_back(history):
+    with pytest.raises(RuntimeError):
+        with history.db.write() as conn:
+            conn.execute("INSERT INTO transcriptions (text) VALUES ('lost')")
+            raise RuntimeError("boom")
+    assert history.get_recent_transcriptions() == []
+
+
+def test_full_text_search_ranks_and_highlights(history):
+    history.add_transcription("the weather report for tomorrow", source_type="live")
+    history.add_transcription("weather weather weather everywhere", source_type="live")
+    history.add_transcription("quarterly report meeting notes", source_type="upload")
+
+    results = history.search_transcriptions("weather")
+    assert [r["text"] for r in results][0] == "weather weather weather everywhere"
+    assert "<mark>weather</mark>" in results[0]["snippet"]
+
+    assert [r["text"] for r in history.search_transcriptions("quart*")] == ["quarterly report meeting notes"]
+    assert [r["text"] for r in history.search_transcriptions('"weather report"')] == ["the weather report for tomorrow"]
+    assert history.search_transcriptions("report NOT weather")[0]["text"] == "quarterly report meeting notes"
+
+
+def test_index_follows_updates_and_deletes(history):
+    row_id = history.add_transcription("original wording", source_type="upload")
+    history.update_transcription(row_id, "revised wording")
+    assert history.search_transcriptions("original") == []
+    assert len(history.search_transcriptions("revised")) == 1
+
+    history.delete_transcription(row_id)
+    assert history.search_transcriptions("wording") == []
+
+
+def test_existing_database_is_backfilled(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE transcriptions (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, text TEXT NOT NULL, language TEXT, model_used TEXT, "
+            "source_type TEXT, filename TEXT, duration REAL, confidence REAL, metadata TEXT)"
+        )
+        conn.execute("INSERT INTO transcriptions (text) VALUES ('written before the index')")
+
+    manager = ChatHistoryManager(db_path=db_path)
+    try:
+        assert manager.fts_enabled
+        assert [r["text"] for r in manager.search_transcriptions("index")] == ["written before the index"]
+    finally:
+        manager.close()
+
+
+def test_search_syntax_is_sanitized(history):
+    history.add_transcription("plain text", source_type="upload")
+    assert history.search_transcriptions('text" OR (') != []
+
+
+def test_write_behind_batches_rows(history):
+    history.enable_write_behind(batch_size=100, flush_interval_ms=50)
+    for i in range(25):
+        assert history.queue_transcription(f"queued {i}", source_type="live", metadata={"i": i})
+
+    assert history.writer.flush(timeout=5)
+    rows = history.get_recent_transcriptions(limit=100)
+    assert len(rows) == 25
+    assert rows[0]["timestamp"]
+    assert history.writer.get_status()["flushes"] < 25
+
+
+def test_close_flushes_pending_rows(tmp_path):
+    manager = ChatHistoryManager(db_path=str(tmp_path / "history.db"))
+    manager.enable_write_behind(flush_interval_ms=10000)
+    manager.queue_transcription("written on shutdown", source_type="upload")
+    manager.close()
+
+    reopened = ChatHistoryManager(db_path=str(tmp_path / "history.db"))
+    try:
+        assert [r["text"] for r in reopened.get_recent_transcriptions()] == ["written on shutdown"]
+    finally:
+        reopened.close()
+
+
+def test_streaming_export_pages_through_everything(history):
+    import csv
+    import gzip
+    import io
+    import json
+
+    for i in range(7):
+        history.queue_transcription(f"row {i}", language="en", source_type="upload", metadata={"i": i})
+
+    pages = list(history.iter_transcriptions(page_size=3))
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+    document = json.loads("".join(history.iter_export("json", page_size=3)))
+    assert [row["text"] for row in document["transcriptions"]] == [f"row {i}" for i in range(7)]
+    assert document["transcriptions"][0]["metadata"] == {"i": 0}
+
+    lines = "".join(history.iter_export("ndjson", page_size=2)).splitlines()
+    assert json.loads(lines[-1])["text"] == "row 6"
+
+    rows = list(csv.DictReader(io.StringIO("".join(history.iter_export("csv", page_size=4)))))
+    assert len(rows) == 7 and rows[0]["language"] == "en"
+
+    from modules.chat_history import gzip_stream
+
+    compressed = b"".join(gzip_stream(history.iter_export("ndjson")))
+    assert gzip.decompress(compressed).decode("utf-8").count("\n") == 7
+
+
+def test_empty_json_export_is_valid(history):
+    import json
+
+    assert json.loads("".join(history.iter_export("json")))["transcriptions"] == []
+
+
+def test_reimporting_an_export_skips_duplicates(history):
+    import io
+
+    from modules.history_import import HistoryImporter
+
+    for i in range(5):
+        history.add_transcription(f"entry {i}", language="en", duration=i, source_type="upload", metadata={"i": i})
+
+    importer = HistoryImporter(history, batch_size=2)
+    for file_format in ("json", "ndjson", "csv"):
+        exported = "".join(history.iter_export(file_format)).encode("utf-8")
+        job = importer.run(io.BytesIO(exported), file_format)
+        assert (job.status, job.imported, job.duplicates) == ("success", 0, 5)
+
+    assert len(history.get_recent_transcriptions(limit=100)) == 5
+    assert importer.get_job(job.id) is job
+
+
+def test_streaming_import_validates_rows(history):
+    import io
+    import json
+
+    from modules.history_import import HistoryImporter
+
+    records = [{"text": f"imported {i}", "duration": "2.5", "timestamp": "2024-01-01T10:00:00Z"} for i in range(3)]
+    records += [{"text": "  "}, {"text": "bad number", "confidence": "high"}, "not an object"]
+    document = json.dumps({"version": 1, "transcriptions": records, "note": "trailing"})
+
+    importer = HistoryImporter(history, batch_size=2)
+    job = importer.run(io.BytesIO(document.encode("utf-8")), "json")
+    result = job.to_dict()
+
+    assert result["status"] == "partial_success"
+    assert (result["processed_count"], result["imported_count"], result["error_count"]) == (6, 4, 3)
+    stored = {row["text"]: row for row in history.get_recent_transcriptions(limit=10)}
+    assert stored["imported 0"]["timestamp"] == "2024-01-01 10:00:00"
+    assert stored["imported 0"]["source_type"] == "imported"
+    assert stored["bad number"]["confidence"] is None
+
+    csv_content = "\ufefftext,duration\nfrom csv,1\n,2\n"
+    assert history.import_history(csv_content, "csv")["imported_count"] == 1
+    assert history.import_history("[1, 2", "json")["status"] == "error"
+
+
+def test_statistics_follow_inserts_updates_and_deletes(history):
+    first = history.add_transcription("one", language="en", model_used="base", source_type="upload", duration=2)
+    history.add_transcription("two", language="de", model_used="base", source_type="live", duration=4)
+    history.queue_transcription("three", language="en", source_type="live")
+
+    stats = history.get_statistics()
+    assert stats["total_transcriptions"] == 3
+    assert stats["source_breakdown"] == {"live": 2, "upload": 1}
+    assert stats["model_breakdown"] == {"base": 2}
+    assert stats["language_breakdown"] == {"en": 2, "de": 1}
+    assert stats["last_24h"] == stats["last_7d"] == 3
+    assert stats["average_duration"] == 3.0
+    assert sum(day["count"] for day in stats["recent_activity"]) == 3
+
+    with history.db.write() as conn:
+        conn.execute("UPDATE transcriptions SET source_type = 'live' WHERE id = ?", (first,))
+    assert history.get_statistics()["source_breakdown"] == {"live": 3}
+
+    history.delete_transcription(first)
+    with history.db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM transcription_rollups WHERE period = 'hour'").fetchone()[0] == 2
+    assert history.get_statistics()["average_duration"] == 4.0
+
+
+def test_rollups_are_backfilled(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE transcriptions (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, text TEXT NOT NULL, language TEXT, model_used TEXT, "
+            "source_type TEXT, filename TEXT, duration REAL, confidence REAL, metadata TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO transcriptions (timestamp, text, source_type) VALUES (?, ?, ?)",
+            [
+                ("2024-03-01 10:15:00", "a", "upload"),
+                ("2024-03-01 10:45:00", "b", "upload"),
+                ("2024-03-02 08:00:00", "c", None),
+            ],
+        )
+
+    manager = ChatHistoryManager(db_path=db_path)
+    try:
+        assert manager.get_statistics()["source_breakdown"] == {"upload": 2, "unknown": 1}
+        with manager.db.read() as conn:
+            hours = conn.execute("SELECT bucket, count FROM transcription_rollups WHERE period = 'hour' ORDER BY bucket")
+            assert [tuple(row) for row in hours] == [("2024-03-01 10:00:00", 2), ("2024-03-02 08:00:00", 1)]
+    finally:
+        manager.close()
+
+
+def test_identical_results_in_the_same_second_are_all_kept(history):
+    import io
+
+    from modules.chat_history import history_row
+    from modules.history_import import HistoryImporter
+
+    first = history.add_transcription("yes", language="en", model_used="base", source_type="live")
+    second = history.add_transcription("yes", language="en", model_used="base", source_type="live")
+    row = history_row("no", source_type="live", timestamp="2024-01-01 10:00:00")
+    assert history.insert_rows([row, row]) == 2
+
+    assert first and second and first != second
+    assert len(history.get_recent_transcriptions(limit=10)) == 4
+
+    exported = "".join(history.iter_export("ndjson")).encode("utf-8")
+    job = HistoryImporter(history).run(io.BytesIO(exported), "ndjson")
+    assert (job.imported, job.duplicates) == (0, 4)
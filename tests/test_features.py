@@ -0,0 +1,42 @@
+import numpy as np
+
+from modules.features import FeatureExtractor, IncrementalLogMel, log_mel_spectrogram, mel_filters
+
+
+def _reference(audio, n_mels, padding):
+    """Frame-by-frame STFT as whisper.log_mel_spectrogram computes it"""
+    signal = np.pad(np.concatenate((audio, np.zeros(padding, dtype=np.float32))), 200, mode="reflect")
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(400) / 400)
+    frames = np.stack([signal[t * 160 : t * 160 + 400] for t in range((len(audio) + padding) // 160)]) * window
+    log_spec = np.log10(np.maximum(mel_filters(n_mels) @ (np.abs(np.fft.rfft(frames, axis=-1)) ** 2).T, 1e-10))
+    return (np.maximum(log_spec, log_spec.max() - 8.0) + 4.0) / 4.0
+
+
+def test_matches_whisper_features_with_padding():
+    audio = np.random.default_rng(0).standard_normal(16037).astype(np.float32) * 0.1
+    for n_mels, padding in [(80, 0), (80, 150), (128, 480000)]:
+        features = log_mel_spectrogram(audio, n_mels, padding)
+        assert features.shape == (n_mels, (len(audio) + padding) // 160)
+        np.testing.assert_allclose(features, _reference(audio, n_mels, padding), atol=1e-5)
+
+
+def test_incremental_window_reuses_frames():
+    audio = np.random.default_rng(1).standard_normal(16000 * 12).astype(np.float32) * 0.1
+    features = IncrementalLogMel()
+    start = 0
+    for end in range(16000, len(audio) + 1, 16000):
+        if end - start > 16000 * 6:
+            start = (end - 16000 * 3) // 160 * 160  # the window drops old audio on a frame boundary
+        window = features.window(audio[start:end], start, padding=480000)
+        np.testing.assert_allclose(window, log_mel_spectrogram(audio[start:end], padding=480000), atol=1e-5)
+    assert features.stats["frames_reused"] > 2000
+
+
+def test_extractor_prefers_provided_features_then_cache():
+    extractor = FeatureExtractor(cache_mb=1)
+    audio = np.zeros(16000, dtype=np.float32)
+    first = extractor.log_mel(audio)
+    assert extractor.log_mel(audio.copy()) is first  # same content, cached
+    extractor.provide(audio, lambda n_mels, padding: np.ones((n_mels, 1)))
+    assert extractor.log_mel(audio).shape == (80, 1)
+    assert extractor.get_status()["cache_hits"] == 1 and extractor.get_status()["provided"] == 1
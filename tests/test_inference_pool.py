@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from modules.inference_pool import InferencePool, InferenceQueueFull
+from modules.model_cache import ModelCache
+
+
+class FakeModel:
+    def __init__(self, name, gate=None):
+        self.name = name
+        self.gate = gate
+
+    def transcribe(self, audio, **kwargs):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        return {"text": f"{self.name}:{audio}", "language": kwargs.get("language", "en")}
+
+
+class FakeModelManager:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.loaded = []
+        self.model_cache = ModelCache(self.create_model_instance)
+
+    def get_current_model_name(self):
+        return "base"
+
+    def get_current_model(self):
+        return None
+
+    def create_model_instance(self, model_name):
+        self.loaded.append(model_name)
+        return FakeModel(model_name, self.gate)
+
+
+@pytest.fixture
+def pool():
+    pools = []
+
+    def make(**kwargs):
+        manager = kwargs.pop("model_manager", FakeModelManager())
+        p = InferencePool(manager, **kwargs)
+        p.start()
+        pools.append(p)
+        return p
+
+    yield make
+    for p in pools:
+        p.shutdown()
+
+
+def test_transcribe_runs_on_worker(pool):
+    p = pool(workers=2, queue_size=4)
+    result = p.transcribe("clip.wav", language="de")
+    assert result == {"text": "base:clip.wav", "language": "de"}
+    assert p.get_status()["completed"] == 1
+
+
+def test_each_worker_loads_requested_model(pool):
+    manager = FakeModelManager()
+    p = pool(model_manager=manager, workers=1, queue_size=4)
+    assert p.transcribe("a", model_name="tiny")["text"] == "tiny:a"
+    assert p.transcribe("b", model_name="tiny")["text"] == "tiny:b"
+    assert manager.loaded == ["tiny"]
+
+
+def test_full_queue_raises_with_retry_after(pool):
+    gate = threading.Event()
+    p = pool(model_manager=FakeModelManager(gate), workers=1, queue_size=1, retry_after_seconds=7)
+
+    running = p.submit_transcription("first")
+    # Wait until the single worker has taken the first job off the queue
+    deadline = time.monotonic() + 5
+    while p.get_status()["busy_workers"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queued = p.submit_transcription("second")
+
+    with pytest.raises(InferenceQueueFull) as excinfo:
+        p.submit_transcription("third")
+    assert excinfo.value.retry_after == 7
+    assert p.get_status()["rejected"] == 1
+
+    gate.set()
+    assert running.result(timeout=5)["text"] == "base:first"
+    assert queued.result(timeout=5)["text"] == "base:second"
+
+
+def test_shutdown_with_a_full_queue_fails_the_queued_jobs(pool):
+    gate = threading.Event()
+    p = pool(model_manager=FakeModelManager(gate), workers=1, queue_size=1)
+
+    running = p.submit_transcription("first")
+    deadline = time.monotonic() + 5
+    while p.get_status()["busy_workers"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    queued = p.submit_transcription("second")
+
+    started = time.monotonic()
+    p.shutdown(wait=True, timeout=0.2)
+    assert time.monotonic() - started < 2
+    with pytest.raises(RuntimeError):
+        queued.result(timeout=1)
+
+    gate.set()
+    assert running.result(timeout=5)["text"] == "base:first"
+
+
+def test_failed_model_load_propagates(pool):
+    manager = FakeModelManager()
+    manager.model_cache.loader = lambda name: None
+    p = pool(model_manager=manager, workers=1)
+    with pytest.raises(RuntimeError):
+        p.transcribe("clip.wav")
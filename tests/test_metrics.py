@@ -0,0 +1,45 @@
+import threading
+
+from modules.metrics import MetricsRegistry
+
+
+def test_counter_sums_shards_of_finished_threads():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("source_type",))
+
+    def work():
+        for _ in range(1000):
+            requests.inc(source_type="upload")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    requests.inc(5, source_type='li"ve')
+
+    assert requests.collect() == {("upload",): 8000, ('li"ve',): 5}
+    # A new thread's shard retires the dead ones without losing counts
+    late = threading.Thread(target=requests.inc, kwargs={"source_type": "upload"})
+    late.start()
+    late.join()
+    assert requests.collect()[("upload",)] == 8001
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{source_type="li\\"ve"} 5' in text
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", ("model",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, model="base")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{model="base",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{model="base",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{model="base",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{model="base"} 3.65' in lines
+    assert 'latency_seconds_count{model="base"} 4' in lines
+    assert registry.histogram("latency_seconds", "Latency", ("model",)) is latency
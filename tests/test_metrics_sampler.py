@@ -0,0 +1,36 @@
+import time
+
+from admin.metrics_sampler import FIELDS, MetricsSampler
+
+
+def test_ring_buffer_keeps_last_samples_and_aggregates():
+    sampler = MetricsSampler(interval_seconds=0.05, history_seconds=0.2)
+    assert sampler.capacity == 5
+    for _ in range(12):
+        sampler.sample()
+
+    assert sampler.latest()["cpu"]["count"] >= 1
+    windows = sampler.aggregates({"all": 3600, "none": -1})
+    assert windows["all"]["samples"] == sampler.capacity
+    assert windows["none"] == {"samples": 0}
+    for field in FIELDS:
+        stats = windows["all"][field]
+        assert stats["avg"] <= stats["max"] and stats["p95"] <= stats["max"]
+
+
+def test_background_sampling_does_not_block_readers():
+    sampler = MetricsSampler(interval_seconds=0.05, history_seconds=60)
+    sampler.start()
+    try:
+        started = time.perf_counter()
+        first = sampler.latest()
+        assert time.perf_counter() - started < 0.01
+
+        deadline = time.monotonic() + 5
+        while sampler.latest() is first and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sampler.latest() is not first
+        assert sampler.aggregates()["1m"]["samples"] >= 2
+    finally:
+        sampler.shutdown()
+    assert not sampler.running
@@ -0,0 +1,81 @@
+import threading
+
+from modules.model_cache import ModelCache
+from modules.model_manager import ModelManager
+
+
+class Loader:
+    def __init__(self):
+        self.loaded = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name):
+        with self.lock:
+            self.loaded.append(name)
+        return object()
+
+
+ESTIMATES = {"tiny": 100, "base": 200, "small": 500}
+
+
+def test_resident_models_are_reused():
+    loader = Loader()
+    cache = ModelCache(loader, budget_mb=1000, estimates_mb=ESTIMATES)
+    tiny = cache.get("tiny")
+    cache.get("base")
+    assert cache.get("tiny") is tiny
+    assert loader.loaded == ["tiny", "base"]
+    assert cache.get_status()["hits"] == 1
+
+
+def test_least_recently_used_is_evicted_to_fit_budget():
+    loader = Loader()
+    cache = ModelCache(loader, budget_mb=700, estimates_mb=ESTIMATES)
+    cache.get("tiny")
+    cache.get("base")
+    cache.get("tiny")  # base is now least recently used
+    cache.get("small")
+
+    assert cache.peek("base") is None
+    assert cache.peek("tiny") is not None and cache.peek("small") is not None
+    assert cache.get_status()["evictions"] == 1
+
+
+def test_pinned_and_in_use_models_survive_eviction():
+    cache = ModelCache(Loader(), budget_mb=300, estimates_mb=ESTIMATES)
+    cache.get("tiny")
+    cache.pin("tiny")
+    with cache.use("base", slot=1):
+        cache.get("small")
+        assert cache.peek("base", slot=1) is not None
+    assert cache.peek("tiny") is not None
+
+
+def test_slots_hold_separate_instances():
+    loader = Loader()
+    cache = ModelCache(loader, budget_mb=1000, estimates_mb=ESTIMATES)
+    assert cache.get("tiny", slot=0) is not cache.get("tiny", slot=1)
+    assert cache.evict("tiny") == 2
+
+
+def test_concurrent_misses_load_once():
+    loader = Loader()
+    cache = ModelCache(loader, budget_mb=1000, estimates_mb=ESTIMATES)
+    threads = [threading.Thread(target=cache.get, args=("base",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.loaded == ["base"]
+
+
+def test_model_switch_keeps_previous_model_resident():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    assert manager.load_model("base")
+    base = manager.get_current_model()
+    assert manager.load_model("tiny")
+    assert manager.load_model("base")
+    assert manager.get_current_model() is base
+    # A request can name another model without switching the default
+    assert manager.transcribe([0.0] * 16000, model_name="small")["text"]
+    assert manager.get_current_model_name() == "base"
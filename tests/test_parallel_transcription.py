@@ -0,0 +1,30 @@
+import numpy as np
+
+from modules.audio_ingest import SAMPLE_RATE
+from modules.model_manager import ModelManager
+from modules.parallel_transcription import ParallelTranscriber, plan_pieces
+
+
+def test_pieces_are_cut_between_speech_regions():
+    regions = [(0, 40), (50, 90), (100, 120), (130, 400)]
+    pieces = plan_pieces(regions, target_samples=80, max_samples=100)
+    assert pieces == [[(0, 40), (50, 90)], [(100, 120)], [(130, 230)], [(230, 330)], [(330, 400)]]
+
+
+def test_long_file_is_split_across_worker_processes():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    parallel = ParallelTranscriber(manager, max_processes=2, min_duration_seconds=5, piece_seconds=2)
+    try:
+        assert not parallel.should_use(4.0)
+        assert parallel.should_use(6.0)
+
+        result = parallel.transcribe(np.zeros(6 * SAMPLE_RATE, dtype=np.float32), model_name="tiny", language="de")
+        assert parallel.get_status()["workers"] == 2
+        # Pieces come back in order with timestamps on the original timeline
+        assert [segment["start"] for segment in result["segments"]] == [0.0, 2.0, 4.0]
+        assert result["segments"][-1]["words"][-1]["end"] == 6.0
+        assert result["language"] == "de"
+        assert len(result["text"].split()) == 15
+    finally:
+        parallel.shutdown()
+    assert parallel.get_status()["workers"] == 0
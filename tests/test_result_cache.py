@@ -0,0 +1,83 @@
+import io
+import time
+import wave
+
+import numpy as np
+from flask import Flask
+
+from modules.metrics import TRANSCRIPTION_REQUESTS
+from modules.model_manager import ModelManager
+from modules.result_cache import ResultCache
+from modules.upload_handler import UploadHandler
+
+RESULT = {"text": "hallo", "language": "de", "segments": [{"start": 0.0, "end": 1.0, "text": " hallo"}]}
+
+
+def test_key_depends_on_audio_and_settings():
+    audio = np.zeros(16000, dtype=np.float32)
+    key = ResultCache.key(audio, {"model": "base", "language": "auto"})
+    assert key == ResultCache.key(audio.copy(), {"language": "auto", "model": "base"})
+    assert key != ResultCache.key(audio, {"model": "tiny", "language": "auto"})
+    assert key != ResultCache.key(audio + 0.001, {"model": "base", "language": "auto"})
+
+
+def test_entries_expire_and_are_evicted_least_recently_used_first(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.db"), max_mb=250 / (1024 * 1024))  # room for two results
+    cache.put("a", "base", RESULT)
+    cache.put("b", "base", RESULT)
+    assert cache.get("a") == RESULT  # b is now least recently used
+    cache.put("c", "base", RESULT)
+    assert cache.get("b") is None and cache.get("c") == RESULT
+    assert cache.get_status()["evictions"] == 1
+
+    cache.max_age_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("a") is None
+
+
+def _wav():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(np.zeros(16000, dtype="<i2").tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+class NullHistory:
+    def queue_transcription(self, **kwargs):
+        pass
+
+
+def test_repeated_upload_is_served_from_cache(tmp_path):
+    manager = ModelManager(stub_realtime_factor=0.0)
+    manager.load_model("base")
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    handler = UploadHandler(manager, True, {"total_transcriptions": 0}, NullHistory(), result_cache=cache)
+    app = Flask(__name__)
+    app.add_url_rule("/transcribe", view_func=handler.transcribe_upload, methods=["POST"])
+    client = app.test_client()
+
+    def requests_by_cache():
+        counts = {}
+        for key, value in TRANSCRIPTION_REQUESTS.collect().items():
+            if key[1] == "upload":
+                counts[key[-1]] = counts.get(key[-1], 0) + value
+        return counts
+
+    before = requests_by_cache()
+    first = client.post("/transcribe", data={"audio": (_wav(), "a.wav")})
+    second = client.post("/transcribe", data={"audio": (_wav(), "b.wav")})
+    bypass = client.post("/transcribe", data={"audio": (_wav(), "a.wav")}, headers={"X-Cache-Bypass": "1"})
+    other_options = client.post("/transcribe", data={"audio": (_wav(), "a.wav"), "language": "de"})
+
+    assert [r.headers["X-Cache"] for r in (first, second, bypass, other_options)] == ["MISS", "HIT", "BYPASS", "MISS"]
+    assert second.json["text"] == first.json["text"]
+    # A hit returns the full segment-level result, not just the text
+    assert second.json["segments"] == first.json["segments"] and second.json["segments"]
+    # Hits are requests too, counted without inference latency
+    after = requests_by_cache()
+    counted = {cache: n - before.get(cache, 0) for cache, n in after.items() if n != before.get(cache, 0)}
+    assert counted == {"miss": 2, "hit": 1, "bypass": 1}
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from modules.serving import GracefulShutdown, offload, server_options
+
+
+def test_drain_runs_steps_in_order_with_a_shared_deadline():
+    shutdown = GracefulShutdown(timeout_seconds=1.0)
+    calls = []
+
+    def slow(remaining):
+        calls.append(("slow", remaining))
+        time.sleep(0.3)
+
+    def broken(remaining):
+        raise RuntimeError("boom")
+
+    shutdown.add("slow", slow)
+    shutdown.add("broken", broken)
+    shutdown.add("last", lambda remaining: calls.append(("last", remaining)))
+    shutdown.drain()
+
+    assert shutdown.draining
+    assert [name for name, _ in calls] == ["slow", "last"]
+    # A failing step does not stop the drain; later steps get what is left of the deadline
+    assert calls[0][1] > 0.9 and calls[1][1] < 0.75
+
+
+def test_open_requests_are_waited_for():
+    shutdown = GracefulShutdown(timeout_seconds=2.0)
+    shutdown.add("open requests", shutdown.wait_for_requests)
+    shutdown.request_started()
+    threading.Timer(0.2, shutdown.request_finished).start()
+
+    started = time.monotonic()
+    shutdown.drain()
+    assert 0.15 < time.monotonic() - started < 1.5
+    assert shutdown.get_status()["active_requests"] == 0
+
+
+def test_wait_for_requests_gives_up_at_the_deadline():
+    shutdown = GracefulShutdown()
+    shutdown.request_started()
+    assert not shutdown.wait_for_requests(0.05)
+
+
+def test_threading_mode_runs_offloaded_work_inline():
+    assert offload(lambda a, b=0: a + b, 2, b=3) == 5
+    assert server_options("threading", "c.pem", "k.pem") == {
+        "allow_unsafe_werkzeug": True,
+        "ssl_context": ("c.pem", "k.pem"),
+    }
+    assert server_options("gevent", "c.pem", "k.pem")["certfile"] == "c.pem"
+
+
+def test_gevent_is_opt_in():
+    # main.py monkey-patches the standard library only when gevent mode is configured
+    from config import config_manager
+
+    assert config_manager.get_server_config()["async_mode"] == "threading"
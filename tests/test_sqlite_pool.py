@@ -0,0 +1,53 @@
+import sqlite3
+import threading
+
+import pytest
+
+from modules.sqlite_pool import SQLiteConnectionManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteConnectionManager(str(tmp_path / "pool.db"), pool_size=2, checkout_timeout=0.1)
+    with db.write() as conn:
+        conn.execute("CREATE TABLE items (value INTEGER)")
+        conn.execute("INSERT INTO items VALUES (1)")
+    yield db
+    db.close_all()
+
+
+def test_short_lived_threads_share_the_pooled_connections(db):
+    connects = []
+    original = db._connect
+    db._connect = lambda: connects.append(1) or original()
+
+    def query():
+        with db.read() as conn:
+            assert conn.execute("SELECT value FROM items").fetchone()[0] == 1
+
+    # Werkzeug serves every request on a new thread
+    for _ in range(20):
+        thread = threading.Thread(target=query)
+        thread.start()
+        thread.join()
+
+    assert len(connects) == 1
+    assert db.get_status()["open_connections"] <= 3  # pool plus the writer
+
+
+def test_close_all_leaves_checked_out_connections_usable(db):
+    with db.read() as conn:
+        db.close_all()
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+    assert db.get_status()["open_connections"] == 0
+    with db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+
+def test_exhausted_pool_times_out(db):
+    with db.read(), db.read():
+        with pytest.raises(sqlite3.OperationalError):
+            with db.read():
+                pass
+    with db.read() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
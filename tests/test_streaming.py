@@ -0,0 +1,87 @@
+import numpy as np
+
+from modules.streaming import LocalAgreement, RingBuffer, StreamingEngine, Word
+
+RATE = 16000
+WORD_SAMPLES = RATE // 2
+
+
+def block(value, seconds=1.0):
+    return np.full(int(seconds * RATE), value, dtype=np.float32)
+
+
+class WordPerHalfSecond:
+    """Fake model: every complete half second of audio is one word named after its sample value"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, audio, model_name=None, **options):
+        self.calls.append((len(audio), options))
+        words = [
+            {"word": f" w{int(audio[i])}", "start": i / RATE, "end": (i + WORD_SAMPLES) / RATE}
+            for i in range(0, len(audio) - WORD_SAMPLES + 1, WORD_SAMPLES)
+        ]
+        return {"text": "".join(w["word"] for w in words), "language": "en", "segments": [{"words": words}]}
+
+
+def test_ring_buffer_wraps_and_drops_oldest():
+    buffer = RingBuffer(5)
+    assert buffer.append([1, 2, 3]) == 0
+    assert buffer.append([4, 5, 6, 7]) == 2
+    assert (buffer.start, buffer.end) == (2, 7)
+    np.testing.assert_array_equal(buffer.read(), [3, 4, 5, 6, 7])
+    np.testing.assert_array_equal(buffer.read(4), [5, 6, 7])
+
+    buffer.discard_until(6)
+    np.testing.assert_array_equal(buffer.read(), [7])
+
+
+def test_local_agreement_commits_stable_prefix():
+    agreement = LocalAgreement()
+    assert agreement.insert([Word(0, 1, " hello"), Word(1, 2, " word")]) == []
+
+    committed = agreement.insert([Word(0, 1, " Hello"), Word(1, 2, " world"), Word(2, 3, " again")])
+    assert [w.text for w in committed] == [" Hello"]
+    assert [w.text for w in agreement.pending] == [" world", " again"]
+
+    # Words repeated from before the commit point are not committed twice
+    agreement.insert([Word(0.5, 1, " Hello"), Word(1, 2, " world"), Word(2, 3, " again")])
+    assert [w.text for w in agreement.committed] == [" Hello", " world", " again"]
+
+
+def test_engine_emits_partials_and_final():
+    model = WordPerHalfSecond()
+    engine = StreamingEngine(model, window_seconds=30, min_chunk_seconds=1.0, trim_seconds=15)
+    engine.start_session("sid", language="de", model_name="small")
+    assert engine.session_model("sid") == "small"
+
+    first = engine.feed("sid", block(1))
+    assert first["committed"] == "" and first["pending"] == "w1 w1"
+
+    second = engine.feed("sid", block(2))
+    assert second["committed"] == "w1 w1"
+    assert second["pending"] == "w2 w2"
+    assert model.calls[-1][1]["language"] == "de"
+
+    # Too little new audio for another pass
+    assert engine.feed("sid", block(3, seconds=0.5)) is None
+
+    final = engine.finish("sid")
+    assert final["text"] == "w1 w1 w2 w2 w3"
+    assert final["duration"] == 2.5 and final["model_name"] == "small"
+    assert not engine.has_session("sid")
+    assert engine.finish("sid") is None
+
+
+def test_engine_trims_committed_audio():
+    model = WordPerHalfSecond()
+    engine = StreamingEngine(model, window_seconds=10, min_chunk_seconds=1.0, trim_seconds=3)
+    engine.start_session("sid")
+    for value in range(1, 7):
+        engine.feed("sid", block(value))
+
+    # Later passes only decode the uncommitted tail, not the whole recording
+    assert model.calls[-1][0] < 6 * RATE
+    assert "initial_prompt" in model.calls[-1][1]
+    assert engine.finish("sid")["text"] == " ".join(f"w{v} w{v}" for v in range(1, 7))
@@ -0,0 +1,33 @@
+import numpy as np
+
+from modules.audio_ingest import SAMPLE_RATE
+from modules.model_manager import ModelManager
+from modules.streaming import StreamingEngine
+
+
+def test_stub_model_manager_loads_and_transcribes():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    assert manager.whisper_available
+    assert manager.load_model("tiny")
+
+    result = manager.transcribe(np.zeros(2 * SAMPLE_RATE, dtype=np.float32), language="de")
+    assert result["language"] == "de"
+    assert len(result["text"].split()) == 5
+    assert (
+        manager.transcribe_batch([np.zeros(SAMPLE_RATE, dtype=np.float32)] * 3)
+        == [manager.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))] * 3
+    )
+
+
+def test_stub_model_drives_streaming_sessions():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    manager.load_model("base")
+    engine = StreamingEngine(lambda audio, model_name=None, **options: manager.transcribe(audio, **options))
+
+    engine.start_session("client")
+    for _ in range(4):
+        engine.feed("client", np.zeros(SAMPLE_RATE, dtype=np.float32))
+    final = engine.finish("client")
+
+    assert final["passes"] == 4
+    assert final["text"]
@@ -0,0 +1,160 @@
+import io
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from modules.model_manager import ModelManager
+from modules.transcription_jobs import TranscriptionJobManager, to_srt, to_vtt
+from modules.transcription_options import parse_options
+
+
+def _wav(seconds):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(np.zeros(int(16000 * seconds), dtype="<i2").tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def _wait(jobs, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get_job(job_id)
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job still {job['status']}")
+
+
+@pytest.fixture
+def manager():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    manager.load_model("tiny")
+    return manager
+
+
+def _jobs(tmp_path, manager, **kwargs):
+    return TranscriptionJobManager(str(tmp_path / "jobs.db"), manager.transcribe, **kwargs)
+
+
+def test_job_runs_in_chunks_and_reports_progress(tmp_path, manager):
+    updates = []
+    jobs = _jobs(tmp_path, manager, chunk_seconds=2, on_update=updates.append)
+    jobs.start()
+    job = jobs.submit(_wav(5), "talk.wav", parse_options({"model": "tiny"}, ["tiny"]))
+    assert job["status"] == "queued"
+
+    job = _wait(jobs, job["job_id"])
+    jobs.shutdown(wait=True)
+
+    assert job["status"] == "completed" and job["duration"] == 5.0
+    progress = [update["progress"] for update in updates if update["status"] == "running"]
+    assert progress[-3:] == [0.3333, 0.6667, 1.0]
+    result = jobs.get_result(job["job_id"])
+    # Segments of later chunks are shifted by the chunk offset
+    assert [segment["start"] for segment in result["segments"]] == [0.0, 2.0, 4.0]
+    assert not list((tmp_path / "job_audio").iterdir())
+
+
+def test_chunks_are_cut_in_silences(tmp_path):
+    from modules.vad import VoiceActivityDetector
+
+    rate = 16000
+    t = np.arange(int(1.5 * rate)) / rate
+    tone = (0.3 * np.sin(2 * np.pi * 220.0 * t) * 32767).astype("<i2")
+    # 1.5 s of speech, 1 s of silence, 1.5 s of speech: a fixed 2 s cut would land inside the second word
+    samples = np.concatenate([tone, np.zeros(rate, dtype="<i2"), tone])
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    buffer.seek(0)
+
+    chunks = []
+
+    def transcribe(audio, model_name=None, **options):
+        chunks.append(len(audio) / rate)
+        return {"text": "word", "language": "en", "segments": [{"start": 0.0, "end": len(audio) / rate, "text": "word"}]}
+
+    jobs = TranscriptionJobManager(
+        str(tmp_path / "jobs.db"), transcribe, chunk_seconds=2, vad=VoiceActivityDetector(padding_ms=0)
+    )
+    jobs.start()
+    job_id = jobs.submit(buffer, "a.wav", parse_options({}, ["tiny"], default_model="tiny"))["job_id"]
+    assert _wait(jobs, job_id)["status"] == "completed"
+    jobs.shutdown(wait=True)
+
+    assert len(chunks) == 2 and all(abs(seconds - 1.5) < 0.05 for seconds in chunks)
+    starts = [segment["start"] for segment in jobs.get_result(job_id)["segments"]]
+    assert abs(starts[0]) < 0.05 and abs(starts[1] - 2.5) < 0.05
+
+
+def test_queued_jobs_survive_a_restart(tmp_path, manager):
+    options = parse_options({}, ["tiny"], default_model="tiny")
+    first = _jobs(tmp_path, manager)
+    job_id = first.submit(_wav(1), "a.wav", options)["job_id"]
+    cancelled_id = first.submit(_wav(1), "b.wav", options)["job_id"]
+    assert first.cancel(cancelled_id)["status"] == "cancelled"
+    first.db.close_all()  # never started, as if the server stopped before a worker picked the jobs up
+
+    second = _jobs(tmp_path, manager)
+    second.start()
+    assert _wait(second, job_id)["status"] == "completed"
+    assert second.get_job(cancelled_id)["status"] == "cancelled"
+    second.shutdown(wait=True)
+
+
+def test_cancel_wins_over_a_worker_that_already_read_the_job(tmp_path, manager):
+    jobs = _jobs(tmp_path, manager)
+    job_id = jobs.submit(_wav(1), "a.wav", parse_options({}, ["tiny"], default_model="tiny"))["job_id"]
+    stale = jobs._row(job_id)
+    assert jobs.cancel(job_id)["status"] == "cancelled"
+
+    # The worker's read of the row happened before the cancel
+    read = jobs._row
+    jobs._row = lambda row_id: stale if row_id == job_id else read(row_id)
+    jobs.start()
+    jobs.shutdown(wait=True)
+
+    jobs._row = read
+    assert jobs.get_job(job_id)["status"] == "cancelled"
+    assert not jobs._cancelled
+
+
+def test_draining_finishes_the_running_job_and_keeps_queued_ones(tmp_path, manager):
+    options = parse_options({}, ["tiny"], default_model="tiny")
+    running, release = threading.Event(), threading.Event()
+
+    def transcribe(audio, **kwargs):
+        running.set()
+        release.wait(timeout=5)
+        return manager.transcribe(audio, **kwargs)
+
+    jobs = TranscriptionJobManager(str(tmp_path / "jobs.db"), transcribe)
+    jobs.start()
+    first = jobs.submit(_wav(1), "a.wav", options)["job_id"]
+    second = jobs.submit(_wav(1), "b.wav", options)["job_id"]
+    assert running.wait(timeout=5)
+    threading.Timer(0.1, release.set).start()
+    jobs.shutdown(wait=True, timeout=5)
+
+    restarted = _jobs(tmp_path, manager)
+    assert restarted.get_job(first)["status"] == "completed"
+    assert restarted.get_job(second)["status"] == "queued"
+    restarted.start()
+    assert _wait(restarted, second)["status"] == "completed"
+    restarted.shutdown(wait=True)
+
+
+def test_subtitle_formats():
+    segments = [{"start": 0.0, "end": 1.5, "text": " Hallo"}, {"start": 3661.25, "end": 3662.0, "text": " Welt"}]
+    assert to_srt(segments) == "1\n00:00:00,000 --> 00:00:01,500\nHallo\n\n2\n01:01:01,250 --> 01:01:02,000\nWelt\n"
+    assert to_vtt(segments).startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\nHallo\n")
@@ -0,0 +1,112 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from modules.model_manager import ModelManager
+from modules.transcription_options import WHISPER_LANGUAGES, InvalidOptionsError, parse_options
+from modules.upload_handler import UploadHandler
+
+MODELS = ["tiny", "base", "small"]
+
+
+def test_form_strings_are_coerced():
+    options = parse_options(
+        {
+            "model": "tiny",
+            "language": "de",
+            "beam_size": "5",
+            "temperature": "0,0.2,0.4",
+            "condition_on_previous_text": "false",
+            "word_timestamps": "1",
+            "initial_prompt": "WhisperS2T, Proxmox",
+        },
+        MODELS,
+    )
+    assert options.model_name == "tiny"
+    assert options.transcribe_kwargs() == {
+        "language": "de",
+        "beam_size": 5,
+        "temperature": (0.0, 0.2, 0.4),
+        "condition_on_previous_text": False,
+        "word_timestamps": True,
+        "initial_prompt": "WhisperS2T, Proxmox",
+    }
+
+
+def test_defaults_use_current_model_and_auto_language():
+    options = parse_options({"audio": "ignored"}, MODELS, default_model="base")
+    assert options.model_name == "base"
+    assert options.transcribe_kwargs() == {}
+
+
+def test_every_invalid_option_is_reported():
+    with pytest.raises(InvalidOptionsError) as excinfo:
+        parse_options({"model": "huge", "beam_size": "0", "temperature": "hot", "word_timestamps": "maybe"}, MODELS)
+    assert len(excinfo.value.errors) == 4
+
+
+def test_unknown_language_is_rejected():
+    with pytest.raises(InvalidOptionsError) as excinfo:
+        parse_options({"language": "xx"}, MODELS)
+    assert excinfo.value.errors == ["language: must be auto or a Whisper language code"]
+
+
+@pytest.mark.parametrize("temperature", ["nan", "0,inf", "-inf"])
+def test_non_finite_temperatures_are_rejected(temperature):
+    with pytest.raises(InvalidOptionsError) as excinfo:
+        parse_options({"temperature": temperature}, MODELS)
+    assert excinfo.value.errors == ["temperature: must be a finite number"]
+
+
+def test_language_codes_match_whisper():
+    tokenizer = pytest.importorskip("whisper.tokenizer")
+    assert set(WHISPER_LANGUAGES) == set(tokenizer.LANGUAGES)
+
+
+def _wav(seconds=1.0):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(np.zeros(int(16000 * seconds), dtype="<i2").tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+class NullHistory:
+    def queue_transcription(self, **kwargs):
+        self.last = kwargs
+
+
+@pytest.fixture
+def live_client():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    manager.load_model("base")
+    handler = UploadHandler(manager, True, {"total_transcriptions": 0}, NullHistory())
+    app = Flask(__name__)
+    app.add_url_rule("/api/transcribe-live", view_func=handler.transcribe_live_api, methods=["POST"])
+    return app.test_client(), manager
+
+
+def test_request_routes_to_named_model_without_switching(live_client):
+    client, manager = live_client
+    response = client.post(
+        "/api/transcribe-live",
+        data={"audio": (_wav(), "a.wav"), "model": "tiny", "beam_size": "1", "word_timestamps": "true"},
+    )
+    assert response.status_code == 200
+    assert response.json["model_used"] == "tiny"
+    assert response.json["segments"][0]["words"]
+    assert manager.get_current_model_name() == "base"
+    assert manager.model_cache.is_resident("tiny")
+
+
+def test_invalid_options_return_400(live_client):
+    client, _ = live_client
+    response = client.post("/api/transcribe-live", data={"audio": (_wav(), "a.wav"), "temperature": "2"})
+    assert response.status_code == 400
+    assert response.json["details"] == ["temperature: must be between 0.0 and 1.0"]
@@ -0,0 +1,65 @@
+import numpy as np
+
+from modules.vad import SpeechTimeline, VoiceActivityDetector, remap_result
+
+RATE = 16000
+
+
+def tone(seconds, amplitude=0.3, frequency=220.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def silence(seconds, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * RATE)) * 1e-4).astype(np.float32)
+
+
+def test_speech_regions_skip_silence():
+    vad = VoiceActivityDetector(padding_ms=0)
+    audio = np.concatenate([silence(1), tone(1), silence(1, seed=1), tone(1)])
+
+    regions = vad.speech_regions(audio)
+    assert len(regions) == 2
+    for (start, end), expected in zip(regions, (1.0, 3.0)):
+        assert abs(start / RATE - expected) < 0.05
+        assert abs(end / RATE - (expected + 1.0)) < 0.05
+
+
+def test_compact_counts_skipped_seconds():
+    vad = VoiceActivityDetector(padding_ms=0)
+    speech, timeline = vad.compact(np.concatenate([silence(2), tone(1)]))
+    assert abs(len(speech) / RATE - 1.0) < 0.05
+    assert abs(vad.get_status()["skipped_seconds"] - 2.0) < 0.05
+
+    silent, _ = vad.compact(silence(1))
+    assert len(silent) == 0
+    assert vad.get_status()["silent_chunks"] == 1
+
+
+def test_continuous_speech_is_kept_whole():
+    audio = tone(2)
+    speech, _ = VoiceActivityDetector().compact(audio)
+    assert speech is audio
+
+
+def test_is_silent_only_flags_chunks_without_speech():
+    vad = VoiceActivityDetector(padding_ms=0)
+    assert vad.is_silent(silence(1))
+    # A chunk with some speech is kept whole, leading silence included
+    assert not vad.is_silent(np.concatenate([silence(0.5), tone(0.5)]))
+    assert vad.get_status()["silent_chunks"] == 1
+
+
+def test_remap_result_restores_original_times():
+    timeline = SpeechTimeline([(RATE, 2 * RATE), (3 * RATE, 4 * RATE)], RATE)
+    result = remap_result(
+        {"segments": [{"start": 0.5, "end": 1.5, "words": [{"word": "x", "start": 1.25, "end": 1.5}]}]}, timeline
+    )
+    segment = result["segments"][0]
+    assert (segment["start"], segment["end"]) == (1.5, 3.5)
+    assert segment["words"][0]["start"] == 3.25
+
+
+def test_custom_backend():
+    vad = VoiceActivityDetector(padding_ms=0, backend=lambda frames: np.zeros(len(frames), dtype=bool))
+    assert vad.speech_regions(tone(1)) == []
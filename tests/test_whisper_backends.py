@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from modules.model_manager import ModelManager
+from modules.whisper_backends import OPENAI_WHISPER, FasterWhisperModel, create_backend
+
+
+class FakeCT2Model:
+    """faster_whisper.WhisperModel stand-in: lazy segment generator plus info"""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((audio, kwargs))
+        word = SimpleNamespace(word=" hallo", start=0.0, end=0.5, probability=0.9)
+        segment = SimpleNamespace(
+            id=0,
+            start=0.0,
+            end=1.0,
+            text=" hallo",
+            tokens=[1, 2],
+            temperature=0.0,
+            avg_logprob=-0.2,
+            compression_ratio=1.0,
+            no_speech_prob=0.01,
+            words=[word],
+        )
+        return iter([segment]), SimpleNamespace(language="de")
+
+
+def test_faster_whisper_results_match_openai_format():
+    ct2 = FakeCT2Model()
+    result = FasterWhisperModel(ct2).transcribe([0.0] * 16000, fp16=False, language="de", word_timestamps=True)
+
+    assert result["text"] == "hallo"
+    assert result["language"] == "de"
+    assert result["segments"][0]["words"][0]["word"] == " hallo"
+    audio, kwargs = ct2.calls[0]
+    assert audio.dtype == np.float32
+    # fp16 is dropped and decoding stays greedy like openai-whisper's default
+    assert kwargs == {"language": "de", "word_timestamps": True, "beam_size": 1}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("whisper.cpp")
+
+
+def test_status_reports_backend():
+    manager = ModelManager(stub_realtime_factor=0.0)
+    status = manager.get_status()
+    assert status["backend"]["name"] == "stub"
+    assert sorted(status["downloaded_model_ids"]) == sorted(ModelManager.AVAILABLE_MODELS)
+    assert manager.start_download_model("tiny")
+    assert manager.get_download_progress("tiny")["status"] == "completed"
+
+
+def test_openai_whisper_stays_the_default_backend():
+    # Appliances in the field hold openai-whisper .pt models; faster-whisper is opt-in
+    from config import config_manager
+
+    assert config_manager.get_backend_config()["backend"] == OPENAI_WHISPER